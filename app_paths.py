@@ -46,6 +46,32 @@ def get_upload_path(filename):
     """Get full path for an uploaded file."""
     return os.path.join(uploads_dir(), filename)
 
+def name_cache_path():
+    return get_data_path("name_cache.sqlite")
+
+def session_state_path():
+    """Playwright storage state (cookies/localStorage) of the last Golden login."""
+    return get_data_path("golden_session.json")
+
+def session_meta_path():
+    return get_data_path("golden_session_meta.json")
+
+def sender_aliases_path():
+    return get_data_path("sender_aliases.sqlite")
+
+def ledger_snapshots_path():
+    return get_data_path("ledger_snapshots.sqlite")
+
+def golden_endpoints_path():
+    """Request templates recorded from the UI, replayed by golden_http."""
+    return get_data_path("golden_endpoints.json")
+
+def debug_screenshots_dir(run_id):
+    """Per-run directory for debug screenshots, creating it if needed."""
+    path = os.path.join(get_app_data_dir(), "debug_screenshots", run_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 def debug_log_path():
     return get_data_path("debug.log")
 
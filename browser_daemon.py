@@ -0,0 +1,275 @@
+"""
+Long-lived browser worker for RPA jobs.
+The Flask process starts it once; it keeps a logged-in Golden page warm and takes
+jobs (full statement runs, single corrections, dry-run lookups) from a queue, so a
+WhatsApp correction only has to navigate instead of launch + login + navigate.
+"""
+import os
+import time
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing
+
+HEARTBEAT_SECONDS = 10
+# Without a heartbeat for this long the worker is considered hung and restarted
+STALE_AFTER_SECONDS = int(os.getenv("BROWSER_DAEMON_STALE_SECONDS", "120"))
+# While idle, re-check the Golden session this often so it does not expire between jobs
+KEEPALIVE_SECONDS = int(os.getenv("BROWSER_DAEMON_KEEPALIVE_SECONDS", "300"))
+JOB_KINDS = ("statement", "correction", "lookup", "ping")
+# Jobs that enter payments: a worker running one is never killed for a late heartbeat
+WRITE_JOB_KINDS = ("statement", "correction")
+# How long a caller waits for a job before giving up (seconds)
+STATEMENT_TIMEOUT = int(os.getenv("BROWSER_DAEMON_STATEMENT_TIMEOUT", "7200"))
+CORRECTION_TIMEOUT = int(os.getenv("BROWSER_DAEMON_CORRECTION_TIMEOUT", "600"))
+
+
+def daemon_main(jobs, results, headless=None):
+    """Entry point of the worker process."""
+    try:
+        asyncio.run(serve(jobs, results, headless))
+    except Exception as e:
+        print(f"[BROWSER] Worker crashed: {e}")
+        results.put({"type": "crashed", "error": str(e), "time": time.time()})
+
+
+async def run_job(page, job):
+    import rpa_executioner as rpaexec
+
+    kind, args = job["kind"], job.get("args", {})
+    if kind == "statement":
+        result = await rpaexec.run_statement_job(page, **args)
+        return result.to_dict(orient="records")
+    if kind == "correction":
+        await rpaexec.run_correction_job(page, **args)
+        return True
+    if kind == "lookup":
+        return await rpaexec.run_lookup_job(page, **args)
+    if kind == "ping":
+        return page.url
+    raise ValueError(f"unknown job kind {kind}")
+
+
+async def serve(jobs, results, headless=None):
+    """Worker loop: open one logged-in page, then run jobs from the queue one at a time."""
+    from playwright.async_api import async_playwright
+    from playwright_stealth import Stealth
+    import rpa_executioner as rpaexec
+
+    state = {"state": "starting", "job": None, "jobs_done": 0}
+
+    async def heartbeat():
+        while True:
+            results.put({"type": "heartbeat", "time": time.time(), **state})
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    async with Stealth().use_async(async_playwright()) as playwright:
+        print("[BROWSER] Launching browser...")
+        browser = await playwright.chromium.launch(headless=rpaexec.use_headless(headless))
+        context, page = await rpaexec.open_golden_session(browser, ignore_https_errors=True)
+        await rpaexec.close_notification_popup(page)
+        last_session_check = time.time()
+        state["state"] = "ready"
+        print("[BROWSER] Worker is ready")
+
+        while True:
+            try:
+                job = await asyncio.to_thread(jobs.get, True, KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # Idle: touch the session so the next job does not pay for a login
+                await rpaexec.ensure_golden_session(page)
+                await rpaexec.save_golden_session(context)
+                last_session_check = time.time()
+                continue
+            if job is None:
+                break
+
+            state["state"], state["job"] = "busy", job["kind"]
+            try:
+                if time.time() - last_session_check > KEEPALIVE_SECONDS:
+                    await rpaexec.ensure_golden_session(page)
+                last_session_check = time.time()
+                result = await run_job(page, job)
+                results.put({"type": "result", "id": job["id"], "ok": True, "result": result})
+            except Exception as e:
+                print(f"[BROWSER] Job {job['kind']} failed: {e}")
+                results.put({"type": "result", "id": job["id"], "ok": False, "error": str(e)})
+            state["state"], state["job"] = "ready", None
+            state["jobs_done"] += 1
+            await rpaexec.save_golden_session(context)
+
+        await browser.close()
+    heartbeat_task.cancel()
+
+
+class BrowserDaemon:
+    """
+    Flask-side handle to the worker process.
+    Jobs are sent over a queue and their results are matched back by id; a monitor
+    thread restarts the worker when it dies or stops sending heartbeats.
+    """
+
+    def __init__(self, headless=None):
+        self.headless = headless
+        self.process = None
+        self.jobs = None
+        self.results = None
+        # Guards the process handle and the waiting slots; reentrant so restart can call start
+        self.lock = threading.RLock()
+        self.job_ids = itertools.count(1)
+        self.waiting = {}
+        self.last_heartbeat = None
+        self.worker_state = {}
+        self.restarts = 0
+        self.monitor_thread = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def is_stale(self):
+        return self.last_heartbeat is not None and time.time() - self.last_heartbeat > STALE_AFTER_SECONDS
+
+    def is_ready(self):
+        # A worker that stopped sending heartbeats would never pick the job up
+        return self.is_alive() and not self.is_stale() and self.worker_state.get("state") in ("ready", "busy")
+
+    def running_job(self):
+        """Kind of the job the worker is running, or None."""
+        if not self.is_alive():
+            return None
+        return self.worker_state.get("job")
+
+    def start(self):
+        """Start the worker (and the monitor thread) unless it is already running."""
+        with self.lock:
+            if self.is_alive():
+                return self.process
+            self.jobs = multiprocessing.Queue()
+            self.results = multiprocessing.Queue()
+            self.last_heartbeat = time.time()
+            self.worker_state = {"state": "starting"}
+            self.process = multiprocessing.Process(target=daemon_main, args=(self.jobs, self.results, self.headless), daemon=True)
+            self.process.start()
+            print(f"[BROWSER] Started browser worker (pid {self.process.pid})")
+            threading.Thread(target=self.read_results, args=(self.results,), daemon=True).start()
+            if self.monitor_thread is None:
+                self.monitor_thread = threading.Thread(target=self.monitor, daemon=True)
+                self.monitor_thread.start()
+            return self.process
+
+    def stop(self):
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                self.jobs.put(None)
+                self.process.join(timeout=10)
+            finally:
+                if self.process.is_alive():
+                    self.process.terminate()
+                self.process = None
+                self.fail_waiting("browser worker stopped")
+
+    def restart(self, reason):
+        print(f"[BROWSER] Restarting browser worker: {reason}")
+        with self.lock:
+            if self.process is not None and self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=5)
+            self.process = None
+            self.restarts += 1
+            self.fail_waiting(reason)
+            self.start()
+
+    def fail_waiting(self, reason):
+        with self.lock:
+            for job_id, slot in list(self.waiting.items()):
+                slot["response"] = {"ok": False, "error": reason}
+                slot["done"].set()
+            self.waiting.clear()
+
+    def read_results(self, results):
+        """Route results and heartbeats from one worker's result queue."""
+        while True:
+            try:
+                message = results.get()
+            except (EOFError, OSError):
+                return
+            if message["type"] == "heartbeat":
+                self.last_heartbeat = message["time"]
+                self.worker_state = {k: v for k, v in message.items() if k != "type"}
+            elif message["type"] == "result":
+                with self.lock:
+                    slot = self.waiting.pop(message["id"], None)
+                if slot is not None:
+                    slot["response"] = message
+                    slot["done"].set()
+            elif message["type"] == "crashed":
+                self.worker_state = {"state": "crashed", "error": message["error"]}
+
+    def restart_reason(self):
+        """Why the worker should be restarted now, or None."""
+        if self.process is None:
+            return None
+        if not self.process.is_alive():
+            return "worker exited"
+        if self.is_stale():
+            job = self.worker_state.get("job")
+            if job in WRITE_JOB_KINDS:
+                # Killing it could stop a payment between ÖDETTİR and its record; /stop restarts it
+                print(f"[BROWSER] No heartbeat for {STALE_AFTER_SECONDS}s during a {job} job, not restarting")
+                return None
+            return f"no heartbeat for {STALE_AFTER_SECONDS}s"
+        return None
+
+    def monitor(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            # Checked and restarted under the lock so stop() or start() cannot interleave
+            with self.lock:
+                reason = self.restart_reason()
+                if reason is not None:
+                    self.restart(reason)
+
+    def submit(self, kind, **args):
+        """Queue a job; returns (job_id, slot) where slot['done'] is set once it has finished."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind {kind}")
+        if not self.is_alive():
+            self.start()
+        slot = {"done": threading.Event(), "response": None}
+        with self.lock:
+            job_id = next(self.job_ids)
+            self.waiting[job_id] = slot
+            self.jobs.put({"id": job_id, "kind": kind, "args": args})
+        return job_id, slot
+
+    def run(self, kind, timeout=None, **args):
+        """Run a job on the worker and wait for it; raises RuntimeError if it failed."""
+        job_id, slot = self.submit(kind, **args)
+        if not slot["done"].wait(timeout):
+            with self.lock:
+                self.waiting.pop(job_id, None)
+            raise TimeoutError(f"browser job {kind} did not finish in {timeout}s")
+        response = slot["response"]
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response.get("result")
+
+    def health(self):
+        if self.process is None:
+            return {"state": "stopped", "restarts": self.restarts}
+        return {
+            **self.worker_state,
+            "alive": self.process.is_alive(),
+            "pid": self.process.pid,
+            "pending_jobs": len(self.waiting),
+            "seconds_since_heartbeat": round(time.time() - self.last_heartbeat, 1),
+            "restarts": self.restarts,
+            "headless": self.headless,
+        }
+
+
+browser_daemon = BrowserDaemon()
@@ -14,6 +14,10 @@ import pandas as pd
 import rpa_executioner as rpaexec
 from rpa_helper import infer_payment_type_from_amount, clear_processing_status, clear_all_rpa_data
 import app_paths
+import ocr_service
+from browser_daemon import browser_daemon, STATEMENT_TIMEOUT, CORRECTION_TIMEOUT
+from pacing import pacer, PROFILES
+from sender_aliases import get_alias_store
 import threading
 import multiprocessing
 import asyncio
@@ -91,7 +95,11 @@ def run_rpa_background(filename, user_phone):
     try:
         print(f"Starting background RPA for {filename}")
         # Run the async RPA process synchronously in this thread
-        result_table = asyncio.run(rpaexec.RPAexecutioner_GoldenProcessStart(filename, sheetname="hesaphareketleri"))
+        if browser_daemon.is_ready():
+            # Warm browser already logged in - skip launch + login
+            result_table = pd.DataFrame(browser_daemon.run("statement", timeout=STATEMENT_TIMEOUT, filename=filename, sheetname="hesaphareketleri"))
+        else:
+            result_table = asyncio.run(rpaexec.RPAexecutioner_GoldenProcessStart(filename, sheetname="hesaphareketleri"))
         
         # Save the result for later queries (converting the CSV from RPA to Excel for the text handler)
         try:
@@ -137,16 +145,23 @@ def run_rpa_background(filename, user_phone):
             pass
 
 
-def run_unique_process_background(name, payment_type, payment_amount, row_index, user_phone):
-    """Runs the unique RPA process in background and sends notification when done."""
+def run_unique_process_background(name, payment_type, payment_amount, row_index, user_phone, flagged_name=None):
+    """
+    Runs the unique RPA process in background and sends notification when done.
+    flagged_name: the name of a not-found row, whose bank sender is then aliased to name.
+    """
     try:
         print(f"Starting unique process for {name} - {payment_type}")
-        asyncio.run(rpaexec.RPAexecutioner_GoldenUniqueProcess(
-            name_surname=name,
-            payment_type=payment_type,
-            payment_amount=payment_amount,
-            is_owed=True
-        ))
+        if browser_daemon.is_ready():
+            # Warm browser already logged in - the correction only has to navigate
+            browser_daemon.run("correction", timeout=CORRECTION_TIMEOUT, name_surname=name, payment_type=payment_type, payment_amount=payment_amount, is_owed=True)
+        else:
+            asyncio.run(rpaexec.RPAexecutioner_GoldenUniqueProcess(
+                name_surname=name,
+                payment_type=payment_type,
+                payment_amount=payment_amount,
+                is_owed=True
+            ))
         
         # Update the Excel file
         df = pd.read_excel(app_paths.result_table_path())
@@ -154,6 +169,11 @@ def run_unique_process_background(name, payment_type, payment_amount, row_index,
         df.at[row_index, "name"] = name
         df.at[row_index, "payment_type"] = payment_type
         df.to_excel(app_paths.result_table_path(), index=False)
+
+        if flagged_name is not None:
+            sender = get_alias_store().resolve_flag(flagged_name, payment_amount, name)
+            if sender:
+                print(f"Remembered {sender} as paying for {name}")
         
         # Send success notification
         account_sid = os.getenv('TWILIO_ACCOUNT_SID')
@@ -288,7 +308,9 @@ def reply_whatsapp():
                 payment_amount = df["payment_amount"][i]
                 
                 # If name is missing (FLAG: 404 means name search failed)
+                flagged_name = None
                 if "BULUNAMADI" in name or "404" in status:
+                    flagged_name = name
                     name = llm_data.get("name") or name
                 
                 # If payment type is ambiguous (DORTBIN or FLAG: 4000)
@@ -301,7 +323,7 @@ def reply_whatsapp():
                 print(name, payment_type, payment_amount, i, sender)
                 thread = threading.Thread(
                     target=run_unique_process_background,
-                    args=(name, payment_type, payment_amount, i, sender)
+                    args=(name, payment_type, payment_amount, i, sender, flagged_name)
                 )
                 thread.start()
                 
@@ -319,6 +341,35 @@ def reply_whatsapp():
 def health():
     return "200 OK"
 
+@app.route("/ocr-status", methods=["GET"])
+def ocr_status():
+    """Report whether the resident OCR service is running and warm"""
+    status = ocr_service.ocr_service_status()
+    if status is None:
+        return jsonify({"state": "stopped"})
+    return jsonify(status)
+
+@app.route("/browser-daemon/health", methods=["GET"])
+def browser_daemon_health():
+    """Report the state of the long-lived browser worker"""
+    return jsonify(browser_daemon.health())
+
+@app.route("/lookup", methods=["GET"])
+def lookup_student():
+    """Dry run: read a student's ledger on the warm browser without entering anything"""
+    name = request.args.get("name")
+    if not name:
+        return jsonify({"error": "name is required"}), 400
+    if not browser_daemon.is_ready():
+        return jsonify({"error": "Browser worker is not running"}), 503
+    try:
+        ledger = browser_daemon.run("lookup", timeout=180, name_surname=name)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if ledger is None:
+        return jsonify({"error": f"{name} bulunamadi"}), 404
+    return jsonify({"name": name, "ledger": ledger})
+
 @app.route("/debug-paths", methods=["GET"])
 def debug_paths():
     """Debug endpoint to check file paths on different platforms"""
@@ -464,6 +515,8 @@ def load_secrets():
 current_uploaded_file = None
 # Track running RPA process for /stop endpoint
 current_rpa_process = None
+# Thread waiting for a /start run on the browser worker
+current_daemon_run = None
 
 @app.route("/upload", methods=["POST"])
 def upload_excel():
@@ -494,26 +547,69 @@ def upload_excel():
     return jsonify({"success": True, "filename": filename})
 
 
-def run_rpa_ui_process(filename, son_kasa_miktari=None):
+def run_rpa_ui_process(filename, son_kasa_miktari=None, pacing_profile=None, headless=None):
     """Runs the RPA process (UI mode - no WhatsApp). Used by multiprocessing."""
     try:
+        if pacing_profile:
+            pacer.set_profile(pacing_profile)
         print(f"[UI] Starting RPA for {filename}, son_kasa_miktari={son_kasa_miktari}")
-        asyncio.run(rpaexec.RPAexecutioner_GoldenProcessStart(filename, sheetname="hesaphareketleri", son_kasa_miktari=son_kasa_miktari))
+        asyncio.run(rpaexec.RPAexecutioner_GoldenProcessStart(filename, sheetname="hesaphareketleri", son_kasa_miktari=son_kasa_miktari, headless=headless))
         print("[UI] RPA process completed")
     except Exception as e:
         print(f"[UI] RPA failed: {e}")
 
 
+def run_rpa_ui_daemon_job(filename, son_kasa_miktari=None, pacing_profile=None):
+    """Runs the RPA process (UI mode) on the warm browser worker. Used by a thread."""
+    try:
+        print(f"[UI] Starting RPA on the browser worker for {filename}, son_kasa_miktari={son_kasa_miktari}")
+        browser_daemon.run("statement", timeout=STATEMENT_TIMEOUT, filename=filename, sheetname="hesaphareketleri",
+                           son_kasa_miktari=son_kasa_miktari, pacing_profile=pacing_profile)
+        print("[UI] RPA process completed")
+    except Exception as e:
+        print(f"[UI] RPA failed: {e}")
+
+
+def daemon_can_run(headless):
+    """The warm browser can take a /start run unless the run asks for the other headless mode."""
+    if not browser_daemon.is_ready():
+        return False
+    return headless is None or rpaexec.use_headless(headless) == rpaexec.use_headless(browser_daemon.headless)
+
+
+HEADLESS_VALUES = {True: True, False: False, 1: True, 0: False, "true": True, "false": False, "1": True, "0": False}
+
+
+def parse_headless(value):
+    """The JSON headless flag as a bool (None if not given); raises ValueError for anything but true/false/1/0."""
+    if value is None:
+        return None
+    key = value.strip().lower() if isinstance(value, str) else value
+    if isinstance(key, float) or key not in HEADLESS_VALUES:
+        raise ValueError(value)
+    return HEADLESS_VALUES[key]
+
+
 @app.route("/start", methods=["POST"])
 def start_rpa():
     """Start RPA processing for the uploaded Excel file"""
-    global current_uploaded_file, current_rpa_process
+    global current_uploaded_file, current_rpa_process, current_daemon_run
 
     # Get son_kasa_miktari from request body
     son_kasa_miktari = None
+    pacing_profile = None
+    headless = None
     if request.is_json:
         data = request.get_json()
         son_kasa_miktari = data.get('son_kasa_miktari') if data else None
+        pacing_profile = data.get('pacing') if data else None
+        headless = data.get('headless') if data else None
+    if pacing_profile and pacing_profile not in PROFILES:
+        return jsonify({"error": f"Unknown pacing profile. Use one of: {', '.join(PROFILES)}"}), 400
+    try:
+        headless = parse_headless(headless)
+    except (ValueError, TypeError):
+        return jsonify({"error": "headless must be true or false"}), 400
 
     # Check if file was uploaded
     if not current_uploaded_file or not os.path.isfile(current_uploaded_file):
@@ -530,15 +626,23 @@ def start_rpa():
         current_rpa_process = None
 
     # Check if RPA is already running
-    if current_rpa_process and current_rpa_process.is_alive():
+    if (current_rpa_process and current_rpa_process.is_alive()) or (current_daemon_run and current_daemon_run.is_alive()):
         return jsonify({"error": "RPA is already running. Stop it first."}), 400
 
     # Clear old status AND payments CSV before starting a new run
     clear_all_rpa_data()
 
-    # Start background RPA using multiprocessing (so it can be terminated)
-    current_rpa_process = multiprocessing.Process(target=run_rpa_ui_process, args=(current_uploaded_file, son_kasa_miktari))
-    current_rpa_process.start()
+    # Make sure the shared OCR service is up (no-op if it already is)
+    ocr_service.start_ocr_service()
+
+    if daemon_can_run(headless):
+        # Warm browser already logged in - skip launch + login; /stop restarts the worker
+        current_daemon_run = threading.Thread(target=run_rpa_ui_daemon_job, args=(current_uploaded_file, son_kasa_miktari, pacing_profile), daemon=True)
+        current_daemon_run.start()
+    else:
+        # Start background RPA using multiprocessing (so it can be terminated)
+        current_rpa_process = multiprocessing.Process(target=run_rpa_ui_process, args=(current_uploaded_file, son_kasa_miktari, pacing_profile, headless))
+        current_rpa_process.start()
 
     return jsonify({"success": True, "message": f"RPA started for {current_uploaded_file}" + (f" (starting from Bakiye: {son_kasa_miktari})" if son_kasa_miktari else "")})
 
@@ -546,7 +650,15 @@ def start_rpa():
 @app.route("/stop", methods=["POST"])
 def stop_rpa():
     """Stop the running RPA process - kills browser children, process fails naturally"""
-    global current_rpa_process
+    global current_rpa_process, current_daemon_run
+
+    # A statement or correction on the browser worker is only stopped by restarting the worker
+    if browser_daemon.running_job() is not None or (current_daemon_run and current_daemon_run.is_alive()):
+        browser_daemon.restart("stopped from /stop")
+        current_daemon_run = None
+        if not current_rpa_process:
+            clear_processing_status()
+            return jsonify({"success": True, "message": "RPA stopped."})
 
     if not current_rpa_process:
         current_rpa_process = None
@@ -582,10 +694,21 @@ def shutdown():
         except:
             pass
 
+    # Close the warm browser as well (daemon processes are not reaped by os._exit)
+    try:
+        browser_daemon.stop()
+    except:
+        pass
+
     # Shutdown the Flask server
     os._exit(0)
 
 if __name__ == "__main__":
     import webbrowser
+    # Start the shared OCR service for every run of this session; it loads the model on the first OCR fallback
+    ocr_service.start_ocr_service()
+    # Keep a logged-in browser warm for WhatsApp corrections and lookups
+    if os.getenv("BROWSER_DAEMON", "1") != "0":
+        browser_daemon.start()
     webbrowser.open("http://localhost:3987/whiteboard")
     app.run(port=3987)
\ No newline at end of file
@@ -0,0 +1,448 @@
+"""
+Direct HTTP reads of Golden's student search and ÖDEME ledger.
+The browser stays logged in (and does the writes); this client borrows its cookies and
+fetches the same HTML the UI loads, then parses it with the DOM ledger parser.
+Endpoints are not hard-coded: the request behind a UI search is recorded once and
+replayed with other names, and the student and ÖDEME pages are reached through the
+links in the returned HTML. Anything unexpected returns None so the caller can fall
+back to the browser.
+"""
+import os
+import json
+import asyncio
+from html.parser import HTMLParser
+from datetime import datetime
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl, quote, quote_plus
+import requests
+from requests.adapters import HTTPAdapter
+import app_paths
+from rpa_helper import parse_table_rows, ledger_from_table_rows, turkish_pattern_check
+from ledger_store import row_parts
+import student_directory
+
+HTTP_READS = os.getenv("GOLDEN_HTTP_READS", "1") != "0"
+# Payments are money: posting the form directly is opt-in
+HTTP_WRITES = os.getenv("GOLDEN_HTTP_WRITES", "0") == "1"
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+REQUEST_TIMEOUT_SECONDS = 15
+QUERY_PLACEHOLDER = "{query}"
+# How the search text appears in the recorded request, tried in this order
+QUERY_ENCODINGS = {
+    "plus": quote_plus,
+    "percent": quote,
+    "raw": lambda text: text,
+}
+
+
+class GoldenPageParser(HTMLParser):
+    """Collects links, bordered tables (cell texts per row) and whether the page is the login form."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.tables = []
+        self.is_login_page = False
+        self.link = None
+        self.table_depth = 0
+        self.row = None
+        self.cell = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if attrs.get("id") == "kurumkodu":
+            self.is_login_page = True
+        if tag == "a":
+            self.link = [attrs.get("href") or "", []]
+        elif tag == "table":
+            self.table_depth += 1
+            if self.table_depth == 1 and "table-bordered" in (attrs.get("class") or ""):
+                self.tables.append([])
+        elif tag == "tr" and self.table_depth == 1 and self.tables:
+            self.row = []
+        elif tag == "td" and self.row is not None:
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.link is not None:
+            self.links.append((self.link[0], " ".join("".join(self.link[1]).split())))
+            self.link = None
+        elif tag == "td" and self.cell is not None:
+            self.row.append(" ".join("".join(self.cell).split()))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            if self.row:
+                self.tables[-1].append(self.row)
+            self.row = None
+        elif tag == "table" and self.table_depth:
+            self.table_depth -= 1
+
+    def handle_data(self, data):
+        if self.link is not None:
+            self.link[1].append(data)
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def parse_page(html):
+    parser = GoldenPageParser()
+    parser.feed(html)
+    return parser
+
+
+def ledger_from_html(html):
+    """The (owed, paid, taksit_paid, taksit_owed) ledger from an ÖDEME page, or None if it does not look like one."""
+    page = parse_page(html)
+    if page.is_login_page or len(page.tables) < 2:
+        return None
+    taksit_table, payment_table = page.tables[0], page.tables[1]
+    # Tables filled later by DataTables' own XHR arrive empty - not a ledger we can trust
+    if not taksit_table and not payment_table:
+        return None
+    return ledger_from_table_rows(parse_table_rows(taksit_table), parse_table_rows(payment_table))
+
+
+def template_from_request(method, url, post_data, query):
+    """Turn a recorded search request into a template, or None if the query is not in it."""
+    for encoding, encode in QUERY_ENCODINGS.items():
+        needle = encode(query)
+        if needle in url or (post_data and needle in post_data):
+            return {
+                "method": method,
+                "url": url.replace(needle, QUERY_PLACEHOLDER),
+                "post_data": post_data.replace(needle, QUERY_PLACEHOLDER) if post_data else None,
+                "encoding": encoding,
+            }
+    return None
+
+
+def fill_template(template, query):
+    encoded = QUERY_ENCODINGS[template["encoding"]](query)
+    url = template["url"].replace(QUERY_PLACEHOLDER, encoded)
+    post_data = template["post_data"].replace(QUERY_PLACEHOLDER, encoded) if template["post_data"] else None
+    return template["method"], url, post_data
+
+
+def payment_template_from_request(method, url, post_data, content_type, page_url, type_value, amount, today):
+    """
+    Turn the form post behind a UI ÖDETTİR into a template, or None if it cannot be replayed safely.
+    Fields are matched by exact value: the typed amount, the selected borç tipi, today's date and
+    the query parameters of the ÖDEME page (the student's id). At least one student parameter has
+    to be found, otherwise replaying the post could pay into the recorded student's account.
+    """
+    if not post_data or FORM_CONTENT_TYPE not in (content_type or ""):
+        return None
+    page_params = dict(parse_qsl(urlparse(page_url).query))
+    placeholders = {str(amount): "{amount}", type_value: "{type}", today: "{today}"}
+    for key, value in page_params.items():
+        placeholders.setdefault(value, "{param:%s}" % key)
+
+    def templated(fields):
+        return [[key, placeholders.get(value, value)] for key, value in fields]
+
+    parsed_url = urlparse(url)
+    query = templated(parse_qsl(parsed_url.query, keep_blank_values=True))
+    form = templated(parse_qsl(post_data, keep_blank_values=True))
+    values = [value for _, value in query + form]
+    if values.count("{amount}") != 1 or values.count("{type}") != 1:
+        return None
+    if not any(value.startswith("{param:") for value in values):
+        return None
+    return {
+        "method": method,
+        "url": parsed_url._replace(query="").geturl(),
+        "query": query,
+        "form": form,
+        "content_type": content_type,
+    }
+
+
+def fill_payment_template(template, odeme_url, type_value, amount, today):
+    """(method, url, form fields) for one payment, or None if the ÖDEME url lacks a student parameter."""
+    page_params = dict(parse_qsl(urlparse(odeme_url).query))
+    values = {"{amount}": str(amount), "{type}": type_value, "{today}": today}
+
+    def filled(fields):
+        result = []
+        for key, value in fields:
+            if value.startswith("{param:"):
+                value = page_params.get(value[len("{param:"):-1])
+                if value is None:
+                    return None
+            result.append((key, values.get(value, value)))
+        return result
+
+    query, form = filled(template["query"]), filled(template["form"])
+    if query is None or form is None:
+        return None
+    url = template["url"] + ("?" + urlencode(query) if query else "")
+    return template["method"], url, form
+
+
+def paid_total(ledger, payment_type):
+    owed, paid, taksit_paid, taksit_owed = ledger
+    return sum(amount for row in paid + taksit_paid for kind, _, amount in [row_parts(row)] if kind == payment_type)
+
+
+def verify_payment(before, after, payment_type, amount):
+    """
+    Compare the ledger around an HTTP payment.
+    "ok": the paid total of that type grew by the amount; "not_written": nothing changed, so the
+    UI may enter it; "unknown": something else changed - never retry, the row has to be checked.
+    """
+    if after is None:
+        return "unknown"
+    if tuple(map(list, after)) == tuple(map(list, before)):
+        return "not_written"
+    if abs(paid_total(after, payment_type) - paid_total(before, payment_type) - float(amount)) < 0.01:
+        return "ok"
+    return "unknown"
+
+
+def load_endpoints():
+    try:
+        with open(app_paths.golden_endpoints_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_endpoints(endpoints):
+    try:
+        with open(app_paths.golden_endpoints_path(), "w") as f:
+            json.dump(endpoints, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Could not save Golden endpoints: {e}")
+
+
+class RequestRecorder:
+    """Listens on a page while the UI does one search and remembers the request that carried the query."""
+
+    def __init__(self, page, query, endpoints, key="search"):
+        self.page = page
+        self.query = query
+        self.endpoints = endpoints
+        self.key = key
+        page.on("request", self.on_request)
+
+    def on_request(self, request):
+        if self.key in self.endpoints or request.resource_type not in ("xhr", "fetch", "document"):
+            return
+        template = template_from_request(request.method, request.url, request.post_data, self.query)
+        if template is not None:
+            template["content_type"] = request.headers.get("content-type")
+            self.endpoints[self.key] = template
+            save_endpoints(self.endpoints)
+            print(f"Recorded Golden {self.key} request: {template['method']} {template['url']}")
+
+    def stop(self):
+        self.page.remove_listener("request", self.on_request)
+
+
+class PaymentRecorder:
+    """Listens on the ÖDEME page while the UI enters one payment and remembers the form post."""
+
+    def __init__(self, page, type_values, collection_type, amount, endpoints):
+        self.page = page
+        self.page_url = page.url
+        self.type_values = type_values
+        self.type_value = type_values.get(collection_type, collection_type)
+        self.amount = amount
+        self.endpoints = endpoints
+        page.on("request", self.on_request)
+
+    def on_request(self, request):
+        if "payment" in self.endpoints or request.method != "POST":
+            return
+        today = datetime.now().strftime("%d.%m.%Y")
+        template = payment_template_from_request(
+            request.method, request.url, request.post_data, request.headers.get("content-type"),
+            self.page_url, self.type_value, self.amount, today,
+        )
+        if template is not None:
+            template["type_values"] = self.type_values
+            self.endpoints["payment"] = template
+            save_endpoints(self.endpoints)
+            print(f"Recorded Golden payment request: {template['method']} {template['url']}")
+
+    def stop(self):
+        self.page.remove_listener("request", self.on_request)
+
+
+class GoldenHttpClient:
+    """Pooled requests.Session carrying the browser's cookies."""
+
+    def __init__(self, cookies, user_agent, endpoints):
+        self.endpoints = endpoints
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+    def fetch(self, method, url, data=None, content_type=None):
+        headers = {"Content-Type": content_type} if content_type else {}
+        response = self.session.request(method, url, data=data, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        if "giris.php" in response.url:
+            raise PermissionError("Golden session expired")
+        return response
+
+    def search(self, query):
+        """Search results as [(absolute url, link text)], or None if no search request has been recorded."""
+        template = self.endpoints.get("search")
+        if template is None:
+            return None
+        method, url, post_data = fill_template(template, query)
+        response = self.fetch(method, url, post_data.encode("utf-8") if post_data else None, template.get("content_type"))
+        return [(urljoin(response.url, href), text) for href, text in parse_page(response.text).links if href]
+
+    def follow_link(self, url, link_text):
+        """Open url and return the absolute URL of its first real link whose text matches link_text."""
+        response = self.fetch("GET", url)
+        pattern = turkish_pattern_check(link_text)
+        for href, text in parse_page(response.text).links:
+            if pattern.search(text) and href and not href.startswith(("#", "javascript:")):
+                return urljoin(response.url, href)
+        return None
+
+    def find_odeme_url(self, name_surname):
+        """URL of the student's ÖDEME page, or None if the search did not lead to exactly one student."""
+        student_page = student_directory.student_url(name_surname)
+        if student_page is not None:
+            return self.follow_link(student_page, "ÖDEME")
+        results = self.search(name_surname)
+        if not results:
+            return None
+        pattern = turkish_pattern_check(name_surname)
+        student_urls = [url for url, text in results if pattern.search(text) and not url.endswith("#")]
+        if len(student_urls) != 1:
+            # Not found or ambiguous - the browser path has the surname retry and the click logic
+            return None
+        return self.follow_link(student_urls[0], "ÖDEME")
+
+    def read_ledger_at(self, odeme_url):
+        return ledger_from_html(self.fetch("GET", odeme_url).text)
+
+    def read_ledger(self, name_surname):
+        """(ledger, ÖDEME url) via plain HTTP; the ledger is None if any step did not look as expected."""
+        odeme_url = self.find_odeme_url(name_surname)
+        if odeme_url is None:
+            return None, None
+        return self.read_ledger_at(odeme_url), odeme_url
+
+    def submit(self, method, url, form, content_type):
+        return self.fetch(method, url, urlencode(form).encode("utf-8") if form else None, content_type)
+
+
+class HttpLedgerReader:
+    """
+    Reads ledgers over HTTP for one run, learning the search request from the browser
+    the first time the UI searches. Falls back (returns None) on anything unexpected.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.endpoints = load_endpoints()
+        self.client = None
+        self.enabled = HTTP_READS
+        self.stats = {"http": 0, "fallback": 0, "http_writes": 0, "ui_writes": 0}
+        self.odeme_urls = {}
+
+    def record(self, page, query):
+        """RequestRecorder for the next UI search on page, or None if the search request is already known."""
+        if not self.enabled or "search" in self.endpoints:
+            return None
+        return RequestRecorder(page, query, self.endpoints)
+
+    async def refresh_client(self):
+        cookies = await self.page.context.cookies()
+        user_agent = await self.page.evaluate("navigator.userAgent")
+        self.client = GoldenHttpClient(cookies, user_agent, self.endpoints)
+
+    async def search_links(self, query):
+        """All result links of a search over HTTP, or None if that is not possible."""
+        if not self.enabled or "search" not in self.endpoints:
+            return None
+        try:
+            if self.client is None:
+                await self.refresh_client()
+            return await asyncio.to_thread(self.client.search, query)
+        except Exception as e:
+            print(f"HTTP search failed: {e}")
+            return None
+
+    async def read_ledger(self, name_surname):
+        if not self.enabled or "search" not in self.endpoints:
+            return None
+        try:
+            if self.client is None:
+                await self.refresh_client()
+            ledger, odeme_url = await asyncio.to_thread(self.client.read_ledger, name_surname)
+            if ledger is not None:
+                self.odeme_urls[name_surname] = odeme_url
+        except PermissionError:
+            # Cookies rotated in the browser; pick them up on the next read
+            self.client = None
+            ledger = None
+        except Exception as e:
+            print(f"HTTP ledger read failed for {name_surname}: {e}")
+            ledger = None
+        self.stats["http" if ledger is not None else "fallback"] += 1
+        return ledger
+
+    async def record_payment(self, page, collection_type, amount):
+        """PaymentRecorder for the next UI payment on page, or None if the form post is already known."""
+        if not HTTP_WRITES or "payment" in self.endpoints:
+            return None
+        try:
+            options = await page.locator("#yenitahsilat_borctipi option").evaluate_all(
+                "os => os.map(o => [o.textContent.trim(), o.value])"
+            )
+        except Exception as e:
+            print(f"Could not read borç tipi options: {e}")
+            return None
+        return PaymentRecorder(page, dict(options), collection_type, amount, self.endpoints)
+
+    def can_pay(self, name_surname):
+        return HTTP_WRITES and self.client is not None and "payment" in self.endpoints and name_surname in self.odeme_urls
+
+    async def pay(self, name_surname, collection_type, amount):
+        """
+        Enter one payment by posting the recorded form. Returns None if that is not possible for
+        this student, otherwise the verify_payment outcome ("ok", "not_written" or "unknown").
+        """
+        if not self.can_pay(name_surname):
+            return None
+        template = self.endpoints["payment"]
+        type_value = template["type_values"].get(collection_type)
+        if type_value is None:
+            return None
+        odeme_url = self.odeme_urls[name_surname]
+        request = fill_payment_template(template, odeme_url, type_value, amount, datetime.now().strftime("%d.%m.%Y"))
+        if request is None:
+            return None
+        try:
+            before = await asyncio.to_thread(self.client.read_ledger_at, odeme_url)
+        except Exception as e:
+            print(f"HTTP ledger read before payment failed for {name_surname}: {e}")
+            return None
+        if before is None:
+            return None
+
+        try:
+            await asyncio.to_thread(self.client.submit, *request, template["content_type"])
+        except Exception as e:
+            # The post may still have gone through; the ledger decides
+            print(f"HTTP payment post for {name_surname} failed: {e}")
+        try:
+            after = await asyncio.to_thread(self.client.read_ledger_at, odeme_url)
+        except Exception as e:
+            print(f"HTTP ledger read after payment failed for {name_surname}: {e}")
+            after = None
+        outcome = verify_payment(before, after, collection_type, amount)
+        if outcome == "ok":
+            self.stats["http_writes"] += 1
+        print(f"HTTP payment {collection_type} {amount} for {name_surname}: {outcome}")
+        return outcome
@@ -0,0 +1,177 @@
+"""
+Compact parsed form of a student's ledger.
+The ledger lists hold "[Type, Date, Amount, Status]" strings; the payment decision asks
+dozens of questions about them per statement row. Each row is parsed once into a
+LedgerEntry (enum type, amount in kuruş, date, paid flag) and the answers the decision
+needs (types per list, amounts per type, taksit sums) are indexed up front.
+"""
+import enum
+from datetime import datetime, time
+
+from ledger_parser import AMOUNT_PATTERN
+
+
+class PaymentType(enum.Enum):
+    YAZILI = "YAZILI SINAV HARCI"
+    UYGULAMA = "UYGULAMA SINAV HARCI"
+    BASARISIZ = "BAŞARISIZ ADAY EĞİTİMİ"
+    OZEL_DERS = "ÖZEL DERS"
+    BELGE = "BELGE ÜCRETİ"
+    TAKSIT = "TAKSİT"
+    OTHER = "BILINMIYOR"
+
+    @classmethod
+    def from_text(cls, text):
+        """Type of a ledger row's type cell; Golden abbreviates exam fees (YZL. SNV. HARCI)."""
+        for keywords, payment_type in TYPE_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                return payment_type
+        return cls.OTHER
+
+
+TYPE_KEYWORDS = (
+    (("YZL", "YAZILI"), PaymentType.YAZILI),
+    (("UYG", "UYGULAMA"), PaymentType.UYGULAMA),
+    (("BAŞARISIZ ADAY EĞİTİMİ",), PaymentType.BASARISIZ),
+    (("ÖZEL DERS",), PaymentType.OZEL_DERS),
+    (("BELGE ÜCRETİ",), PaymentType.BELGE),
+    (("TAKSİT",), PaymentType.TAKSIT),
+)
+
+
+def parse_kurus(amount_str):
+    """Turkish amount string ("9.500,00") to kuruş (950000)."""
+    lira, _, kurus = amount_str.replace(".", "").partition(",")
+    return int(lira) * 100 + int(kurus or 0)
+
+
+def parse_statement_date(value):
+    """Date of a bank statement row (DD.MM.YYYY or a pandas timestamp), or None."""
+    text = str(value)
+    for fmt, part in (("%d.%m.%Y", text), ("%Y-%m-%d %H:%M:%S", text), ("%Y-%m-%d", text.split(" ")[0])):
+        try:
+            return datetime.strptime(part, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class LedgerEntry:
+    __slots__ = ("type", "day", "kurus", "paid")
+
+    def __init__(self, payment_type, day, kurus, paid):
+        self.type = payment_type
+        self.day = day
+        self.kurus = kurus
+        self.paid = paid
+
+    @classmethod
+    def from_row(cls, row):
+        parts = [p.strip() for p in row.strip("[]").split(",")]
+        try:
+            day = datetime.strptime(parts[1], "%d.%m.%Y").date() if len(parts) > 1 else None
+        except ValueError:
+            day = None
+        amounts = AMOUNT_PATTERN.findall(row)
+        kurus = parse_kurus(amounts[-1]) if amounts else None
+        return cls(PaymentType.from_text(parts[0]), day, kurus, "ÖDEDİ" in row)
+
+    @property
+    def lira(self):
+        """Whole lira, the way the statement amounts are compared."""
+        return self.kurus // 100
+
+    def __repr__(self):
+        return f"LedgerEntry({self.type.name}, {self.day}, {self.kurus}, {self.paid})"
+
+
+class Ledger:
+    """The four ledger lists, parsed, with the indexes decide_payment_types queries."""
+    __slots__ = ("owed", "paid", "taksit_paid", "taksit_owed",
+                 "owed_amounts", "paid_types", "taksit_paid_types", "taksit_owed_types", "taksit_owed_amounts",
+                 "total_owed_taksit_kurus", "first_owed_taksit_kurus", "last_taksit_paid_day")
+
+    def __init__(self, owed, paid, taksit_paid, taksit_owed):
+        self.owed = owed
+        self.paid = paid
+        self.taksit_paid = taksit_paid
+        self.taksit_owed = taksit_owed
+
+        # type -> whole-lira amounts owed; None -> every owed amount
+        self.owed_amounts = {None: set()}
+        for entry in owed:
+            amounts = self.owed_amounts.setdefault(entry.type, set())
+            if entry.kurus is not None:
+                amounts.add(entry.lira)
+                self.owed_amounts[None].add(entry.lira)
+        self.paid_types = {entry.type for entry in paid}
+        self.taksit_paid_types = {entry.type for entry in taksit_paid}
+        self.taksit_owed_types = {entry.type for entry in taksit_owed}
+        self.taksit_owed_amounts = {entry.lira for entry in taksit_owed if entry.kurus is not None}
+
+        open_taksit = [entry.kurus for entry in taksit_owed
+                       if entry.type is PaymentType.TAKSIT and not entry.paid and entry.kurus is not None]
+        self.total_owed_taksit_kurus = sum(open_taksit)
+        self.first_owed_taksit_kurus = open_taksit[0] if open_taksit else None
+        paid_days = [entry.day for entry in taksit_paid if entry.day is not None]
+        self.last_taksit_paid_day = max(paid_days) if paid_days else None
+
+    @classmethod
+    def from_rows(cls, ledger):
+        """Parse a (payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed) tuple."""
+        return cls(*([LedgerEntry.from_row(row) for row in rows] for rows in ledger))
+
+    def owes(self, payment_type, amount=None):
+        """An owed row of that type (with that whole-lira amount, if given)."""
+        amounts = self.owed_amounts.get(payment_type)
+        if amounts is None:
+            return False
+        return amount is None or amount in amounts
+
+    def owes_amount(self, amount):
+        """Any owed (non-taksit) row with that whole-lira amount."""
+        return amount in self.owed_amounts[None]
+
+    def has_paid(self, payment_type):
+        return payment_type in self.paid_types
+
+    def owes_taksit(self, amount=None):
+        """An open installment (with that whole-lira amount, if given)."""
+        if amount is None:
+            return PaymentType.TAKSIT in self.taksit_owed_types
+        return amount in self.taksit_owed_amounts
+
+    def has_paid_taksit(self):
+        return PaymentType.TAKSIT in self.taksit_paid_types
+
+    @property
+    def total_owed_taksit(self):
+        """Sum of the open installments in whole lira."""
+        return self.total_owed_taksit_kurus // 100
+
+    @property
+    def first_owed_taksit(self):
+        """Amount of the first open installment in lira, or None."""
+        if self.first_owed_taksit_kurus is None:
+            return None
+        return self.first_owed_taksit_kurus / 100
+
+    def taksit_paid_since(self, date_of_payment):
+        """True if an installment was paid on or after the statement date."""
+        if self.last_taksit_paid_day is None:
+            return False
+        statement_date = parse_statement_date(date_of_payment)
+        if statement_date is None:
+            print(f"Error parsing excel date {date_of_payment}")
+            return False
+        # Statement dates may carry a time of day; a ledger date counts from midnight
+        return datetime.combine(self.last_taksit_paid_day, time.min) >= statement_date
+
+    def paid_since(self, amount, date_of_payment):
+        """True if a paid row (fee or installment) of that whole-lira amount is dated on or after the statement date."""
+        statement_date = parse_statement_date(date_of_payment)
+        if statement_date is None:
+            return False
+        return any(entry.day is not None and entry.kurus is not None and entry.lira == amount
+                   and datetime.combine(entry.day, time.min) >= statement_date
+                   for entry in self.paid + self.taksit_paid)
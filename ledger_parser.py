@@ -0,0 +1,150 @@
+"""
+Deterministic parser for OCR'd Golden ledger rows.
+Applies the same rules the clean_payment_row prompt gives the LLM
+(YZL+SNV, ignore YAZDIR, second date when ÖDEDİ, comma amounts, receipt IDs)
+with a fuzzy token matcher, and reports how confident it is.
+"""
+import re
+import contextvars
+from difflib import SequenceMatcher
+
+from icu import Locale, UnicodeString
+
+tr = Locale("tr")
+
+# Rows parsed below this confidence are sent to the LLM
+CONFIDENCE_THRESHOLD = 0.8
+# Minimum similarity for an OCR token to count as a keyword
+TOKEN_MATCH_RATIO = 0.75
+
+DATE_PATTERN = re.compile(r'\d{2}\.\d{2}\.\d{4}')
+AMOUNT_PATTERN = re.compile(r'\b\d{1,3}(?:\.\d{3})*,\d{2}\b')
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+FOLD_TABLE = str.maketrans("ÇĞİÖŞÜ", "CGIOSU")
+
+# Each type lists keyword groups; every group needs one matching token (like "YZL" AND "SNV")
+PAYMENT_TYPE_KEYWORDS = [
+    ("YAZILI SINAV HARCI", [("YZL", "YAZILI"), ("SNV", "SINAV")]),
+    ("UYGULAMA SINAV HARCI", [("UYG", "UYGULAMA"), ("SNV", "SINAV")]),
+    ("BAŞARISIZ ADAY EĞİTİMİ", [("BASARISIZ", "ADAY", "EGITIMI")]),
+    ("ÖZEL DERS", [("OZEL", "DERS")]),
+    ("BELGE ÜCRETİ", [("BELGE", "UCRETI")]),
+    ("TAKSİT", [("TAKSIT", "TKST")]),
+]
+
+# Counters of the current run: rows parsed locally vs rows that needed the LLM.
+# A context variable, so runs sharing a process (tab pool, browser daemon jobs) never mix counts;
+# the run's tabs are tasks of the run and see the same counters.
+_parse_stats = contextvars.ContextVar("parse_stats", default=None)
+
+
+def start_parse_stats():
+    """Start counting for the current run and return its counters."""
+    stats = {"local": 0, "llm": 0}
+    _parse_stats.set(stats)
+    return stats
+
+
+def count_parsed(kind, rows=1):
+    """Add rows to the current run's "local" or "llm" counter (rows outside a run are not counted)."""
+    stats = _parse_stats.get()
+    if stats is not None:
+        stats[kind] += rows
+
+
+def fold(text):
+    """Turkish-aware uppercase with diacritics stripped, so OCR variants compare equal."""
+    return str(UnicodeString(text).toUpper(tr)).translate(FOLD_TABLE)
+
+
+def token_similarity(token, keyword):
+    # Short abbreviations (SNV, UYG) must match exactly, OCR noise is too likely to collide
+    if len(keyword) <= 4:
+        return 1.0 if token == keyword else 0.0
+    return SequenceMatcher(None, token, keyword).ratio()
+
+
+def regex_date_and_amount(row_text):
+    """Regex date and amount for an OCR row - more reliable than the LLM for numbers."""
+    # Amounts always have a comma (e.g. 1.000,00 or 500,00), bare integers are receipt IDs
+    amounts = AMOUNT_PATTERN.findall(row_text)
+    regex_amount = amounts[-1] if amounts else None
+
+    dates = DATE_PATTERN.findall(row_text)
+    regex_date = None
+    if dates:
+        # Logic: If Paid (ÖDEDİ) and 2 dates, use 2nd. Else 1st.
+        if "ÖDEDİ" in row_text and len(dates) >= 2:
+            regex_date = dates[1]
+        else:
+            regex_date = dates[0]
+    return regex_date, regex_amount
+
+
+def match_payment_type(tokens):
+    """Best matching canonical payment type for the folded tokens, with its score."""
+    best_type, best_score, runner_up = None, 0.0, 0.0
+    for payment_type, groups in PAYMENT_TYPE_KEYWORDS:
+        group_scores = []
+        for keywords in groups:
+            group_scores.append(max((token_similarity(t, k) for t in tokens for k in keywords), default=0.0))
+        score = min(group_scores)
+        if score < TOKEN_MATCH_RATIO:
+            continue
+        if score > best_score:
+            best_type, best_score, runner_up = payment_type, score, best_score
+        elif score > runner_up:
+            runner_up = score
+    # Two types matching equally well is ambiguous (e.g. "BELGE TAKSİT")
+    if best_type and runner_up >= best_score:
+        return best_type, best_score * 0.5
+    return best_type, best_score
+
+
+def is_paid_row(cleaned_row, row_text=""):
+    """
+    True if a cleaned "[Type, Date, Amount, Status]" row is paid. Its status field decides;
+    only a row without one falls back to the status tokens of the OCR text.
+    """
+    status = fold(str(cleaned_row).strip().strip("[]").rsplit(",", 1)[-1].strip()) if cleaned_row else ""
+    if status in ("ODEDI", "ODEMEDI"):
+        return status == "ODEDI"
+    tokens = [fold(t) for t in TOKEN_PATTERN.findall(row_text)]
+    if any(token_similarity(t, "ODEMEDI") >= 0.85 for t in tokens):
+        return False
+    return any(token_similarity(t, "ODEDI") >= 0.8 for t in tokens)
+
+
+def parse_ledger_row(row_text):
+    """
+    Parse one OCR row into "[Type, Date, Amount, Status]".
+    Returns (row_string or None, confidence).
+    """
+    tokens = [fold(t) for t in TOKEN_PATTERN.findall(row_text)]
+    # "YAZDIR" is the print button, never part of the type (and fuzzily close to YAZILI)
+    tokens = [t for t in tokens if token_similarity(t, "YAZDIR") < 0.85]
+
+    payment_type, confidence = match_payment_type(tokens)
+    if payment_type is None:
+        return None, 0.0
+
+    if any(token_similarity(t, "ODEMEDI") >= 0.85 for t in tokens):
+        status = "ÖDEMEDİ"
+    elif any(token_similarity(t, "ODEDI") >= 0.8 for t in tokens):
+        status = "ÖDEDİ"
+    else:
+        # The status cell is missing, keep the caller's ÖDEDİ check but trust it less
+        status = "ÖDEMEDİ"
+        confidence *= 0.8
+
+    # The date rule depends on the status, so normalize it before applying the regexes
+    normalized_text = row_text if status != "ÖDEDİ" or "ÖDEDİ" in row_text else row_text + " ÖDEDİ"
+    date, amount = regex_date_and_amount(normalized_text)
+    if amount is None:
+        return None, 0.0
+    if date is None:
+        date = ""
+        confidence *= 0.7
+
+    return f"[{payment_type}, {date}, {amount}, {status}]", confidence
@@ -0,0 +1,86 @@
+"""
+Ledger snapshots persisted across runs.
+A rerun after a crash (or a son_kasa_miktari continuation) can reuse a student's
+ledger instead of re-scraping it: snapshots inside the freshness window are trusted
+for decisions that enter nothing, older ones are only re-read when the cheap DOM
+checksum changed. A payment is never entered on a snapshot that was not re-read.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import app_paths
+
+# Snapshots younger than this are trusted without looking at the page unless a payment is to be entered (0 = always check the DOM)
+MAX_AGE_HOURS = float(os.getenv("LEDGER_SNAPSHOT_MAX_AGE_HOURS", "12"))
+
+
+class LedgerSnapshot:
+    __slots__ = ("student", "ledger", "checksum", "source_hash", "saved_at")
+
+    def __init__(self, student, ledger, checksum, source_hash, saved_at):
+        self.student = student
+        self.ledger = ledger
+        self.checksum = checksum
+        self.source_hash = source_hash
+        self.saved_at = saved_at
+
+    def age_hours(self):
+        return (time.time() - self.saved_at) / 3600
+
+    def is_fresh(self, max_age_hours=None):
+        max_age_hours = MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+        return self.age_hours() <= max_age_hours
+
+
+class LedgerSnapshotDB:
+    def __init__(self, path=None):
+        self.path = path or app_paths.ledger_snapshots_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "student TEXT PRIMARY KEY, ledger TEXT NOT NULL, checksum TEXT, "
+            "source_hash TEXT, saved_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, student):
+        """Return the LedgerSnapshot for a student, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ledger, checksum, source_hash, saved_at FROM snapshots WHERE student = ?", (student,)
+            ).fetchone()
+        if row is None:
+            return None
+        ledger = tuple(json.loads(row[0]))
+        return LedgerSnapshot(student, ledger, row[1], row[2], row[3])
+
+    def save(self, student, ledger, checksum=None, source_hash=None):
+        """
+        Store a ledger. checksum/source_hash describe the DOM it was read from;
+        leave them None for ledgers we changed locally (the page was not re-read).
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (student, ledger, checksum, source_hash, saved_at) VALUES (?, ?, ?, ?, ?)",
+                (student, json.dumps([list(rows) for rows in ledger], ensure_ascii=False), checksum, source_hash, time.time())
+            )
+            self._conn.commit()
+
+    def touch(self, student):
+        """Mark a snapshot as just verified against the page."""
+        with self._lock:
+            self._conn.execute("UPDATE snapshots SET saved_at = ? WHERE student = ?", (time.time(), student))
+            self._conn.commit()
+
+    def delete(self, student):
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshots WHERE student = ?", (student,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
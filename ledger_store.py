@@ -0,0 +1,128 @@
+"""
+Run-scoped store of parsed student ledgers.
+Each Golden student's owed/paid/taksit lists are read from the page once per run;
+payments we enter ourselves are applied to the stored copy instead of re-scraping.
+"""
+from datetime import datetime
+
+from ledger_parser import AMOUNT_PATTERN
+from ledger_model import Ledger
+
+
+def parse_amount(amount_str):
+    """Turkish amount string ("9.500,00") to float."""
+    return float(amount_str.replace('.', '').replace(',', '.'))
+
+
+def format_amount(amount):
+    """Float to Turkish amount string (9500 -> "9.500,00")."""
+    return f"{amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def row_parts(row):
+    """Type, date and amount of a "[Type, Date, Amount, Status]" row string."""
+    parts = [p.strip() for p in row.strip("[]").split(",")]
+    amounts = AMOUNT_PATTERN.findall(row)
+    amount = parse_amount(amounts[-1]) if amounts else 0.0
+    return parts[0], (parts[1] if len(parts) > 1 else ""), amount
+
+
+class LedgerStore:
+    def __init__(self):
+        # student -> (payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed)
+        self._ledgers = {}
+        # student -> parsed Ledger, rebuilt after the rows change
+        self._models = {}
+        # Students whose ledger came from a snapshot and was not re-read from Golden this run
+        self._unverified = set()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.local_updates = 0
+
+    def get(self, student):
+        ledger = self._ledgers.get(student)
+        if ledger is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ledger
+
+    def peek(self, student):
+        """Like get, without touching the counters."""
+        return self._ledgers.get(student)
+
+    def put(self, student, ledger, verified=True):
+        """Store a ledger read from the page (verified=False for one taken from a snapshot)."""
+        if student in self._ledgers:
+            self.refreshes += 1
+        self._ledgers[student] = tuple(list(rows) for rows in ledger)
+        self._models.pop(student, None)
+        if verified:
+            self._unverified.discard(student)
+        else:
+            self._unverified.add(student)
+
+    def is_verified(self, student):
+        """True if the stored ledger was read from Golden this run (and only changed by our own payments)."""
+        return student in self._ledgers and student not in self._unverified
+
+    def model(self, student):
+        """The stored ledger parsed for decide_payment_types, or None; parsed once until it changes."""
+        ledger = self._ledgers.get(student)
+        if ledger is None:
+            return None
+        if student not in self._models:
+            self._models[student] = Ledger.from_rows(ledger)
+        return self._models[student]
+
+    def invalidate(self, student):
+        self._ledgers.pop(student, None)
+        self._models.pop(student, None)
+        self._unverified.discard(student)
+
+    def apply_payment(self, student, payment_type, amount, paid_on=None):
+        """
+        Apply one of our own ÖDETTİR entries to the stored ledger, the way Golden does:
+        the matching owed row becomes paid; TAKSİT pays installments in order.
+        """
+        ledger = self._ledgers.get(student)
+        if ledger is None:
+            return
+        payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed = ledger
+        paid_on = paid_on or datetime.now().strftime("%d.%m.%Y")
+        amount = float(amount)
+        self.local_updates += 1
+        self._models.pop(student, None)
+
+        if payment_type == "TAKSİT":
+            remaining = amount
+            while remaining > 0 and payments_taksit_owed:
+                _, _, owed_amount = row_parts(payments_taksit_owed[0])
+                paid_now = min(remaining, owed_amount)
+                payments_taksit_paid.append(f"[TAKSİT, {paid_on}, {format_amount(paid_now)}, ÖDEDİ]")
+                if paid_now >= owed_amount:
+                    payments_taksit_owed.pop(0)
+                else:
+                    _, due_date, _ = row_parts(payments_taksit_owed[0])
+                    payments_taksit_owed[0] = f"[TAKSİT, {due_date}, {format_amount(owed_amount - paid_now)}, ÖDEMEDİ]"
+                remaining -= paid_now
+            if remaining > 0:
+                payments_taksit_paid.append(f"[TAKSİT, {paid_on}, {format_amount(remaining)}, ÖDEDİ]")
+            return
+
+        # Prefer the owed row with the same amount, then any owed row of that type
+        matches = [row for row in payment_owed if payment_type in row]
+        exact = [row for row in matches if row_parts(row)[2] == amount]
+        if exact or matches:
+            payment_owed.remove((exact or matches)[0])
+        payments_paid.append(f"[{payment_type}, {paid_on}, {format_amount(amount)}, ÖDEDİ]")
+
+    def stats(self):
+        return {
+            "students": len(self._ledgers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "local_updates": self.local_updates,
+        }
@@ -0,0 +1,99 @@
+"""
+Persistent SQLite cache for LLM name-extraction results.
+Recurring payers send the same description every month, so the answer is
+stored on disk (keyed by the normalized description and sender) and reused.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from icu import Locale, UnicodeString
+import app_paths
+
+# Eviction defaults: keep at most this many entries, none older than this many days
+MAX_ENTRIES = 5000
+MAX_AGE_DAYS = 180
+
+tr = Locale("tr")
+
+
+def normalize_key_part(text):
+    """Turkish-aware uppercase with whitespace collapsed, so trivial variations share a key."""
+    text = str(UnicodeString(str(text)).toUpper(tr))
+    # Bank exports mix dotted and dotless I, treat them as the same letter (like turkish_pattern_check)
+    text = text.replace("İ", "I")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class NameCache:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.path = path or app_paths.name_cache_path()
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        # Names are resolved from worker threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS names ("
+            "description TEXT NOT NULL, sender TEXT NOT NULL, names TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (description, sender))"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, description, sender):
+        """Return the cached list of names, or None on a miss."""
+        key = (normalize_key_part(description), normalize_key_part(sender))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT names, created_at FROM names WHERE description = ? AND sender = ?", key
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.max_age_days * 86400:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, description, sender, names):
+        key = (normalize_key_part(description), normalize_key_part(sender))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO names (description, sender, names, created_at) VALUES (?, ?, ?, ?)",
+                key + (json.dumps(names, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Drop entries older than max_age_days, then the oldest ones above max_entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM names WHERE created_at < ?", (time.time() - self.max_age_days * 86400,))
+            self._conn.execute(
+                "DELETE FROM names WHERE rowid NOT IN "
+                "(SELECT rowid FROM names ORDER BY created_at DESC LIMIT ?)", (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Global cache to avoid reopening the database for every row
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_name_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = NameCache()
+        return _cache
@@ -0,0 +1,149 @@
+"""
+Long-lived EasyOCR server shared by all RPA runs.
+The Flask process starts it once; RPA processes and WhatsApp threads send it
+images over a local socket, so the OCR model is loaded from disk only once.
+OCR is only the fallback behind the DOM ledger read, so the model is loaded on the
+first readtext request (OCR_SERVICE_PRELOAD=1 loads it when the service starts).
+"""
+import os
+import secrets
+import threading
+import time
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+OCR_SERVICE_ADDRESS = ("127.0.0.1", int(os.getenv("OCR_SERVICE_PORT", "3988")))
+# Requests are pickled, so only processes of this session may connect: start_ocr_service
+# generates a random key and puts it in the environment, which every child process inherits
+AUTHKEY_ENV = "OCR_SERVICE_AUTHKEY"
+# Seconds a client waits for an answer before falling back to in-process OCR
+# (a readtext on a cold service also waits for the model to load)
+OCR_SERVICE_TIMEOUT = float(os.getenv("OCR_SERVICE_TIMEOUT", "180"))
+STATUS_TIMEOUT = 5
+PRELOAD_MODEL = os.getenv("OCR_SERVICE_PRELOAD", "0") == "1"
+
+# Module-level handle to the server process (only set in the process that started it)
+ocr_service_process = None
+
+
+def serve(authkey):
+    """Server loop: answer status and readtext requests, loading the model in the background on first use."""
+    state = {"state": "cold", "started_at": time.time(), "warm_at": None, "requests": 0, "error": None}
+    reader_ready = threading.Event()
+    holder = {}
+    # Connections are handled on their own threads but share one model; a Reader is not thread-safe
+    readtext_lock = threading.Lock()
+    load_lock = threading.Lock()
+
+    def load_model():
+        print("[OCR] Loading EasyOCR model...")
+        try:
+            import easyocr
+            holder["reader"] = easyocr.Reader(['tr', 'en'], gpu=True)
+        except Exception as e:
+            # Waiting requests are released and answered with the error, clients fall back to in-process OCR
+            state["state"] = "failed"
+            state["error"] = str(e)
+            print(f"[OCR] Could not load the model: {e}")
+            return
+        finally:
+            reader_ready.set()
+        state["state"] = "warm"
+        state["warm_at"] = time.time()
+        print("[OCR] Model loaded, service is warm")
+
+    def start_loading():
+        with load_lock:
+            if state["state"] == "cold":
+                state["state"] = "loading"
+                threading.Thread(target=load_model, daemon=True).start()
+
+    def handle(conn):
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    return
+                if request.get("cmd") == "status":
+                    conn.send(dict(state))
+                elif request.get("cmd") == "readtext":
+                    start_loading()
+                    reader_ready.wait()
+                    state["requests"] += 1
+                    if "reader" not in holder:
+                        conn.send({"error": f"model not loaded: {state['error']}"})
+                        continue
+                    try:
+                        with readtext_lock:
+                            results = holder["reader"].readtext(request["image"], mag_ratio=request.get("mag_ratio", 2))
+                        conn.send({"results": results})
+                    except Exception as e:
+                        conn.send({"error": str(e)})
+                else:
+                    conn.send({"error": f"unknown command {request.get('cmd')}"})
+        finally:
+            conn.close()
+
+    if PRELOAD_MODEL:
+        start_loading()
+    with Listener(OCR_SERVICE_ADDRESS, authkey=authkey) as listener:
+        print(f"[OCR] Service listening on {OCR_SERVICE_ADDRESS[0]}:{OCR_SERVICE_ADDRESS[1]}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"[OCR] Rejected connection: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def session_authkey():
+    """The key of this session's service, or None if no service was started by this session."""
+    key = os.environ.get(AUTHKEY_ENV)
+    return key.encode() if key else None
+
+
+def request(message, timeout):
+    """Send one request to the server and wait at most timeout seconds for the answer (None on failure)."""
+    authkey = session_authkey()
+    if authkey is None:
+        return None
+    try:
+        with Client(OCR_SERVICE_ADDRESS, authkey=authkey) as conn:
+            conn.send(message)
+            if not conn.poll(timeout):
+                print(f"[OCR] No answer to {message['cmd']} within {timeout:.0f}s")
+                return None
+            return conn.recv()
+    except Exception:
+        return None
+
+
+def ocr_service_status():
+    """Return the service state dict ('cold', 'loading', 'warm' or 'failed'), or None if it is not running."""
+    return request({"cmd": "status"}, STATUS_TIMEOUT)
+
+
+def start_ocr_service():
+    """Start the resident OCR server unless one is already answering."""
+    global ocr_service_process
+    if ocr_service_status() is not None:
+        return ocr_service_process
+    if AUTHKEY_ENV not in os.environ:
+        os.environ[AUTHKEY_ENV] = secrets.token_hex(32)
+    ocr_service_process = multiprocessing.Process(target=serve, args=(session_authkey(),), daemon=True)
+    ocr_service_process.start()
+    print(f"[OCR] Started OCR service process (pid {ocr_service_process.pid})")
+    return ocr_service_process
+
+
+def readtext_via_service(image, mag_ratio=2):
+    """Run readtext on the resident server. Returns None if the service is not available, failed or timed out."""
+    response = request({"cmd": "readtext", "image": image, "mag_ratio": mag_ratio}, OCR_SERVICE_TIMEOUT)
+    if response is None:
+        return None
+    if "error" in response:
+        print(f"[OCR] Service error: {response['error']}")
+        return None
+    return response["results"]
@@ -0,0 +1,108 @@
+"""
+Central pacing for browser actions.
+Every deliberate "human" pause goes through pause(kind) so the delays can be tuned in one
+place: named profiles scale them, adaptive profiles follow how fast Golden actually answers,
+and a per-run report separates time spent in deliberate delay from time spent waiting on the site.
+"""
+import os
+import time
+import random
+import asyncio
+
+# Base (careful) delay ranges in seconds. Waiting for the page itself is done by page_sync,
+# these are only the pauses a person would make on a page that is already there.
+DELAYS = {
+    "hover": (0.3, 0.7),        # between hovering and clicking an element
+    "focus": (0.2, 0.5),        # between hovering and clicking a text field
+    "key": (0.1, 0.2),          # between key presses (select all, ...)
+    "field": (0.9, 3.1),        # between form fields
+    "typed": (0.8, 1.8),        # after typing, before pressing Enter
+    "glance": (0.4, 1.2),       # looking at a page that has just become ready
+    "review": (4.1, 7.1),       # looking at a filled payment form before ÖDETTİR
+    "after_payment": (2.1, 3.1),
+    "login": (1.5, 4.1),        # after pressing the login button
+    "popup": (1.1, 2.2),
+}
+KEY_DELAY_MS = (50, 150)
+
+PROFILES = {
+    # The original fixed ranges
+    "careful": {"scale": 1.0, "adaptive": False},
+    # Shorter ranges; pauses follow the observed response time of the site
+    "normal": {"scale": 0.6, "adaptive": True, "response_factor": 1.5},
+    "fast": {"scale": 0.3, "adaptive": True, "response_factor": 1.0},
+}
+DEFAULT_PROFILE = os.getenv("RPA_PACING_PROFILE", "careful")
+# Weight of the newest sample in the response time average
+RESPONSE_EWMA_WEIGHT = 0.3
+
+
+class Pacer:
+    def __init__(self, profile=DEFAULT_PROFILE):
+        self.set_profile(profile)
+        self.response_ewma = None
+        self.reset()
+
+    def set_profile(self, profile):
+        if profile not in PROFILES:
+            print(f"Unknown pacing profile '{profile}', using 'careful'")
+            profile = "careful"
+        self.profile_name = profile
+        self.profile = PROFILES[profile]
+
+    def reset(self):
+        """Start a new run report (the response time average is kept, the site has not changed)."""
+        self.deliberate_seconds = 0.0
+        self.waiting_seconds = 0.0
+        self.pauses = {}
+        self.waits = 0
+        self.started = time.time()
+
+    def observe(self, seconds):
+        """Record how long the site took to answer (page load, element appearing, ...)."""
+        if self.response_ewma is None:
+            self.response_ewma = seconds
+        else:
+            self.response_ewma = RESPONSE_EWMA_WEIGHT * seconds + (1 - RESPONSE_EWMA_WEIGHT) * self.response_ewma
+
+    def delay_for(self, kind, profile=None):
+        settings = PROFILES[profile] if profile else self.profile
+        low, high = DELAYS[kind]
+        low, high = low * settings["scale"], high * settings["scale"]
+        if settings["adaptive"] and self.response_ewma is not None:
+            # A fast site gets short pauses, a slow one longer ones, within the profile's range
+            center = min(high, max(low, self.response_ewma * settings["response_factor"]))
+            low, high = max(low, center * 0.7), min(high, center * 1.3)
+        return random.uniform(low, high)
+
+    async def pause(self, kind, profile=None):
+        """Deliberate human-like pause of the given kind."""
+        seconds = self.delay_for(kind, profile)
+        self.deliberate_seconds += seconds
+        self.pauses[kind] = self.pauses.get(kind, 0) + 1
+        await asyncio.sleep(seconds)
+
+    def record_wait(self, seconds):
+        """Time spent waiting for the site (see page_sync); counted as real waiting and observed."""
+        self.waiting_seconds += seconds
+        self.waits += 1
+        self.observe(seconds)
+
+    def key_delay_ms(self):
+        low, high = KEY_DELAY_MS
+        scale = self.profile["scale"]
+        return random.randint(int(low * scale), int(high * scale))
+
+    def report(self):
+        return {
+            "profile": self.profile_name,
+            "run_seconds": round(time.time() - self.started, 1),
+            "deliberate_delay_seconds": round(self.deliberate_seconds, 1),
+            "waiting_seconds": round(self.waiting_seconds, 1),
+            "page_waits": self.waits,
+            "avg_response_seconds": round(self.response_ewma, 2) if self.response_ewma is not None else None,
+            "pauses": dict(self.pauses),
+        }
+
+
+pacer = Pacer()
@@ -0,0 +1,104 @@
+"""
+Wait on concrete page signals instead of fixed sleeps.
+step() runs one action (a click, Enter, ...) and returns as soon as the page shows it is
+ready for the next one: the request the action triggered has completed, a table is
+populated, a modal has opened or closed. All steps share one timeout policy.
+"""
+import os
+import time
+import asyncio
+from urllib.parse import quote, quote_plus
+from pacing import pacer
+
+# Longest a single step (action + everything it waits for) may take
+STEP_TIMEOUT_MS = int(os.getenv("GOLDEN_STEP_TIMEOUT_MS", "10000"))
+# After the server answered, how long the page gets to render the result
+RENDER_TIMEOUT_MS = int(os.getenv("GOLDEN_RENDER_TIMEOUT_MS", "3000"))
+SERVER_RESOURCE_TYPES = ("xhr", "fetch", "document")
+
+
+def request_matcher(method=None, contains=None):
+    """
+    Predicate for the request an action triggers: a page load or XHR sent with that method
+    (e.g. "POST") whose URL or form data carries contains (as typed or URL encoded).
+    """
+    needles = [encode(contains) for encode in (str, quote_plus, quote)] if contains else []
+
+    def matches(request):
+        if request.resource_type not in SERVER_RESOURCE_TYPES:
+            return False
+        if method is not None and request.method != method:
+            return False
+        if needles:
+            post_data = request.post_data or ""
+            return any(needle in request.url or needle in post_data for needle in needles)
+        return True
+    return matches
+
+
+async def step(page, action, ready=None, hidden=None, network=False, timeout_ms=STEP_TIMEOUT_MS):
+    """
+    Run action() and wait until the page is ready.
+    ready: locator that has to become visible, hidden: locator that has to disappear,
+    network: wait for the response to the request the action sends - a request_matcher()
+    predicate, or True for the first page load / XHR sent once the action started.
+    Returns (action result, True if every signal arrived before the deadline).
+    An action returning False (e.g. a failed human_button_click) is not waited on.
+    """
+    started = time.monotonic()
+    deadline = started + timeout_ms / 1000
+
+    def remaining_ms():
+        return max(1, int((deadline - time.monotonic()) * 1000))
+
+    request_waiter = None
+    if network:
+        # Listen for requests, not responses: a response to something sent before the action
+        # (a poll, a DataTables reload) must not count as the action's answer
+        matches = network if callable(network) else request_matcher()
+        request_waiter = asyncio.ensure_future(page.wait_for_event("request", predicate=matches, timeout=timeout_ms))
+        # Let the listener attach before the action can trigger the request
+        await asyncio.sleep(0)
+
+    try:
+        result = await action()
+        if result is False:
+            return result, False
+        is_ready = await wait_for_signals(page, request_waiter, ready, hidden, remaining_ms)
+    finally:
+        if request_waiter is not None:
+            if not request_waiter.done():
+                request_waiter.cancel()
+            elif not request_waiter.cancelled():
+                request_waiter.exception()
+        pacer.record_wait(time.monotonic() - started)
+    return result, is_ready
+
+
+async def wait_for_signals(page, request_waiter, ready, hidden, remaining_ms):
+    try:
+        if request_waiter is not None:
+            request = await request_waiter
+            response = await asyncio.wait_for(request.response(), remaining_ms() / 1000)
+            if response is None:
+                raise RuntimeError(f"no response to {request.method} {request.url}")
+            await asyncio.wait_for(response.finished(), remaining_ms() / 1000)
+            if request.resource_type == "document":
+                await page.wait_for_load_state("domcontentloaded", timeout=remaining_ms())
+        if ready is not None:
+            await ready.wait_for(state="visible", timeout=remaining_ms())
+        if hidden is not None:
+            await hidden.wait_for(state="hidden", timeout=remaining_ms())
+    except Exception as e:
+        print(f"Page not ready: {e}")
+        return False
+    return True
+
+
+async def rendered(locator, timeout_ms=RENDER_TIMEOUT_MS):
+    """True if the locator is (or becomes) visible shortly after the server answered."""
+    try:
+        await locator.wait_for(state="visible", timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,192 @@
+"""
+Split a received amount into the student's actual open debt items.
+The fixed rules in decide_payment_types only know a handful of combinations (exam fee +
+TAKSİT, 4000 BAŞARISIZ + remainder, ...). When they give up, allocate() runs a bounded
+subset-sum over the open fee rows of the ledger, lets open installments take the rest,
+and picks one decomposition with explicit tie-breaking rules - or none if it is ambiguous.
+"""
+import os
+import json
+
+from ledger_model import PaymentType
+
+# Standard amounts (lira) of each fee, used for owed rows whose amount could not be read.
+# GOLDEN_FEE_SCHEDULE overrides it, e.g. '{"YAZILI SINAV HARCI": [1300, 1000]}'
+FEE_SCHEDULE = {
+    PaymentType.YAZILI: (1200, 900),
+    PaymentType.UYGULAMA: (1600, 1350),
+    PaymentType.BELGE: (1000,),
+    PaymentType.BASARISIZ: (4000,),
+    PaymentType.OZEL_DERS: (4000,),
+}
+
+
+def load_fee_schedule(value):
+    """FEE_SCHEDULE with the GOLDEN_FEE_SCHEDULE overrides; a malformed value is ignored with a warning."""
+    schedule = dict(FEE_SCHEDULE)
+    try:
+        schedule.update({PaymentType(name): tuple(amounts) for name, amounts in json.loads(value).items()})
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Ignoring GOLDEN_FEE_SCHEDULE ({e}), using the default fee schedule")
+    return schedule
+
+
+FEE_SCHEDULE = load_fee_schedule(os.getenv("GOLDEN_FEE_SCHEDULE", "{}"))
+# A partial installment payment must be a multiple of this (lira); whole installments always fit
+TAKSIT_STEP = int(os.getenv("GOLDEN_TAKSIT_STEP", "500"))
+# Tie-breaking rules, applied in order:
+#   installment_match - the TAKSİT part closes whole installments
+#   fees_first        - cover more fee rows (a fixed fee in the amount is rarely a coincidence)
+#   oldest_first      - prefer the fee rows that have been open longest
+#   type_order        - prefer types earlier in TYPE_ORDER
+RULES = tuple(r.strip() for r in os.getenv("GOLDEN_ALLOCATION_RULES", "installment_match,fees_first,oldest_first").split(",") if r.strip())
+TYPE_ORDER = (PaymentType.YAZILI, PaymentType.UYGULAMA, PaymentType.BELGE, PaymentType.BASARISIZ, PaymentType.OZEL_DERS)
+# More open fee rows than this are not searched (the ledger is probably misread)
+MAX_ITEMS = 12
+# Candidate subsets kept per sum; two are enough to tell a winner from a tie
+KEEP_PER_SUM = 2
+
+
+class Allocation:
+    """
+    A decomposition of a received amount: [(PaymentType, kuruş)] and why it was chosen.
+    partial_installment is True when the TAKSİT part is only a TAKSIT_STEP multiple
+    that does not close whole installments - a guess rather than a match.
+    """
+    __slots__ = ("parts", "reason", "partial_installment")
+
+    def __init__(self, parts, reason, partial_installment=False):
+        self.parts = parts
+        self.reason = reason
+        self.partial_installment = partial_installment
+
+    def payment_types(self):
+        """The decomposition in decide_payment_types' format, TAKSİT last."""
+        rows = [[payment_type.value, "BORC VAR", lira(kurus)] for payment_type, kurus in self.parts]
+        rows.sort(key=lambda row: 1 if row[0] == PaymentType.TAKSIT.value else 0)
+        return rows
+
+    def __repr__(self):
+        return f"Allocation({[(t.name, k) for t, k in self.parts]}, {self.reason!r})"
+
+
+def lira(kurus):
+    return kurus // 100 if kurus % 100 == 0 else kurus / 100
+
+
+def describe(parts):
+    return " + ".join(f"{payment_type.value} {lira(kurus)}" for payment_type, kurus in parts)
+
+
+def open_fee_items(ledger):
+    """(PaymentType, kuruş, day) of every open non-TAKSİT row."""
+    items = []
+    for entry in ledger.owed:
+        if entry.paid or entry.type in (PaymentType.TAKSIT, PaymentType.OTHER):
+            continue
+        if entry.kurus is not None:
+            items.append((entry.type, entry.kurus, entry.day))
+        elif len(FEE_SCHEDULE.get(entry.type, ())) == 1:
+            items.append((entry.type, FEE_SCHEDULE[entry.type][0] * 100, entry.day))
+    return items
+
+
+def installment_sums(ledger):
+    """Amounts (kuruş) that close the first 1..n open installments."""
+    sums, total = set(), 0
+    for entry in ledger.taksit_owed:
+        if entry.type is PaymentType.TAKSIT and not entry.paid and entry.kurus is not None:
+            total += entry.kurus
+            sums.add(total)
+    return sums
+
+
+def subset_key(subset, items):
+    keys = []
+    for rule in RULES:
+        if rule == "fees_first":
+            keys.append(-len(subset))
+        elif rule == "oldest_first":
+            keys.append(sum(items[i][2].toordinal() if items[i][2] else 10**6 for i in subset))
+        elif rule == "type_order":
+            keys.append(tuple(sorted(TYPE_ORDER.index(items[i][0]) if items[i][0] in TYPE_ORDER else len(TYPE_ORDER) for i in subset)))
+    return tuple(keys)
+
+
+def fee_subsets(items, limit):
+    """
+    Bounded subset-sum: sum (kuruş, <= limit) -> the best KEEP_PER_SUM subsets reaching it,
+    ranked by the tie-breaking rules that only depend on the subset.
+    """
+    best = {0: [()]}
+    for index, (_, kurus, _) in enumerate(items):
+        for total, subsets in list(best.items()):
+            new_total = total + kurus
+            if new_total > limit:
+                continue
+            candidates = best.get(new_total, []) + [subset + (index,) for subset in subsets]
+            candidates.sort(key=lambda subset: subset_key(subset, items))
+            # Duplicate rows (same type and amount) are the same decomposition
+            kept, seen = [], set()
+            for subset in candidates:
+                signature = fee_parts(subset, items)
+                if tuple(signature) not in seen:
+                    seen.add(tuple(signature))
+                    kept.append(subset)
+            best[new_total] = kept[:KEEP_PER_SUM]
+    return best
+
+
+def fee_parts(subset, items):
+    return sorted(((items[i][0], items[i][1]) for i in subset), key=lambda part: (part[0].name, part[1]))
+
+
+def allocate(ledger, payment_amount):
+    """
+    Split payment_amount (lira) over the ledger's open fee rows and installments.
+    Returns an Allocation, or None if nothing fits or two decompositions are equally good.
+    """
+    amount = round(float(payment_amount) * 100)
+    items = open_fee_items(ledger)
+    if amount <= 0 or len(items) > MAX_ITEMS:
+        return None
+    taksit_open = ledger.total_owed_taksit_kurus
+    whole_installments = installment_sums(ledger)
+
+    ranked = []
+    for total, subsets in fee_subsets(items, amount).items():
+        taksit = amount - total
+        if taksit > taksit_open:
+            continue
+        closes_installments = taksit == 0 or taksit in whole_installments
+        if not closes_installments and taksit % (TAKSIT_STEP * 100) != 0:
+            continue
+        for subset in subsets:
+            key = subset_key(subset, items)
+            if "installment_match" in RULES:
+                key = (0 if closes_installments else 1,) + key
+            parts = fee_parts(subset, items)
+            if taksit:
+                parts.append((PaymentType.TAKSIT, taksit))
+            ranked.append((key, parts, closes_installments))
+    if not ranked:
+        return None
+
+    ranked.sort(key=lambda candidate: candidate[0])
+    key, parts, closes_installments = ranked[0]
+    tied = [candidate for candidate in ranked[1:] if candidate[0] == key and candidate[1] != parts]
+    if tied:
+        print(f"Allocation of {lira(amount)} is ambiguous: {describe(parts)} vs {describe(tied[0][1])}")
+        return None
+
+    fee_count = sum(1 for t, _ in parts if t is not PaymentType.TAKSIT)
+    partial_installment = bool(parts) and parts[-1][0] is PaymentType.TAKSIT and not closes_installments
+    if parts[-1][0] is PaymentType.TAKSIT:
+        taksit_reason = "closes whole installments" if closes_installments else f"pays part of an installment (multiple of {TAKSIT_STEP})"
+        reason = f"{fee_count} open fee row(s) + TAKSİT that {taksit_reason}"
+    else:
+        reason = f"exactly {fee_count} open fee row(s)"
+    runner_up = len(ranked) - 1
+    if runner_up:
+        reason += f"; preferred over {runner_up} other fit(s) by {', '.join(RULES)}"
+    return Allocation(parts, reason, partial_installment)
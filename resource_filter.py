@@ -0,0 +1,76 @@
+"""
+Playwright route filter that keeps non-essential resources off the wire.
+Images, fonts, media and known third-party trackers are not needed to read ledgers or fill
+payment forms; blocking them makes pages load faster and lets several headless workers share
+one box. Stylesheets are kept: visibility checks (modals, :visible) depend on them.
+"""
+import os
+from urllib.parse import urlparse
+
+BLOCK_RESOURCES = os.getenv("RPA_BLOCK_RESOURCES", "1") != "0"
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_DOMAINS = {
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "hotjar.com",
+    "yandex.ru",
+} | {d.strip() for d in os.getenv("RPA_BLOCKED_DOMAINS", "").split(",") if d.strip()}
+# Blocked requests are never downloaded, so their size is estimated per type (bytes)
+ESTIMATED_SIZES = {"image": 25_000, "font": 40_000, "media": 500_000, "script": 30_000, "other": 5_000}
+
+
+def is_blocked_domain(url):
+    host = urlparse(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+
+def should_block(resource_type, url):
+    return resource_type in BLOCKED_RESOURCE_TYPES or is_blocked_domain(url)
+
+
+class ResourceFilter:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.blocked = {}
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+
+    async def install(self, context):
+        """Route every request of the context through the filter."""
+        await context.route("**/*", self.handle)
+        context.on("response", self.on_response)
+
+    async def handle(self, route):
+        request = route.request
+        if should_block(request.resource_type, request.url):
+            self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def on_response(self, response):
+        self.loaded_requests += 1
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def report(self):
+        saved_bytes = sum(count * ESTIMATED_SIZES.get(kind, ESTIMATED_SIZES["other"]) for kind, count in self.blocked.items())
+        return {
+            "requests_blocked": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "estimated_kb_saved": round(saved_bytes / 1024),
+            "requests_loaded": self.loaded_requests,
+            "kb_loaded": round(self.loaded_bytes / 1024),
+        }
+
+
+resource_filter = ResourceFilter()
@@ -1,15 +1,17 @@
 # TODO: Refactor - Merge GoldenProcessStart & GoldenUniqueProcess into ONE mother function
-# TODO: Add HEADLESS config toggle
 import asyncio
-import random
 import time
 import os
 import csv
+import contextlib
 import pandas as pd
+import numpy as np
 
 from ollama import chat
 from ollama import ChatResponse
-from rpa_helper import human_option_select, human_button_click, human_type, get_human_name, get_payment_type, save_payment_record, update_processing_status
+from rpa_helper import human_option_select, human_button_click, human_type, search_student, statement_sender, get_human_names_batch, open_payment_page, read_ledger, read_ledger_checksum, decide_payment_types, infer_payment_type_from_amount, save_payment_record, reorder_payment_records, update_processing_status
+from ledger_store import LedgerStore
+from ledger_snapshots import LedgerSnapshotDB
 
 from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
@@ -17,6 +19,14 @@ import dotenv
 import easyocr
 import json
 import app_paths
+import ledger_parser
+import tab_pool
+import golden_http
+import student_directory
+from sender_aliases import get_alias_store
+from pacing import pacer, DEFAULT_PROFILE
+import page_sync
+from resource_filter import resource_filter, BLOCK_RESOURCES
 dotenv.load_dotenv()
 
 def get_credentials():
@@ -40,50 +50,206 @@ def get_credentials():
 
 
 
+GOLDEN_LOGIN_URL = "https://kurs.goldennet.com.tr/giris.php"
+# Set GOLDEN_STUDENT_DIRECTORY=0 to search every student in the UI instead of indexing the kursiyer list
+USE_STUDENT_DIRECTORY = os.getenv("GOLDEN_STUDENT_DIRECTORY", "1") != "0"
+# What to type into KURSİYER ARA to list every student
+DIRECTORY_QUERY = os.getenv("GOLDEN_DIRECTORY_QUERY", "")
+# Links of every row of the DataTables result tables, not only the rendered page; null if
+# there is no DataTables or it pages on the server (the browser only holds the page on screen)
+DATATABLES_LINKS_JS = """() => {
+    const $ = window.jQuery;
+    if (!$ || !$.fn.dataTable || !$.fn.dataTable.tables().length) return null;
+    const links = [];
+    for (const table of $.fn.dataTable.tables()) {
+        const api = $(table).DataTable();
+        if (api.settings()[0].oFeatures.bServerSide) return null;
+        api.rows().nodes().toArray().forEach(row =>
+            row.querySelectorAll("a").forEach(a => links.push([a.href, a.textContent.trim()])));
+    }
+    return links;
+}"""
+
+
+async def login_golden(page):
+    """Type the credentials on the Golden login page like a human."""
+    response = await page.goto(GOLDEN_LOGIN_URL)
+    
+    print("Typing login credentials...")
+    creds = get_credentials()
+    await human_type(page, "#kurumkodu", creds["institution_code"])
+    await pacer.pause("field", profile="careful")
+
+    await human_type(page, "#kullaniciadi", creds["login"])
+    await pacer.pause("field", profile="careful")
+
+    await human_type(page, "#kullanicisifresi", creds["password"])
+    await pacer.pause("field", profile="careful")
+
+    await page_sync.step(page, lambda: human_button_click(page, "#btngiris"), network=page_sync.request_matcher(method="POST"))
+
+    await pacer.pause("login", profile="careful")
+
+
+async def is_session_valid(page):
+    """Open the page we landed on after the last login; an expired session redirects to giris.php."""
+    try:
+        with open(app_paths.session_meta_path(), "r") as f:
+            home_url = json.load(f)["home_url"]
+        await page.goto(home_url)
+    except Exception as e:
+        print(f"Could not validate saved session: {e}")
+        return False
+    if "giris.php" in page.url:
+        return False
+    # Some expired sessions render the login form without redirecting
+    return await page.locator("#kurumkodu").count() == 0
+
+
+async def open_golden_session(browser, block_resources=BLOCK_RESOURCES, **context_options):
+    """
+    New context + page that is logged in to Golden.
+    The saved storage state (cookies/localStorage) is reused while it is still valid,
+    otherwise we log in again and save the new state for the next run/process.
+    With block_resources, images/fonts/trackers are filtered out (see resource_filter).
+    """
+    state_path = app_paths.session_state_path()
+    if os.path.exists(state_path):
+        context = await browser.new_context(storage_state=state_path, **context_options)
+        if block_resources:
+            await resource_filter.install(context)
+        page = await context.new_page()
+        if await is_session_valid(page):
+            print("Reusing saved Golden session")
+            return context, page
+        print("Saved Golden session expired, logging in again...")
+        await context.close()
+
+    context = await browser.new_context(**context_options)
+    if block_resources:
+        await resource_filter.install(context)
+    page = await context.new_page()
+    print("Page created. Navigating to login page...")
+    await login_golden(page)
+
+    if "giris.php" not in page.url:
+        await save_golden_session(context, page.url)
+    return context, page
+
+
+async def save_golden_session(context, home_url=None):
+    """Persist the context's cookies/localStorage (and the post-login URL) for the next run."""
+    try:
+        await context.storage_state(path=app_paths.session_state_path())
+        if home_url:
+            with open(app_paths.session_meta_path(), "w") as f:
+                json.dump({"home_url": home_url, "saved_at": time.time()}, f)
+    except Exception as e:
+        print(f"Could not save Golden session: {e}")
+
+
+def use_headless(headless=None):
+    """Per-job headless choice; falls back to RPA_HEADLESS (off by default, the bot normally runs visibly)."""
+    if headless is None:
+        return os.getenv("RPA_HEADLESS", "0") == "1"
+    return bool(headless)
+
+
+async def ensure_golden_session(page):
+    """Log in again on an existing page if the session has expired (used by the browser daemon)."""
+    if await is_session_valid(page):
+        return False
+    print("Golden session expired, logging in again...")
+    await login_golden(page)
+    if "giris.php" not in page.url:
+        await save_golden_session(page.context, page.url)
+    return True
+
+
 async def golden_PaymentPaid(page, collection_type, amount):
     
-    await human_button_click(page, "#btnyeniodeme")
+    await page_sync.step(page, lambda: human_button_click(page, "#btnyeniodeme"), ready=page.locator("#yenitahsilat_tutar"))
     
-    await asyncio.sleep(random.uniform(1.1, 3.7))
+    await pacer.pause("glance")
     
     await human_option_select(page, "#yenitahsilat_borctipi", collection_type)
     
-    await asyncio.sleep(random.uniform(0.9, 3.1))
+    await pacer.pause("field")
     
     await human_type(page, "#yenitahsilat_tutar", str(amount))
     
-    await asyncio.sleep(random.uniform(4.1, 7.1))
+    await pacer.pause("review")
     
-    await human_button_click(page, "button", has_text="ÖDETTİR")
+    # The payment is saved once the request has completed and the modal has closed
+    _, saved = await page_sync.step(page, lambda: human_button_click(page, "button", has_text="ÖDETTİR"), hidden=page.locator("#yenitahsilat_tutar"), network=page_sync.request_matcher(method="POST"))
+    if not saved:
+        raise RuntimeError(f"Payment form did not close after ÖDETTİR ({collection_type}, {amount})")
     
-    await asyncio.sleep(random.uniform(1.6, 3.1))
+    await pacer.pause("glance")
     
    
 
 async def golden_PaymentOwed(page, collection_type, amount):
     
-    await human_button_click(page, "#btnyeniborc")
+    await page_sync.step(page, lambda: human_button_click(page, "#btnyeniborc"), ready=page.locator("#yeniborc_tutar"))
     
-    await asyncio.sleep(random.uniform(1.1, 3.7))
+    await pacer.pause("glance")
     
     await human_option_select(page, "#yeniborc_borctipi", collection_type)
     
-    await asyncio.sleep(random.uniform(0.9, 3.1))
+    await pacer.pause("field")
     
     await human_type(page, "#yeniborc_tutar", str(amount))
     
-    await asyncio.sleep(random.uniform(0.7, 2.1))
+    await pacer.pause("field")
     
-    await human_button_click(page, "button.btn-success:visible", has_text="KAYDET")
+    _, saved = await page_sync.step(page, lambda: human_button_click(page, "button.btn-success:visible", has_text="KAYDET"), hidden=page.locator("#yeniborc_tutar"), network=page_sync.request_matcher(method="POST"))
+    if not saved:
+        raise RuntimeError(f"Debt form did not close after KAYDET ({collection_type}, {amount})")
     
-    await asyncio.sleep(random.uniform(1.6, 3.1))
+    await pacer.pause("glance")
 
-async def RPAexecutioner_readfile(filename, sheetname):
+def to_number(column):
+    """
+    Statement amounts as floats (NaN where unreadable). Excel cells are usually numeric already;
+    text cells may be Turkish ("1.200,50", "1.200") or English ("38,594.30") formatted.
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float)
+    text = column.astype(str).str.replace(r"\s", "", regex=True)
+    decimal_comma = text.str.contains(r",\d{1,2}$", regex=True)
+    text = text.where(~decimal_comma, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    text = text.where(decimal_comma, text.str.replace(",", "", regex=False))
+    # Turkish thousands without kuruş ("1.200", "12.500"): a dot before each group of exactly three digits
+    thousands_dot = ~decimal_comma & text.str.fullmatch(r"-?\d{1,3}(\.\d{3})+")
+    text = text.where(~thousands_dot, text.str.replace(".", "", regex=False))
+    return pd.to_numeric(text, errors="coerce")
+
+
+def read_statement(filename, sheetname):
+    """The bank statement as a typed DataFrame: numeric Tutar/Bakiye, parsed Tarih, categorical Etiket."""
     # Try xlrd first (for .xls), fall back to openpyxl (for .xlsx)
     try:
         dfs = pd.read_excel(filename, sheet_name=sheetname, header=14, engine='xlrd')
     except:
         dfs = pd.read_excel(filename, sheet_name=sheetname, header=14, engine='openpyxl')
+    return type_statement(dfs)
+
+
+def type_statement(dfs):
+    dfs = dfs.reset_index(drop=True)
+    dfs["Açıklama"] = dfs["Açıklama"].fillna("").astype(str)
+    dfs["Tutar"] = to_number(dfs["Tutar"])
+    dfs["Etiket"] = dfs["Etiket"].astype("category")
+    if not pd.api.types.is_datetime64_any_dtype(dfs["Tarih"]):
+        dfs["Tarih"] = pd.to_datetime(dfs["Tarih"], dayfirst=True, format="mixed", errors="coerce")
+    if "Bakiye" in dfs.columns:
+        dfs["Bakiye"] = to_number(dfs["Bakiye"])
+    return dfs
+
+
+async def RPAexecutioner_readfile(filename, sheetname):
+    dfs = read_statement(filename, sheetname)
 
     people = dfs["Açıklama"]
     payments = dfs["Tutar"]
@@ -112,275 +278,572 @@ def find_starting_row_from_bakiye(bakiye_column, son_kasa_miktari):
         print(f"Could not parse son_kasa_miktari: {son_kasa_miktari}")
         return 0
 
-    # Search from bottom to top
-    for i in range(len(bakiye_column) - 1, -1, -1):
-        try:
-            bakiye_val = bakiye_column.iloc[i]
-            if pd.isna(bakiye_val):
-                continue
-            # Get integer part of the bakiye value
-            bakiye_int = int(float(str(bakiye_val).replace(',', '.').replace(' ', '')))
-            if bakiye_int == target:
-                print(f"Found matching Bakiye at row {i}: {bakiye_val} (int: {bakiye_int}) == {target}")
-                return i
-        except (ValueError, TypeError):
-            continue
+    # Integer parts of the whole column at once; NaN never matches
+    bakiye = to_number(pd.Series(bakiye_column)).to_numpy()
+    matches = np.flatnonzero(np.trunc(bakiye) == target)
+    if len(matches):
+        i = int(matches[-1])
+        print(f"Found matching Bakiye at row {i}: {bakiye[i]} (int: {int(bakiye[i])}) == {target}")
+        return i
 
     print(f"No matching Bakiye found for {son_kasa_miktari}, starting from row 0")
     return 0
 
 
-async def RPAexecutioner_GoldenProcessStart(filename=None, sheetname=None, son_kasa_miktari=None):
-    async with Stealth().use_async(async_playwright()) as playwright:
-        chromium = playwright.chromium
-        
-        print("Launching browser...")
-        browser = await chromium.launch(headless=False)
-        
-        context = await browser.new_context(ignore_https_errors=True)
-        
-        page = await context.new_page()
-        print("Page created. Navigating to login page...")
-        
-        response = await page.goto("https://kurs.goldennet.com.tr/giris.php")
-        
-        print("Typing login credentials...")
-        creds = get_credentials()
-        await human_type(page, "#kurumkodu", creds["institution_code"])
-        await asyncio.sleep(random.uniform(0.7, 1.9))
+class RowPlan:
+    """
+    What a statement run will do, decided before the browser opens.
+    rows: rows to process in run order (POS rows included, they only get a FLAG: POS record),
+    skipped: [(row, reason)], pos_rows: card payments that cannot be attributed to a student.
+    """
+    __slots__ = ("rows", "skipped", "pos_rows")
 
-        await human_type(page, "#kullaniciadi", creds["login"])
-        await asyncio.sleep(random.uniform(1.1, 3.2))
+    def __init__(self, rows, skipped, pos_rows):
+        self.rows = rows
+        self.skipped = skipped
+        self.pos_rows = pos_rows
 
-        await human_type(page, "#kullanicisifresi", creds["password"])
-        await asyncio.sleep(random.uniform(0.9, 3.1))
+    def summary(self):
+        reasons = {}
+        for _, reason in self.skipped:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        return {"process": len(self.rows) - len(self.pos_rows), "pos": len(self.pos_rows), "skipped": reasons}
 
-        await human_button_click(page, "#btngiris")
 
-        await asyncio.sleep(random.uniform(1.5, 4.1))
+def plan_statement_rows(payment_information, start_row=None):
+    """
+    Filter the statement with vectorized masks.
+    Rows are visited backwards from start_row to 0 if it is given, otherwise forward.
+    """
+    people, payments, tag = payment_information[0], payment_information[1], payment_information[2]
+    order = np.arange(start_row, -1, -1) if start_row is not None else np.arange(len(payments))
 
-        # Close the notification popup
-        print("Attempting to close notification popup...")
+    amount = payments.to_numpy(dtype=float)
+    is_cost = amount < 0
+    no_amount = ~(amount > 0) & ~is_cost
+    not_transfer = (tag != "Para Transferi").to_numpy()
+    is_pos = people.astype(str).str.startswith("PK").to_numpy()
+
+    reason = np.select([is_cost, no_amount, not_transfer], ["cost", "no amount", "not a transfer"], default="")
+    keep = reason[order] == ""
+    rows = order[keep].tolist()
+    skipped = [(int(i), str(reason[i])) for i in order[~keep]]
+    pos_rows = [i for i in rows if is_pos[i]]
+    return RowPlan(rows, skipped, pos_rows)
+
+
+def plan_student_groups(name_rows, row_names):
+    """
+    Group the rows to process by resolved student.
+    Students keep the order of their first row and each student's rows keep statement (date) order.
+    Returns [(name, [row indexes]), ...].
+    """
+    groups = {}
+    for i in name_rows:
+        groups.setdefault(row_names[i], []).append(i)
+    return list(groups.items())
+
+
+async def load_student_ledger(page, name_surname, snapshots, page_student, http_reader=None, trust_fresh=True):
+    """
+    Get a student's ledger from the snapshot DB, over HTTP or from the page.
+    A fresh snapshot is used as-is when trust_fresh; otherwise a direct HTTP read is tried
+    first, and in the browser a snapshot is checked against the DOM checksum so the
+    tables are only fully re-read when it changed.
+    Returns (ledger or None if the student was not found, page_student, verified) where
+    verified is False for a fresh snapshot that was not compared with Golden.
+    """
+    snapshot = snapshots.load(name_surname)
+    if trust_fresh and snapshot is not None and snapshot.is_fresh():
+        print(f"Using ledger snapshot for {name_surname} ({snapshot.age_hours():.1f}h old)")
+        return snapshot.ledger, page_student, False
+
+    if http_reader is not None:
+        ledger = await http_reader.read_ledger(name_surname)
+        if ledger is not None:
+            print(f"Read ledger for {name_surname} over HTTP")
+            snapshots.save(name_surname, ledger)
+            return ledger, page_student, True
+
+    if page_student != name_surname:
+        # The first UI search of a run teaches the HTTP reader which request to replay
+        recorder = http_reader.record(page, name_surname) if http_reader is not None else None
+        try:
+            page_student = name_surname if await open_payment_page(page, name_surname) else None
+        finally:
+            if recorder is not None:
+                recorder.stop()
+        if page_student is None:
+            return None, None, False
+
+    checksum, source_hash = await read_ledger_checksum(page)
+    if snapshot is not None and snapshot.checksum == checksum:
+        print(f"Ledger snapshot for {name_surname} still matches the page ({checksum})")
+        snapshots.touch(name_surname)
+        return snapshot.ledger, page_student, True
+
+    ledger = await read_ledger(page)
+    snapshots.save(name_surname, ledger, checksum, source_hash)
+    return ledger, page_student, True
+
+
+async def enter_payment(page, page_student, name_surname, collection_type, amount, http_reader=None):
+    """
+    Enter one ÖDETTİR payment: by posting the recorded form when possible, otherwise through
+    the UI modal (which also teaches the HTTP writer the form post). Returns page_student.
+    """
+    if http_reader is not None:
+        outcome = await http_reader.pay(name_surname, collection_type, amount)
+        if outcome == "ok":
+            return page_student
+        if outcome == "unknown":
+            # Something was written but not what we expected - entering it again could pay twice
+            raise RuntimeError(f"HTTP payment for {name_surname} could not be verified ({collection_type}, {amount})")
+
+    if page_student != name_surname:
+        if not await open_payment_page(page, name_surname):
+            raise RuntimeError(f"{name_surname} bulunamadi")
+        page_student = name_surname
+    recorder = await http_reader.record_payment(page, collection_type, amount) if http_reader is not None else None
+    try:
+        await golden_PaymentPaid(page, collection_type, amount)
+    finally:
+        if recorder is not None:
+            recorder.stop()
+    if http_reader is not None:
+        http_reader.stats["ui_writes"] += 1
+    await pacer.pause("after_payment")
+    return page_student
+
+
+def remember_sender(description, name_surname):
+    """Tie the row's bank sender to the Golden student a BORC VAR payment was entered for."""
+    sender = statement_sender(description)
+    if sender:
+        get_alias_store().put(sender, name_surname)
+
+
+def flag_sender(description, name_surname, amount):
+    """Keep the sender of a not-found row so a WhatsApp correction can alias it."""
+    sender = statement_sender(description)
+    if sender:
+        get_alias_store().flag(description, name_surname, amount, sender)
+
+
+async def process_statement_row(page, i, name_surname, payment_information, ledger_store, snapshots, page_student, save_record=save_payment_record, http_reader=None):
+    """
+    Decide and enter the payment(s) for one statement row.
+    page_student is the student whose ÖDEME page is open (or None).
+    save_record receives the row's payment records (save_payment_record unless run on the tab pool).
+    Returns the student whose ÖDEME page is open afterwards.
+    """
+    print(f"Processing row {i}: {payment_information[0][i]}")
+    print(f"Human name retrieved: {name_surname}")
+
+    if name_surname == "ERROR: 404":
+        update_processing_status(str(payment_information[0][i]), "flagged", "NA", payment_information[1][i])
+        save_record([name_surname, payment_information[1][i], "NA", "FLAG 404: NAME_NOT_FOUND"])
+        flag_sender(payment_information[0][i], name_surname, payment_information[1][i])
+        print("Error: name not found" + str(payment_information[0][i]) + "was not attributed to any name")
+        return page_student
+    else:
+        print("name found: " + name_surname)
+    if name_surname == "PAYMENT_BY_POS":
+        save_record([name_surname, payment_information[1][i], "NA", "FLAG: POS"])
+        print("Payment by pos, skipping")
+        return page_student
+    print(f"Getting payment type for {name_surname} with amount {payment_information[1][i]}")
+    update_processing_status(name_surname, "processing", None, payment_information[1][i])
+
+    # The ledger is read from the page once per run; our own payments are applied to the stored copy
+    ledger = ledger_store.get(name_surname)
+    if ledger is None:
+        ledger, page_student, verified = await load_student_ledger(page, name_surname, snapshots, page_student, http_reader)
+        if ledger is not None:
+            ledger_store.put(name_surname, ledger, verified)
+    else:
+        print(f"Using stored ledger for {name_surname}")
+
+    if ledger is None:
+        # Infer payment type from amount even when name not found
+        payment_type = [[infer_payment_type_from_amount(payment_information[1][i]), "FLAG: 404"]]
+    else:
+        payment_type = decide_payment_types(ledger_store.model(name_surname), payment_information[1][i], payment_information[3][i])
+        if any(info[1] == "BORC VAR" for info in payment_type) and not ledger_store.is_verified(name_surname):
+            # A snapshot may predate payments entered by an interrupted run: never write without re-reading Golden
+            print(f"Re-reading the ledger of {name_surname} before entering a payment")
+            ledger, page_student, _ = await load_student_ledger(page, name_surname, snapshots, page_student, http_reader, trust_fresh=False)
+            if ledger is None:
+                payment_type = [[infer_payment_type_from_amount(payment_information[1][i]), "FLAG: 404"]]
+            else:
+                ledger_store.put(name_surname, ledger)
+                payment_type = decide_payment_types(ledger_store.model(name_surname), payment_information[1][i], payment_information[3][i])
+        # Only entering a payment needs the student's page, decisions come from the stored ledger
+        needs_page = http_reader is None or not http_reader.can_pay(name_surname)
+        if any(info[1] == "BORC VAR" for info in payment_type) and page_student != name_surname and needs_page:
+            page_student = name_surname if await open_payment_page(page, name_surname) else None
+            if page_student is None:
+                payment_type = [[infer_payment_type_from_amount(payment_information[1][i]), "FLAG: 404"]]
+    print(f"Payment type result: {payment_type}")
+
+    # Sort so TAKSİT is always last
+    payment_type.sort(key=lambda x: 1 if x[0] == "TAKSİT" else 0)
+
+    if any(info[1] == "BORC VAR" for info in payment_type):
+        # Until the post-payment snapshot is saved the stored one is stale; a rerun after a
+        # kill or /stop in between must read the page again instead of paying twice
+        snapshots.delete(name_surname)
+
+    total_paid = payment_information[1][i]
+    payment_entered = 0
+    for info in payment_type:
+        print(f"Processing info: {info}")
+        if info[1] == "FLAG: 404":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "FLAG: 404"])
+            flag_sender(payment_information[0][i], name_surname, payment_entered)
+            print("Name not found, skipping")
+        if info[1] == "FLAG: 4000":
+            payment_entered = 4000
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "FLAG: 4000"])
+            print("Payment amount is 4000, skipping")
+
+        if info[1] == "BORC YOK":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "completed", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC YOK"])
+            print(f"No debt found for {info[0]}, skipping")
+
+        if info[1] == "BORC ODENMIS":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "completed", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC ODENMIS"])
+            print(f"Already paid for {info[0]}, skipping")
+
+        if info[1] == "BORC ACILMAMIS YAZILI SINAV":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC ACILMAMIS YAZILI SINAV"])
+            print(f"Debt not opened for YAZILI SINAV, flagging")
+
+        if info[1] == "BORC ACILMAMIS UYGULAMA SINAV":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC ACILMAMIS UYGULAMA SINAV"])
+            print(f"Debt not opened for UYGULAMA SINAV, flagging")
+
+        if info[1] == "BORC ODENMIS YAZILI SINAV":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC ODENMIS YAZILI SINAV"])
+            print(f"Already paid for YAZILI SINAV, flagging")
+
+        if info[1] == "BORC ODENMIS UYGULAMA SINAV":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "BORC ODENMIS UYGULAMA SINAV"])
+            print(f"Already paid for UYGULAMA SINAV, flagging")
+
+        if info[1] == "HIC ACIK BORC YOK: ODEME TUTARI TOTAL BORCLARDAN FAZLA":
+            payment_entered = total_paid
+            update_processing_status(name_surname, "flagged", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "HIC ACIK BORC YOK: ODEME TUTARI TOTAL BORCLARDAN FAZLA"])
+            print(f"Payment exceeds total debt, flagging")
+
+        if info[1] == "BORC VAR":
+
+            if info[0] == "UYGULAMA SINAV HARCI":
+                uygulama_amount = info[2] if len(info) > 2 else 1600
+                print(f"Initiating payment: {name_surname}, {info[0]}, {uygulama_amount}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], uygulama_amount, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], uygulama_amount)
+                print("Payment completed.")
+                payment_entered = uygulama_amount
+                total_paid -= uygulama_amount
+            if info[0] == "YAZILI SINAV HARCI":
+                yazili_amount = info[2] if len(info) > 2 else 1200
+                print(f"Initiating payment: {name_surname}, {info[0]}, {yazili_amount}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], yazili_amount, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], yazili_amount)
+                print("Payment completed.")
+                payment_entered = yazili_amount
+                total_paid -= yazili_amount
+            if info[0] == "BELGE ÜCRETİ":
+                belge_amount = info[2] if len(info) > 2 else 1000
+                print(f"Initiating payment: {name_surname}, {info[0]}, {belge_amount}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], belge_amount, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], belge_amount)
+                print("Payment completed.")
+                total_paid -= belge_amount
+                payment_entered = belge_amount
+            if info[0] == "ÖZEL DERS":
+                ders_amount = info[2] if len(info) > 2 else 4000
+                print(f"Initiating payment: {name_surname}, {info[0]}, {ders_amount}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], ders_amount, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], ders_amount)
+                print("Payment completed.")
+                total_paid -= ders_amount
+                payment_entered = ders_amount
+            if info[0] == "BAŞARISIZ ADAY EĞİTİMİ":
+                basarisiz_amount = info[2] if len(info) > 2 else 4000
+                print(f"Initiating payment: {name_surname}, {info[0]}, {basarisiz_amount}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], basarisiz_amount, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], basarisiz_amount)
+                print("Payment completed.")
+                total_paid -= basarisiz_amount
+                payment_entered = basarisiz_amount
+            if info[0] == "TAKSİT":
+                print(f"Initiating payment: {name_surname}, {info[0]}, {total_paid}")
+                page_student = await enter_payment(page, page_student, name_surname, info[0], total_paid, http_reader)
+                ledger_store.apply_payment(name_surname, info[0], total_paid)
+                print("Payment completed.")
+                payment_entered = total_paid
+                total_paid -= total_paid
+            update_processing_status(name_surname, "almost_completed", info[0], payment_entered)
+            save_record([name_surname, payment_entered, info[0], "ODENDI"])
+            print("round done")
+        #elif info[1] == "BORC YOK":
+        #    golden_PaymentOwed(page, info[0], payment_information[1][i])
+        #    golden_PaymentPaid(page, info[0], payment_information[1][i])
+
+    if any(info[1] == "BORC VAR" for info in payment_type):
+        # Persist what we believe the ledger looks like now; no checksum since the page was not re-read
+        snapshots.save(name_surname, ledger_store.peek(name_surname))
+        # Only a payment entered against the student's open debt confirms who the sender pays for
+        remember_sender(payment_information[0][i], name_surname)
+
+    return page_student
+
+
+async def prepare_statement(filename, sheetname, son_kasa_miktari=None):
+    """
+    Read the statement, pick the rows to process and resolve all names (no browser needed).
+    Returns (payment_information, name_rows, row_names), or None if there is nothing left to do.
+    """
+    payment_information = await RPAexecutioner_readfile(filename, sheetname)
+
+    # Find starting row based on son_kasa_miktari if provided
+    bakiye_column = payment_information[4]  # Bakiye is the 5th element
+
+    start_row = None
+    if son_kasa_miktari:
+        start_row = find_starting_row_from_bakiye(bakiye_column, son_kasa_miktari)
+        if start_row < 0:
+            print("İşlem zaten tamamlanmış - başlangıç satırı 0'ın altında.")
+            return None
+        print(f"Starting from row {start_row}, going backwards to 0 (Bakiye match for {son_kasa_miktari})")
+    else:
+        # No son_kasa_miktari provided, use original behavior (forward from 0)
+        print(f"No Bakiye filter, processing from row 0 to {len(payment_information[0])-1}")
+
+    # Decide every row and resolve every name before the browser starts so the LLM latency is off the critical path
+    plan = plan_statement_rows(payment_information, start_row)
+    print(f"Row plan: {plan.summary()}")
+    pos = set(plan.pos_rows)
+    transfer_rows = [i for i in plan.rows if i not in pos]
+    resolved_names = await get_human_names_batch([str(payment_information[0][i]) for i in transfer_rows])
+    row_names = {i: resolved_names[str(payment_information[0][i])] for i in transfer_rows}
+    # POS rows need no name, they are only recorded as FLAG: POS
+    row_names.update((i, "PAYMENT_BY_POS") for i in pos)
+    name_rows = plan.rows
+    return payment_information, name_rows, row_names
+
+
+def recorded_payments():
+    """The payments CSV as a DataFrame, for compatibility with flask_endpoint."""
+    if os.path.exists("payments_recorded_by_bot.csv"):
+        return pd.read_csv("payments_recorded_by_bot.csv")
+    return pd.DataFrame(columns=["name", "payment_amount", "payment_type", "status"])
+
+
+async def close_notification_popup(page):
+    print("Attempting to close notification popup...")
+    try:
+        await page.click("button.close", timeout=5000)
+    except:
+        print("Could not find button.close, trying text=X")
         try:
-            await page.click("button.close", timeout=5000)
+            await page.get_by_text("X", exact=True).click(timeout=2000)
         except:
-            print("Could not find button.close, trying text=X")
+            print("Could not click X either")
+    await pacer.pause("popup")
+
+
+async def load_student_directory(page, http_reader=None):
+    """
+    Scrape the kursiyer list once (over HTTP if the search request is known, otherwise in the
+    browser) and index it. Returns None if the result does not look like the student list.
+    Only a list read in full (HTTP, or every DataTables row) is marked complete.
+    """
+    links = await http_reader.search_links(DIRECTORY_QUERY) if http_reader is not None else None
+    complete = bool(links)
+    if not links:
+        await search_student(page, DIRECTORY_QUERY)
+        links = await page.evaluate(DATATABLES_LINKS_JS)
+        complete = links is not None
+        if links is None:
+            links = await page.locator("a").evaluate_all("as => as.map(a => [a.href, a.innerText.trim()])")
+    students = student_directory.student_links(links)
+    if len(students) < student_directory.MIN_ENTRIES:
+        print(f"Kursiyer list not available ({len(students)} students found) - searching per student")
+        return None
+    print(f"Indexed {len(students)} students from the kursiyer list" + ("" if complete else " (one page only, given-name matches off)"))
+    return student_directory.StudentDirectory(students, complete)
+
+
+def resolve_row_names(row_names, directory):
+    """Replace statement names with the exact Golden name wherever the directory has a clear match."""
+    resolved = {}
+    for i, name in row_names.items():
+        match = directory.resolve(name) if name not in ("ERROR: 404", "PAYMENT_BY_POS") else None
+        if match is not None and match[0] != name:
+            print(f"Resolved '{name}' to Golden record '{match[0]}'")
+        resolved[i] = match[0] if match is not None else name
+    return resolved
+
+
+async def process_student_rows(page, name_surname, student_rows, payment_information, ledger_store, snapshots, page_student, writer, site_pacer=None, http_reader=None):
+    """Process one student's rows on one tab. Returns the student whose ÖDEME page is open afterwards."""
+    for i in student_rows:
+        save_record = writer.recorder(i)
+        # Wrap all processing in try-catch so one failure doesn't crash everything
+        try:
+            async with (site_pacer or contextlib.nullcontext()):
+                page_student = await process_statement_row(page, i, name_surname, payment_information, ledger_store, snapshots, page_student, save_record, http_reader)
+
+        except Exception as e:
+            # Log the error, update status to failed, save record, and continue to next person
+            error_msg = str(e)
+            print(f"ERROR processing row {i}: {error_msg}")
             try:
-                await page.get_by_text("X", exact=True).click(timeout=2000)
+                update_processing_status(name_surname, "flagged", None, payment_information[1][i])
+                save_record([name_surname, payment_information[1][i], "NA", "FLAG 404: İSİM BULUNAMADI"])
+                flag_sender(payment_information[0][i], name_surname, payment_information[1][i])
             except:
-                print("Could not click X either")
-        await asyncio.sleep(random.uniform(1.1,2.2))
-
-
-        payment_information = await RPAexecutioner_readfile(filename, sheetname)
-
-        # Find starting row based on son_kasa_miktari if provided
-        bakiye_column = payment_information[4]  # Bakiye is the 5th element
-
-        prev_human_name = ""
-        search_new_person = True
-        current_cache = None
-
-        if son_kasa_miktari:
-            matched_row = find_starting_row_from_bakiye(bakiye_column, son_kasa_miktari)
-            start_row = matched_row
-            if start_row < 0:
-                print("İşlem zaten tamamlanmış - başlangıç satırı 0'ın altında.")
-                await browser.close()
-                if os.path.exists("payments_recorded_by_bot.csv"):
-                    return pd.read_csv("payments_recorded_by_bot.csv")
-                return pd.DataFrame(columns=["name", "payment_amount", "payment_type", "status"])
-            print(f"Starting from row {start_row}, going backwards to 0 (Bakiye match at row {matched_row} for {son_kasa_miktari})")
-            row_iterator = range(start_row, -1, -1)  # Go backwards from start_row to 0
-        else:
-            # No son_kasa_miktari provided, use original behavior (forward from 0)
-            print(f"No Bakiye filter, processing from row 0 to {len(payment_information[0])-1}")
-            row_iterator = range(len(payment_information[0]))  # Go forward from 0 to end
-
-        for i in row_iterator:
-
-            if "-" in str(payment_information[1][i]):
-                print(str(payment_information[1][i]) +" Cost, not a received payment")
-                continue
-            if str(payment_information[2][i]) != "Para Transferi":
-                print("Not a payment transfer" + str(payment_information[0][i]))
-                continue
-
-            # Wrap all processing in try-catch so one failure doesn't crash everything
-            try:
-                print(f"Processing row {i}: {payment_information[0][i]}")
-                name_surname = await get_human_name(str(payment_information[0][i]))
-                print(f"Human name retrieved: {name_surname}")
-
-                if name_surname == prev_human_name:
-                    search_new_person = False
-                else:
-                    search_new_person = True
-
-                if name_surname == "ERROR: 404":
-                    update_processing_status(str(payment_information[0][i]), "flagged", "NA", payment_information[1][i])
-                    save_payment_record([name_surname, payment_information[1][i], "NA", "FLAG 404: NAME_NOT_FOUND"])
-                    print("Error: name not found" + str(payment_information[0][i]) + "was not attributed to any name")
-                    continue
-                else:
-                    print("name found: " + name_surname)
-                if name_surname == "PAYMENT_BY_POS":
-                    save_payment_record([name_surname, payment_information[1][i], "NA", "FLAG: POS"])
-                    print("Payment by pos, skipping")
-                    continue
-                print(f"Getting payment type for {name_surname} with amount {payment_information[1][i]}")
-                update_processing_status(name_surname, "processing", None, payment_information[1][i])
-
-                payment_type, current_cache = await get_payment_type(page, name_surname,payment_information[1][i], payment_information[3][i], search_new_person, cached_data=current_cache)
-                print(f"Payment type result: {payment_type}")
-
-                # Sort so TAKSİT is always last
-                payment_type.sort(key=lambda x: 1 if x[0] == "TAKSİT" else 0)
-
-                total_paid = payment_information[1][i]
-                payment_entered = 0
-                for info in payment_type:
-                    print(f"Processing info: {info}")
-                    if info[1] == "FLAG: 404":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "FLAG: 404"])
-                        print("Name not found, skipping")
-                    if info[1] == "FLAG: 4000":
-                        payment_entered = 4000
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "FLAG: 4000"])
-                        print("Payment amount is 4000, skipping")
-
-                    if info[1] == "BORC YOK":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "completed", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC YOK"])
-                        print(f"No debt found for {info[0]}, skipping")
-
-                    if info[1] == "BORC ODENMIS":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "completed", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC ODENMIS"])
-                        print(f"Already paid for {info[0]}, skipping")
-
-                    if info[1] == "BORC ACILMAMIS YAZILI SINAV":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC ACILMAMIS YAZILI SINAV"])
-                        print(f"Debt not opened for YAZILI SINAV, flagging")
-
-                    if info[1] == "BORC ACILMAMIS UYGULAMA SINAV":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC ACILMAMIS UYGULAMA SINAV"])
-                        print(f"Debt not opened for UYGULAMA SINAV, flagging")
-
-                    if info[1] == "BORC ODENMIS YAZILI SINAV":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC ODENMIS YAZILI SINAV"])
-                        print(f"Already paid for YAZILI SINAV, flagging")
-
-                    if info[1] == "BORC ODENMIS UYGULAMA SINAV":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "BORC ODENMIS UYGULAMA SINAV"])
-                        print(f"Already paid for UYGULAMA SINAV, flagging")
-
-                    if info[1] == "HIC ACIK BORC YOK: ODEME TUTARI TOTAL BORCLARDAN FAZLA":
-                        payment_entered = total_paid
-                        update_processing_status(name_surname, "flagged", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "HIC ACIK BORC YOK: ODEME TUTARI TOTAL BORCLARDAN FAZLA"])
-                        print(f"Payment exceeds total debt, flagging")
-
-                    if info[1] == "BORC VAR":
-
-                        if info[0] == "UYGULAMA SINAV HARCI":
-                            uygulama_amount = info[2] if len(info) > 2 else 1600
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {uygulama_amount}")
-                            await golden_PaymentPaid(page, info[0], uygulama_amount)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            payment_entered = uygulama_amount
-                            total_paid -= uygulama_amount
-                        if info[0] == "YAZILI SINAV HARCI":
-                            yazili_amount = info[2] if len(info) > 2 else 1200
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {yazili_amount}")
-                            await golden_PaymentPaid(page, info[0], yazili_amount)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            payment_entered = yazili_amount
-                            total_paid -= yazili_amount
-                        if info[0] == "BELGE ÜCRETİ":
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {1000}")
-                            await golden_PaymentPaid(page, info[0], 1000)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            total_paid -= 1000
-                            payment_entered = 1000
-                        if info[0] == "ÖZEL DERS":
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {4000}")
-                            await golden_PaymentPaid(page, info[0], 4000)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            total_paid -= 4000
-                            payment_entered = 1000
-                        if info[0] == "BAŞARISIZ ADAY EĞİTİMİ":
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {4000}")
-                            await golden_PaymentPaid(page, info[0], 4000)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            total_paid -= 4000
-                            payment_entered = 4000
-                        if info[0] == "TAKSİT":
-                            print(f"Initiating payment: {name_surname}, {info[0]}, {total_paid}")
-                            await golden_PaymentPaid(page, info[0], total_paid)
-                            print("Payment completed.")
-                            await asyncio.sleep(random.uniform(2.1, 3.1))
-                            payment_entered = total_paid
-                            total_paid -= total_paid
-                        update_processing_status(name_surname, "almost_completed", info[0], payment_entered)
-                        save_payment_record([name_surname, payment_entered, info[0], "ODENDI"])
-                        print("round done")
-                    #elif info[1] == "BORC YOK":
-                    #    golden_PaymentOwed(page, info[0], payment_information[1][i])
-                    #    golden_PaymentPaid(page, info[0], payment_information[1][i])
-
-                prev_human_name = name_surname
-
-            except Exception as e:
-                # Log the error, update status to failed, save record, and continue to next person
-                error_msg = str(e)
-                print(f"ERROR processing row {i}: {error_msg}")
-                try:
-                    # Try to get name for error record (may fail if error was in get_human_name)
-                    error_name = name_surname if 'name_surname' in dir() else str(payment_information[0][i])
-                    update_processing_status(error_name, "flagged", None, payment_information[1][i])
-                    save_payment_record([error_name, payment_information[1][i], "NA", "FLAG 404: İSİM BULUNAMADI"])
-                except:
-                    save_payment_record(["UNKNOWN", payment_information[1][i], "NA", "FLAG 404: İSİM BULUNAMADI"])
-                # Reset search state and continue to next person
-                search_new_person = True
-                current_cache = None
-                continue
-
-        # Excel fully traversed - update status to completed
-        update_processing_status("TAMAMLANDI", "completed", None, None)
-        print("All rows processed - Excel traversal complete")
+                save_record(["UNKNOWN", payment_information[1][i], "NA", "FLAG 404: İSİM BULUNAMADI"])
+            # We no longer know which page is open, and a failed write may have left the ledger stale
+            page_student = None
+            ledger_store.invalidate(name_surname)
+            snapshots.delete(name_surname)
+    return page_student
+
+
+async def process_statement(page, payment_information, name_rows, row_names, tabs=None):
+    """
+    Enter the payments of a prepared statement on a logged-in page.
+    With tabs > 1 students are spread over that many tabs of the same context;
+    the payments CSV is still written in statement order.
+    """
+    tabs = tabs or tab_pool.TAB_COUNT
+    parse_stats = ledger_parser.start_parse_stats()
+    http_reader = golden_http.HttpLedgerReader(page)
+    directory = await load_student_directory(page, http_reader) if USE_STUDENT_DIRECTORY else None
+    student_directory.set_active_directory(directory)
+    if directory is not None:
+        row_names = resolve_row_names(row_names, directory)
+    # Rows of the same student are processed together (on one tab) so each ledger is read once
+    groups = plan_student_groups(name_rows, row_names)
+    ledger_store = LedgerStore()
+    snapshots = LedgerSnapshotDB()
+    writer = tab_pool.OrderedRecordWriter(name_rows, save_payment_record, reorder_payment_records)
+    site_pacer = tab_pool.SitePacer() if tabs > 1 else None
+    tab_students = {}
+
+    async def run_group(tab, name_surname, student_rows):
+        tab_students[tab] = await process_student_rows(tab, name_surname, student_rows, payment_information, ledger_store, snapshots, tab_students.get(tab), writer, site_pacer, http_reader)
+
+    started = time.time()
+    try:
+        await tab_pool.run_on_tabs(page, groups, run_group, tabs)
+    finally:
+        writer.close()
+        snapshots.close()
+    print(f"Processed {len(name_rows)} rows for {len(groups)} students on {tabs} tab(s) in {time.time() - started:.0f}s")
+
+    # Excel fully traversed - update status to completed
+    update_processing_status("TAMAMLANDI", "completed", None, None)
+    print("All rows processed - Excel traversal complete")
+    print(f"Ledger store stats: {ledger_store.stats()}")
+    if directory is not None:
+        print(f"Student directory: {directory.stats}")
+    print(f"Ledger reads over HTTP: {http_reader.stats['http']}, fell back to the browser: {http_reader.stats['fallback']}")
+    print(f"Payments posted over HTTP: {http_reader.stats['http_writes']}, entered through the UI: {http_reader.stats['ui_writes']}")
+    print(f"Ledger rows parsed locally: {parse_stats['local']}, sent to LLM: {parse_stats['llm']}")
+    # Deliberate delay and waiting are summed over all tabs
+    print(f"Pacing report: {pacer.report()}")
+    print(f"Resource filter report: {resource_filter.report()}")
+
+
+async def run_statement_job(page, filename, sheetname, son_kasa_miktari=None, tabs=None, pacing_profile=None):
+    """Full statement run on an already logged-in page (used by the browser daemon)."""
+    # The worker outlives the run, so a profile chosen for one run must not stick to the next
+    pacer.set_profile(pacing_profile or DEFAULT_PROFILE)
+    pacer.reset()
+    resource_filter.reset()
+    prepared = await prepare_statement(filename, sheetname, son_kasa_miktari)
+    if prepared is not None:
+        await process_statement(page, *prepared, tabs=tabs)
+    return recorded_payments()
+
+
+async def RPAexecutioner_GoldenProcessStart(filename=None, sheetname=None, son_kasa_miktari=None, tabs=None, headless=None):
+    pacer.reset()
+    resource_filter.reset()
+    prepared = await prepare_statement(filename, sheetname, son_kasa_miktari)
+    if prepared is None:
+        return recorded_payments()
+
+    async with Stealth().use_async(async_playwright()) as playwright:
+        chromium = playwright.chromium
+        
+        print("Launching browser...")
+        browser = await chromium.launch(headless=use_headless(headless))
+        
+        context, page = await open_golden_session(browser, ignore_https_errors=True)
+
+        # Close the notification popup
+        await close_notification_popup(page)
+
+        await process_statement(page, *prepared, tabs=tabs)
 
         is_bot = await page.evaluate("navigator.webdriver")
         print(f"Am I a bot? {is_bot}")
 
+        # Cookies may have been refreshed during the run
+        await save_golden_session(context)
         await browser.close()
 
-        # Return the CSV as DataFrame for compatibility with flask_endpoint
-        if os.path.exists("payments_recorded_by_bot.csv"):
-            return pd.read_csv("payments_recorded_by_bot.csv")
-        return pd.DataFrame(columns=["name", "payment_amount", "payment_type", "status"])
+        return recorded_payments()
+
+
+async def run_correction_job(page, name_surname, payment_type, payment_amount, is_owed=False):
+    """Enter one payment (WhatsApp correction) on an already logged-in page."""
+    if not await open_payment_page(page, name_surname):
+        raise RuntimeError(f"{name_surname} bulunamadi")
+
+    if not is_owed:
+        await golden_PaymentOwed(page, payment_type, payment_amount)
+        await golden_PaymentPaid(page, payment_type, payment_amount)
+    else:
+        await golden_PaymentPaid(page, payment_type, payment_amount)
+
+
+async def run_lookup_job(page, name_surname):
+    """Dry run: find the student and return their ledger without entering anything."""
+    if not await open_payment_page(page, name_surname):
+        return None
+    payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed = await read_ledger(page)
+    return {
+        "payment_owed": payment_owed,
+        "payments_paid": payments_paid,
+        "payments_taksit_paid": payments_taksit_paid,
+        "payments_taksit_owed": payments_taksit_owed,
+    }
 
         
-async def RPAexecutioner_GoldenUniqueProcess(name_surname=None, payment_type=None, payment_amount=None, is_owed=False):
+async def RPAexecutioner_GoldenUniqueProcess(name_surname=None, payment_type=None, payment_amount=None, is_owed=False, headless=None):
     if name_surname == None or payment_type == None or payment_amount == None:
         return "Name, payment_type, or payment_amount is missing"
     async with Stealth().use_async(async_playwright()) as playwright:
@@ -388,68 +851,14 @@ async def RPAexecutioner_GoldenUniqueProcess(name_surname=None, payment_type=Non
         chromium = playwright.chromium
         
         print("Launching browser...")
-        browser = await chromium.launch(headless=False)
-        
-        context = await browser.new_context()
-        
-        page = await context.new_page()
-        print("Page created. Navigating to login page...")
-        
-        response = await page.goto("https://kurs.goldennet.com.tr/giris.php")
+        browser = await chromium.launch(headless=use_headless(headless))
         
-        print("Typing login credentials...")
-        creds = get_credentials()
-        await human_type(page, "#kurumkodu", creds["institution_code"])
-        await asyncio.sleep(random.uniform(0.7, 1.9))
-
-        await human_type(page, "#kullaniciadi", creds["login"])
-        await asyncio.sleep(random.uniform(1.1, 3.2))
-
-        await human_type(page, "#kullanicisifresi", creds["password"])
-        await asyncio.sleep(random.uniform(0.9, 3.1))
-
-        await human_button_click(page, "#btngiris")
-
-        await asyncio.sleep(random.uniform(1.5, 4.1))
-
-        # Notification popup code - commented out (no longer needed)
-        # print("Attempting to close notification popup...")
-        # try:
-        #     await page.click("button.close", timeout=5000)
-        # except:
-        #     print("Could not find button.close, trying text=X")
-        #     try:
-        #         await page.get_by_text("X", exact=True).click(timeout=2000)
-        #     except:
-        #         print("Could not click X either")
-        #await asyncio.sleep(random.uniform(1.1,2.2))
-
-        print("Clicking KURSİYER ARA...")
-        await human_button_click(page, "a.btn.bg-orange", has_text="KURSİYER ARA")
-        
-        await asyncio.sleep(random.uniform(1.7, 3.7))
-        
-        await human_type(page, "#txtaraadi", name_surname)
-
-        await asyncio.sleep(random.uniform(0.8, 1.8))
-
-        await page.keyboard.press("Enter")
+        context, page = await open_golden_session(browser)
 
-        await asyncio.sleep(random.uniform(1.7, 3.7))
+        await run_correction_job(page, name_surname, payment_type, payment_amount, is_owed)
 
-        await human_button_click(page, "a", has_text=name_surname)
+        await save_golden_session(context)
 
-        await asyncio.sleep(random.uniform(1.7, 3.7))
-
-        await human_button_click(page, "a:visible", has_text="ÖDEME")
-        print("in the ODEME page")
-
-        if not is_owed:
-            await golden_PaymentOwed(page, payment_type, payment_amount)
-            await golden_PaymentPaid(page, payment_type, payment_amount)
-        else:
-            await golden_PaymentPaid(page, payment_type, payment_amount)
-        
 #asyncio.run(RPAexecutioner_PaymentOwed("Onur Çelik YZ Test", "TAKSİT", 6000))
 
 
@@ -1,12 +1,17 @@
 import asyncio
-import random
 import time
 import os
 import sys
 import csv
 import json
+import threading
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from twilio.rest import Client
 import pandas as pd
+import numpy as np
+import cv2
 import easyocr
 
 import re
@@ -19,6 +24,17 @@ import requests
 import json
 from icu import Locale,UnicodeString
 import app_paths
+import ocr_service
+from name_cache import get_name_cache
+from sender_aliases import get_alias_store
+from turkish_names import guess_name, fold, CONFIDENCE_THRESHOLD
+import ledger_parser
+from ledger_parser import DATE_PATTERN, AMOUNT_PATTERN, regex_date_and_amount
+from ledger_model import Ledger, PaymentType
+from payment_allocator import allocate, describe
+from pacing import pacer
+import page_sync
+import student_directory
 
 
 SYSTEM_PROMPT = """You are an expert entity extraction system specialized in identifying Turkish human names in payment descriptions.
@@ -78,116 +94,40 @@ def save_payment_record(row):
     clear_processing_status()
     return
 
-def get_owed_taksit(taksit_owed):
-    for row in taksit_owed:
-        if "TAKSİT" in row and "ÖDEDİ" not in row:
-            # row is a string like '[TAKSİT, 10.10.2025, 9.500,00, 00, ÖDEMEDİ]'
-            try:
-                # Remove brackets and split by comma
-                cleaned_row = row.strip("[]")
-                parts = [p.strip() for p in cleaned_row.split(',')]
-
-                # The amount is usually at index 2: [Type, Date, Amount, ...]
-                if len(parts) >= 3:
-                    amount_str = parts[2]
-                    # Convert "9.500,00" to float 9500.00
-                    # Remove dots (thousands separator) and replace comma with dot (decimal)
-                    amount_float = float(amount_str.replace('.', '').replace(',', '.'))
-                    return amount_float
-            except Exception as e:
-                print(f"Error parsing taksit row: {row} - {e}")
-                continue
-    return None
+def reorder_payment_records(records):
+    """
+    Replace the run's rows at the end of the payments CSV with records, the same rows in
+    statement order. Rows written before the run are kept; if the tail is not the run's
+    rows the file is left as it is.
+    """
+    csv_path = app_paths.payments_csv_path()
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, newline="") as f:
+        rows = list(csv.reader(f))
+    header, body = rows[:1], rows[1:]
+    expected = [[str(value) for value in record] for record in records]
+    kept = len(body) - len(records)
+    if kept < 0 or sorted(body[kept:]) != sorted(expected):
+        print("Payments CSV does not end with this run's records, leaving it in completion order")
+        return
+    temp_path = csv_path + ".tmp"
+    with open(temp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(header + body[:kept])
+        writer.writerows(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, csv_path)
 
-def get_total_owed_taksit(taksit_owed):
-    """Sum all owed taksit amounts."""
-    total = 0
-    for row in taksit_owed:
-        if "TAKSİT" in row and "ÖDEDİ" not in row:
-            try:
-                cleaned_row = row.strip("[]")
-                parts = [p.strip() for p in cleaned_row.split(',')]
-                if len(parts) >= 3:
-                    amount_str = parts[2]
-                    amount_float = float(amount_str.replace('.', '').replace(',', '.'))
-                    total += amount_float
-            except Exception as e:
-                print(f"Error parsing taksit row for sum: {row} - {e}")
-                continue
-    return int(total)
 tr = Locale("tr")
+@functools.lru_cache(maxsize=2048)
 def turkish_pattern_check(text):
     texter = str(UnicodeString(text).toUpper(Locale("tr")))
     escaped_text = re.escape(texter)
     pattern = re.sub(r'[iİıI]', '[iİıI]', escaped_text)
     return re.compile(pattern, re.IGNORECASE)
 
-def check_date_if_paid(date_of_payment, payments_paid):
-    if len(payments_paid) == 0:
-        return False
-    try:
-        # Handle Excel date formats (DD.MM.YYYY or YYYY-MM-DD HH:MM:SS)
-        try:
-            excel_date = datetime.strptime(str(date_of_payment), '%d.%m.%Y')
-        except ValueError:
-            try:
-                # Try parsing as standard pandas timestamp string
-                excel_date = datetime.strptime(str(date_of_payment), '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                # Try just YYYY-MM-DD
-                excel_date = datetime.strptime(str(date_of_payment).split(' ')[0], '%Y-%m-%d')
-
-        for row in payments_paid:
-            # row is a string like '[Type, Date, Amount, Status]'
-            try:
-                if isinstance(row, str):
-                    cleaned_row = row.strip("[]")
-                    parts = [p.strip() for p in cleaned_row.split(',')]
-                    if len(parts) >= 2:
-                        golden_date_str = parts[1]
-                    else:
-                        continue
-                else:
-                    # Fallback if it is actually a list
-                    golden_date_str = row[1]
-
-                golden_date = datetime.strptime(golden_date_str, '%d.%m.%Y')
-                
-                # if golden date is newer or equal to the date in excel it is paid
-                if golden_date >= excel_date:
-                    return True
-            except Exception as e:
-                # print(f"Error checking date for row {row}: {e}")
-                continue
-    except Exception as e:
-        print(f"Error parsing excel date {date_of_payment}: {e}")
-        return False
-        
-    return False
-    
-def check_owed(keyword, payment_owed):
-    return any(keyword in row for row in payment_owed)
-
-def check_owed_with_amount(keyword, payment_owed, expected_amount):
-    """Check if keyword exists in payment_owed AND the TUTAR matches expected_amount.
-    If keyword is None, just checks if expected_amount exists in any row."""
-    
-    for row in payment_owed:
-        # If keyword provided, require it to be in the row
-        if keyword is not None and keyword not in row:
-            continue
-        # Extract amount from row - Turkish format like "1.600,00" at the end
-        amounts = re.findall(r'[\d.]+,\d{2}', row)
-        if amounts:
-            tutar_str = amounts[-1]
-            tutar = int(float(tutar_str.replace('.', '').replace(',', '.')))
-            if tutar == expected_amount:
-                return True
-    return False
-
-def check_paid(keyword, payments_paid):
-    return any(keyword in row for row in payments_paid)
-
 def infer_payment_type_from_amount(payment_amount):
     """Infer payment type from amount alone (used when name search fails)."""
     if payment_amount == 1200 or payment_amount == 900:
@@ -241,7 +181,7 @@ async def human_button_click(page, selector=None, has_text=None ,exact_text=None
         # Use shorter timeout for hover/click to fail fast
         await element.hover(timeout=timeout)
 
-        await asyncio.sleep(random.uniform(0.3, 0.7))
+        await pacer.pause("hover")
 
         await element.click(timeout=timeout)
         return True
@@ -253,7 +193,7 @@ async def human_type(page, selector, text):
     element = page.locator(selector).first
 
     await element.hover()
-    await asyncio.sleep(random.uniform(0.2,0.5))
+    await pacer.pause("focus")
 
     await element.click()
 
@@ -261,11 +201,76 @@ async def human_type(page, selector, text):
     # Use Cmd+A on macOS, Ctrl+A on Linux/Windows
     select_all_key = "Meta+a" if sys.platform == "darwin" else "Control+a"
     await page.keyboard.press(select_all_key)
-    await asyncio.sleep(random.uniform(0.1, 0.2))
+    await pacer.pause("key")
 
-    await element.type(text, delay=random.randint(50,150))
+    await element.type(text, delay=pacer.key_delay_ms())
 
-async def get_human_name(description):
+def ask_llm_for_names(info, sender):
+    """Ask the LLM for the human names in a description.
+    Returns the list of names, or None if the request failed."""
+    cache = get_name_cache()
+    cached_names = cache.get(info, sender)
+    if cached_names is not None:
+        return cached_names
+    try:
+        response = requests.post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": "Bearer " + os.getenv("OPENROUTER_API_KEY"),
+            },
+            data=json.dumps({
+            "model": "google/gemini-3-flash-preview", 
+                "messages": [
+                    {'role': 'system', 'content': SYSTEM_PROMPT},
+                    {'role': 'user', 'content': f"Description: {info} | Sender: {sender}"}
+                ]
+            })
+        )
+        if response.status_code == 200:
+            content = response.json()['choices'][0]['message']['content']
+            # Clean code blocks if present
+            content = content.replace('```json', '').replace('```', '').strip()
+            names = json.loads(content)
+            cache.put(info, sender, names)
+            return names
+    except Exception as e:
+        print(f"LLM Error: {e}")
+    return None
+
+def find_names(info, sender):
+    """Names in the description: a confident local guess first, the LLM otherwise."""
+    names, confidence = guess_name(info, sender)
+    if confidence >= CONFIDENCE_THRESHOLD:
+        return names
+    return ask_llm_for_names(info, sender)
+
+def statement_sender(description):
+    """Sender name of a FAST / CEP ŞUBE transfer description, or None for other formats."""
+    description = str(description)
+    parts = description.split("-")
+    if re.findall("^FAST", description) and len(parts) > 1:
+        return parts[1]
+    if re.findall("^CEP ŞUBE", description) and len(parts) > 1:
+        return parts[-1]
+    return None
+
+def alias_for(sender, info):
+    """
+    The Golden student a known sender pays for, unless the description clearly names
+    someone else (a second child of the same parent).
+    """
+    student = get_alias_store().get(sender)
+    if student is None or not info.strip():
+        return student
+    names, confidence = guess_name(info, sender)
+    if confidence >= CONFIDENCE_THRESHOLD and names:
+        student_tokens = set(fold(student).split())
+        if not set(fold(names[0]).split()) <= student_tokens:
+            return None
+    return student
+
+def extract_human_name(description):
+    """Blocking name extraction for one bank statement description."""
 
     if re.findall("^PK", description):
         return "PAYMENT_BY_POS"
@@ -276,39 +281,18 @@ async def get_human_name(description):
         #aciklama - everything after the second "-"
         info = "-".join(parts[2:]) if len(parts) > 2 else ""
         #print("FAST",name,info)
+        # A sender we already tied to a student needs no LLM call or name search
+        student = alias_for(name, info)
+        if student:
+            return student
         if len(info) == 0:
             return name
-        else:
-            try:
-                response = requests.post(
-                    url="https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": "Bearer " + os.getenv("OPENROUTER_API_KEY"),
-                    },
-                    data=json.dumps({
-                    "model": "google/gemini-3-flash-preview", 
-                        "messages": [
-                            {'role': 'system', 'content': SYSTEM_PROMPT},
-                            {'role': 'user', 'content': f"Description: {info} | Sender: {name}"}
-                        ]
-                    })
-                )
-                
-                if response.status_code == 200:
-                    content = response.json()['choices'][0]['message']['content']
-                    # Clean code blocks if present
-                    content = content.replace('```json', '').replace('```', '').strip()
-                    names = json.loads(content)
-                    if names:
-                        # Return the first name found
-                        return names[0] 
-                    else:
-                        # LLM found no names in description, so return the Sender Name
-                        return name
-            except Exception as e:
-                print(f"LLM Error: {e}")
-                
-            return name
+        names = find_names(info, name)
+        if names:
+            # Return the first name found
+            return names[0]
+        # LLM found no names in description (or failed), so return the Sender Name
+        return name
 
     elif re.findall("^CEP ŞUBE", description):
         parts = description.split("-")
@@ -317,82 +301,67 @@ async def get_human_name(description):
         #aciklama - everything between first "-" and last "-"
         info = "-".join(parts[1:-1]) if len(parts) > 2 else ""
         #print("CEP",name,info.strip()+"info")
+        student = alias_for(name, info)
+        if student:
+            return student
         if len(info.strip()) == 0:
             return name
-        else:
-            try:
-                response = requests.post(
-                    url="https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": "Bearer " + os.getenv("OPENROUTER_API_KEY"),
-                    },
-                    data=json.dumps({
-                    "model": "google/gemini-3-flash-preview", 
-                        "messages": [
-                            {'role': 'system', 'content': SYSTEM_PROMPT},
-                            {'role': 'user', 'content': f"Description: {info} | Sender: {name}"}
-                        ]
-                    })
-                )
-                if response.status_code == 200:
-                    content = response.json()['choices'][0]['message']['content']
-                    content = content.replace('```json', '').replace('```', '').strip()
-                    names = json.loads(content)
-                    if names:
-                        return names[0]
-                    else:
-                        return name
-            except Exception as e:
-                print(f"LLM Error: {e}")
-
-            return name
+        names = find_names(info, name)
+        if names:
+            return names[0]
+        return name
     
     # Fallback for any other format (e.g. EF5600706 MEHMET İDRİS AKTAŞ...)
     else:
-        try:
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": "Bearer " + os.getenv("OPENROUTER_API_KEY"),
-                },
-                data=json.dumps({
-                "model": "google/gemini-3-flash-preview", 
-                    "messages": [
-                        {'role': 'system', 'content': SYSTEM_PROMPT},
-                        {'role': 'user', 'content': f"Description: {description} | Sender: UNKNOWN"}
-                    ]
-                })
-            )
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                content = content.replace('```json', '').replace('```', '').strip()
-                names = json.loads(content)
-                if names:
-                    return names[0]
-        except Exception as e:
-            print(f"LLM Error in fallback: {e}")
+        names = find_names(description, "UNKNOWN")
+        if names:
+            return names[0]
 
     return "Error 401: No name found"   
 
+async def get_human_name(description):
+    # The LLM call is a blocking HTTP request, keep it off the event loop
+    return await asyncio.to_thread(extract_human_name, description)
 
-async def clean_payment_row(row_text):
-    # Regex to find amounts (e.g. 1.000,00 or 500,00)
-    # This is more reliable than LLM for numbers
-    amounts = re.findall(r'\b\d{1,3}(?:\.\d{3})*,\d{2}\b', row_text)
-    regex_amount = amounts[-1] if amounts else None
-
-    # Regex to find dates (DD.MM.YYYY)
-    dates = re.findall(r'\d{2}\.\d{2}\.\d{4}', row_text)
-    regex_date = None
-    if dates:
-        # Logic: If Paid (ÖDEDİ) and 2 dates, use 2nd. Else 1st.
-        if "ÖDEDİ" in row_text and len(dates) >= 2:
-            regex_date = dates[1]
-        else:
-            regex_date = dates[0]
+async def get_human_names_batch(descriptions, max_concurrency=8):
+    """
+    Resolve the names for a whole statement at once.
+    Descriptions are deduplicated and resolved concurrently (at most
+    max_concurrency LLM requests in flight). Returns {description: name}.
+    """
+    unique_descriptions = list(dict.fromkeys(str(d) for d in descriptions))
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def resolve(description):
+        async with semaphore:
+            try:
+                return await get_human_name(description)
+            except Exception as e:
+                print(f"Name extraction failed for {description}: {e}")
+                return "Error 401: No name found"
+
+    print(f"Resolving names for {len(unique_descriptions)} unique descriptions ({len(descriptions)} rows)...")
+    names = await asyncio.gather(*(resolve(d) for d in unique_descriptions))
+    print(f"Name cache stats: {get_name_cache().stats()}")
+    print(f"Sender alias stats: {get_alias_store().stats()}")
+    return dict(zip(unique_descriptions, names))
 
+
+# Shared rules for the OCR row cleaner (single-row and batched prompts)
+CLEAN_ROW_RULES = 'You are a data cleaner. Extract the Payment Type, Date, Amount, and Status from this messy OCR text. \n\nRules:\n1. Output strictly a list of 4 items: [Type, Date, Amount, Status].\n2. Status must be "ÖDEDİ" or "ÖDEMEDİ".\n3. Payment Type MUST be one of these EXACT strings (fix any OCR errors to match these):\n   - "YAZILI SINAV HARCI"\n   - "UYGULAMA SINAV HARCI"\n   - "BAŞARISIZ ADAY EĞİTİMİ"\n   - "ÖZEL DERS"\n   - "BELGE ÜCRETİ"\n   - "TAKSİT"\n4. If the text contains "YZL" AND "SNV", map it to "YAZILI SINAV HARCI".\n5. If the text contains "UYG" AND "SNV", map it to "UYGULAMA SINAV HARCI".\n6. If the text contains "BASARISIZ", "ADAY", "EGITIMI", map it to "BAŞARISIZ ADAY EĞİTİMİ".\n7. If the text contains "OZEL", "DERS", map it to "ÖZEL DERS".\n8. If the text contains "BELGE", "UCRETI", map it to "BELGE ÜCRETİ".\n9. If the text contains "TAKSİT", "TAKSIT", "TKST", map it to "TAKSİT". DO NOT CHANGE "TAKSİT" TO "BELGE ÜCRETİ".\n10. DATE RULE: If the row has TWO dates (e.g. 03.12.2025 and 11.12.2025), the second one is the Payment Date. If Status is "ÖDEDİ", you MUST use the SECOND date. If "ÖDEMEDİ", use the first/only date.\n11. IGNORE the word "YAZDIR". It is NOT "YAZILI".\n12. IGNORE integer numbers like "5618" or "8363" (these are Receipt IDs). The Amount ALWAYS has a comma (e.g. 1.000,00).\n\nExample 1:\nInput: "ÖDEMEDİ UYG 05.12.2025 SNV. 600,00 AVUKAT HARCI"\nOutput: [UYGULAMA SINAV HARCI, 05.12.2025, 600,00, ÖDEMEDİ]\n\nExample 2:\nInput: "TAKSİT 03.12.2025 11.12.2025 5.000,00 ÖDEDİ"\nOutput: [TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]'
+
+def apply_regex_overrides(row_text, parts):
+    """Override the LLM's Date (index 1) and Amount (index 2) with the regex values."""
+    regex_date, regex_amount = regex_date_and_amount(row_text)
+    if regex_date:
+        parts[1] = regex_date
+    if regex_amount:
+        parts[2] = regex_amount
+    return f"[{', '.join(parts)}]"
+
+async def clean_payment_row(row_text):
     # Use LLM to clean the messy OCR row into a structured format
-    prompt = 'You are a data cleaner. Extract the Payment Type, Date, Amount, and Status from this messy OCR text. \n\nRules:\n1. Output strictly a list of 4 items: [Type, Date, Amount, Status].\n2. Status must be "ÖDEDİ" or "ÖDEMEDİ".\n3. Payment Type MUST be one of these EXACT strings (fix any OCR errors to match these):\n   - "YAZILI SINAV HARCI"\n   - "UYGULAMA SINAV HARCI"\n   - "BAŞARISIZ ADAY EĞİTİMİ"\n   - "ÖZEL DERS"\n   - "BELGE ÜCRETİ"\n   - "TAKSİT"\n4. If the text contains "YZL" AND "SNV", map it to "YAZILI SINAV HARCI".\n5. If the text contains "UYG" AND "SNV", map it to "UYGULAMA SINAV HARCI".\n6. If the text contains "BASARISIZ", "ADAY", "EGITIMI", map it to "BAŞARISIZ ADAY EĞİTİMİ".\n7. If the text contains "OZEL", "DERS", map it to "ÖZEL DERS".\n8. If the text contains "BELGE", "UCRETI", map it to "BELGE ÜCRETİ".\n9. If the text contains "TAKSİT", "TAKSIT", "TKST", map it to "TAKSİT". DO NOT CHANGE "TAKSİT" TO "BELGE ÜCRETİ".\n10. DATE RULE: If the row has TWO dates (e.g. 03.12.2025 and 11.12.2025), the second one is the Payment Date. If Status is "ÖDEDİ", you MUST use the SECOND date. If "ÖDEMEDİ", use the first/only date.\n11. IGNORE the word "YAZDIR". It is NOT "YAZILI".\n12. IGNORE integer numbers like "5618" or "8363" (these are Receipt IDs). The Amount ALWAYS has a comma (e.g. 1.000,00).\n\nExample 1:\nInput: "ÖDEMEDİ UYG 05.12.2025 SNV. 600,00 AVUKAT HARCI"\nOutput: [UYGULAMA SINAV HARCI, 05.12.2025, 600,00, ÖDEMEDİ]\n\nExample 2:\nInput: "TAKSİT 03.12.2025 11.12.2025 5.000,00 ÖDEDİ"\nOutput: [TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]\n\nInput: ' + row_text + '\nOutput ONLY the list format like the examples.'
+    prompt = CLEAN_ROW_RULES + '\n\nInput: ' + row_text + '\nOutput ONLY the list format like the examples.'
 
     try:
         response = requests.post(
@@ -419,16 +388,7 @@ async def clean_payment_row(row_text):
                     # Remove brackets and split
                     parts = [p.strip() for p in cleaned_list_str.strip('[]').split(',')]
                     if len(parts) >= 4:
-                        # Override Date (Index 1)
-                        if regex_date:
-                            parts[1] = regex_date
-                        
-                        # Override Amount (Index 2)
-                        if regex_amount:
-                            parts[2] = regex_amount
-                            
-                        cleaned_list_str = f"[{', '.join(parts)}]"
-                        return cleaned_list_str
+                        return apply_regex_overrides(row_text, parts)
                 except:
                     pass # Fallback to LLM output if parsing fails
                 
@@ -438,18 +398,101 @@ async def clean_payment_row(row_text):
 
     return row_text
 
-# Global reader to avoid reloading model
-reader = None
+async def clean_payment_rows(row_texts):
+    """
+    Clean all OCR rows of one table with a single LLM request.
+    Results are mapped back by index; rows missing or unparseable in the
+    batched answer fall back to clean_payment_row one by one.
+    """
+    if not row_texts:
+        return []
+
+    # Rows the local parser is confident about never reach the LLM
+    cleaned_rows = [None] * len(row_texts)
+    llm_indexes = []
+    for i, row_text in enumerate(row_texts):
+        parsed, confidence = ledger_parser.parse_ledger_row(row_text)
+        if parsed is not None and confidence >= ledger_parser.CONFIDENCE_THRESHOLD:
+            cleaned_rows[i] = parsed
+            ledger_parser.count_parsed("local")
+        else:
+            llm_indexes.append(i)
+    ledger_parser.count_parsed("llm", len(llm_indexes))
+    if not llm_indexes:
+        return cleaned_rows
+    if len(llm_indexes) == 1:
+        cleaned_rows[llm_indexes[0]] = await clean_payment_row(row_texts[llm_indexes[0]])
+        return cleaned_rows
+
+    numbered_rows = "\n".join(f"{i}: {row_texts[i]}" for i in llm_indexes)
+    prompt = (CLEAN_ROW_RULES
+              + '\n\nYou will get several numbered rows. Clean EACH row with the rules above.'
+              + '\nOutput ONLY a JSON list of objects like {"i": 0, "row": ["TAKSİT", "11.12.2025", "5.000,00", "ÖDEDİ"]}, one object per input row.'
+              + '\n\nRows:\n' + numbered_rows)
+
+    batched = {}
+    try:
+        response = requests.post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": "Bearer " + os.getenv("OPENROUTER_API_KEY"),
+            },
+            data=json.dumps({
+                "model": "google/gemini-3-flash-preview", 
+                "messages": [
+                    {'role': 'user', 'content': prompt}
+                ]
+            })
+        )
+        if response.status_code == 200:
+            content = response.json()['choices'][0]['message']['content']
+            content = content.replace('```json', '').replace('```', '').strip()
+            for item in json.loads(content):
+                try:
+                    index = int(item["i"])
+                    parts = [str(p).strip() for p in item["row"]]
+                    if index in llm_indexes and len(parts) == 4:
+                        batched[index] = apply_regex_overrides(row_texts[index], parts)
+                except (KeyError, TypeError, ValueError):
+                    continue
+    except Exception as e:
+        print(f"LLM Error in clean_payment_rows: {e}")
+
+    for i in llm_indexes:
+        if i in batched:
+            cleaned_rows[i] = batched[i]
+        else:
+            print(f"Batched cleaning missed row {i}, cleaning it alone: {row_texts[i]}")
+            cleaned_rows[i] = await clean_payment_row(row_texts[i])
+    return cleaned_rows
+
+# EasyOCR is CPU/GPU bound and blocking, so it runs on its own workers instead of the event loop.
+# Two workers so both ledger tables can be recognized at the same time.
+OCR_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ocr")
+# An EasyOCR Reader is not safe to call from two threads at once, so each OCR worker
+# loads its own (once, on its first in-process readtext) and keeps it for the process
+ocr_readers = threading.local()
+
+def get_ocr_reader():
+    if getattr(ocr_readers, "reader", None) is None:
+        print(f"Initializing EasyOCR with GPU for {threading.current_thread().name}...")
+        ocr_readers.reader = easyocr.Reader(['tr', 'en'], gpu=True)
+    return ocr_readers.reader
+
+def ocr_readtext(screenshot):
+    # Prefer the resident OCR service (model already loaded), load it in-process only if it is not running
+    # mag_ratio=2 enlarges the image internally, helping with small text/numbers
+    results = ocr_service.readtext_via_service(screenshot, mag_ratio=2)
+    if results is not None:
+        return results
+    return get_ocr_reader().readtext(screenshot, mag_ratio=2)
 
 async def image_ocr(screenshot):
-    global reader
-    if reader is None:
-        print("Initializing EasyOCR with GPU...")
-        reader = easyocr.Reader(['tr', 'en'], gpu=True)
+    loop = asyncio.get_running_loop()
+    ocr_results = await loop.run_in_executor(OCR_EXECUTOR, ocr_readtext, screenshot)
 
     # 1. Read and Sort by Y (vertical position) first to group lines
-    # mag_ratio=2 enlarges the image internally, helping with small text/numbers
-    results = sorted(reader.readtext(screenshot, mag_ratio=2), key=lambda r: r[0][0][1])
+    results = sorted(ocr_results, key=lambda r: r[0][0][1])
 
     rows = []
     for bbox, text, _ in results:
@@ -468,171 +511,347 @@ async def image_ocr(screenshot):
             rows[-1][1].append((x, text))
 
     return rows
-async def get_payment_type(page, name_surname, payment_amount, date_of_payment, search_new_person=True, cached_data=None):
+# Golden ledger tables: nth(0) is the TAKSİT plan, nth(1) is the other fees
+LEDGER_TABLES_SELECTOR = "table.table.table-bordered.dataTable"
+
+# Set GOLDEN_OCR_FALLBACK=0 to never fall back to screenshot + OCR
+OCR_FALLBACK = os.getenv("GOLDEN_OCR_FALLBACK", "1") != "0"
+
+def normalize_payment_type(text):
+    """Map a ledger type cell (e.g. "YZL. SNV. HARCI") to the canonical Golden option name."""
+    upper = str(UnicodeString(text).toUpper(tr))
+    folded = upper.replace("İ", "I").replace("Ş", "S").replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O").replace("Ç", "C")
+    if "YAZDIR" in folded:
+        folded = folded.replace("YAZDIR", "")
+    if ("YZL" in folded or "YAZILI" in folded) and ("SNV" in folded or "SINAV" in folded):
+        return "YAZILI SINAV HARCI"
+    if ("UYG" in folded) and ("SNV" in folded or "SINAV" in folded):
+        return "UYGULAMA SINAV HARCI"
+    if "BASARISIZ" in folded or ("ADAY" in folded and "EGITIM" in folded):
+        return "BAŞARISIZ ADAY EĞİTİMİ"
+    if "OZEL" in folded and "DERS" in folded:
+        return "ÖZEL DERS"
+    if "BELGE" in folded:
+        return "BELGE ÜCRETİ"
+    if "TAKSIT" in folded or "TKST" in folded:
+        return "TAKSİT"
+    return upper.strip()
 
-    #ENTER THE PERSONS PAGE AND TAKE A SCREENSHOT OF ALL PAYMENTS MADE AND PAYMENTS OWED
-    if search_new_person:
+def ledger_row_from_cells(cells):
+    """
+    Turn the cell texts of one ledger <tr> into the "[Type, Date, Amount, Status]"
+    string that the decision logic expects. Returns None if the row has no amount.
+    """
+    row_text = " ".join(cells)
+    row_upper = str(UnicodeString(row_text).toUpper(tr))
+    amounts = AMOUNT_PATTERN.findall(row_text)
+    if not amounts:
+        return None
+    status = "ÖDEDİ" if "ÖDEDİ" in row_upper else "ÖDEMEDİ"
+
+    # Same rule as the OCR cleaner: a paid row's second date is the payment date
+    dates = DATE_PATTERN.findall(row_text)
+    date = ""
+    if dates:
+        date = dates[1] if status == "ÖDEDİ" and len(dates) >= 2 else dates[0]
 
-        print("Clicking KURSİYER ARA...")
-        await human_button_click(page, "a.btn.bg-orange", has_text="KURSİYER ARA")
-        await asyncio.sleep(random.uniform(1.7, 3.7))
-        
-        await human_type(page, "#txtaraadi", name_surname)
-        await asyncio.sleep(random.uniform(0.8, 1.8))
-        await page.keyboard.press("Enter")
-        await asyncio.sleep(random.uniform(1.7, 3.7))
+    payment_type = ""
+    for cell in cells:
+        cell_upper = str(UnicodeString(cell).toUpper(tr)).strip()
+        if not re.search(r'[^\W\d_]', cell_upper):
+            continue
+        if cell_upper in ("ÖDEDİ", "ÖDEMEDİ", "YAZDIR") or DATE_PATTERN.search(cell_upper) or AMOUNT_PATTERN.search(cell_upper):
+            continue
+        payment_type = normalize_payment_type(cell)
+        break
+
+    return f"[{payment_type}, {date}, {amounts[-1]}, {status}]"
 
-        # Dead screen check - verify the name appears in results (Case Insensitive Check)
-        # We use a comma-separated selector list which acts as an OR operator in CSS
+async def read_payment_table(table):
+    """
+    Read one ledger table straight from the DOM.
+    Returns a list of (row_string, is_paid) tuples, or None if the table could not be parsed.
+    """
+    rows = await table.evaluate(
+        "t => Array.from(t.querySelectorAll('tbody tr')).map(r => Array.from(r.cells).map(c => c.innerText.trim()))"
+    )
+    return parse_table_rows(rows)
+
+def parse_table_rows(rows):
+    """Cell texts of a ledger table's rows -> list of (row_string, is_paid), or None if a row does not parse."""
+    parsed = []
+    for cells in rows:
+        # DataTables renders a single "no data" cell for empty tables
+        if len(cells) < 2:
+            continue
+        row = ledger_row_from_cells(cells)
+        if row is None:
+            print(f"Could not parse ledger row from DOM: {cells}")
+            return None
+        parsed.append((row, row.endswith("ÖDEDİ]")))
+    return parsed
+
+async def read_ledger_from_dom(tables):
+    """Structured read of both ledger tables. Returns None if the DOM does not look as expected."""
+    try:
+        # Same implicit wait the screenshot path had before reading the cells
+        await tables.nth(1).wait_for(state="visible", timeout=10000)
+        if await tables.count() < 2:
+            print("Ledger tables not found in DOM")
+            return None
+        taksit_rows = await read_payment_table(tables.nth(0))
+        payment_rows = await read_payment_table(tables.nth(1))
+    except Exception as e:
+        print(f"DOM ledger read failed: {e}")
+        return None
+    return ledger_from_table_rows(taksit_rows, payment_rows)
+
+def ledger_from_table_rows(taksit_rows, payment_rows):
+    """Split the parsed TAKSİT and payment tables into the (owed, paid, taksit_paid, taksit_owed) ledger."""
+    if taksit_rows is None or payment_rows is None:
+        return None
+
+    payment_owed = [row for row, paid in payment_rows if not paid]
+    payments_paid = [row for row, paid in payment_rows if paid]
+    payments_taksit_paid = [row for row, paid in taksit_rows if paid]
+    payments_taksit_owed = [row for row, paid in taksit_rows if not paid]
+    return payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed
+
+# Set RPA_DEBUG_SCREENSHOTS=1 to also write the ledger screenshots to disk
+DEBUG_SCREENSHOTS = os.getenv("RPA_DEBUG_SCREENSHOTS", "0") == "1"
+debug_run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+debug_screenshot_count = 0
+
+def decode_screenshot(png_bytes):
+    """Decode PNG bytes once into the BGR array EasyOCR works on."""
+    return cv2.imdecode(np.frombuffer(png_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def save_debug_screenshot(png_bytes, label):
+    global debug_screenshot_count
+    debug_screenshot_count += 1
+    path = os.path.join(app_paths.debug_screenshots_dir(debug_run_id), f"{debug_screenshot_count:04d}_{label}.png")
+    with open(path, "wb") as f:
+        f.write(png_bytes)
+    print(f"Debug screenshot saved: {path}")
+
+def ocr_rows_to_texts(ocr_rows):
+    """Join each OCR row left-to-right into one string, skipping header rows."""
+    row_texts = []
+    for row in ocr_rows:
+        if len(row) < 2:
+            continue
+        # row = [y_position, [(x, text), (x, text), ...]]
+        # Sort by X position to get left-to-right order
+        sorted_items = sorted(row[1], key=lambda item: item[0])
+        
+        if len(sorted_items) < 2:
+            continue
         
+        # Join all text in the row to form a single string
+        row_text = " ".join([text for x, text in sorted_items])
 
-        #success_indicator = page.locator(f"a:has-text('{name_surname}'), a:has-text('{name_surname.upper()}'), a:has-text('{UnicodeString(name_surname).toLower(tr)}'), a:has-text('{UnicodeString(name_surname).toUpper(tr)}'), a::has-text('{UnicodeString(name_surname.split(" ")[0]).toUpper(tr)}')").first
-        name_pattern = turkish_pattern_check(name_surname)
-        success_indicator = page.get_by_role("link", name=name_pattern)
-        try:
-            await success_indicator.wait_for(state="visible", timeout=3000)
-        except:
-            # First attempt failed - retry with just surname
-            print(f"Name not found - retrying with surname only...")
-            await human_button_click(page, "a.btn.bg-orange", has_text="KURSİYER ARA")
-            await asyncio.sleep(random.uniform(1.7, 3.7))
-            
-            surname = name_surname.split(" ")[-1]  # Get last part as surname
-            await human_type(page, "#txtaraadi", surname)
-            await asyncio.sleep(random.uniform(0.8, 1.8))
-            await page.keyboard.press("Enter")
-            await asyncio.sleep(random.uniform(1.7, 3.7))
-            
-            try:
-                # Same combined check for surname
-                success_indicator = page.locator(f"a:has-text('{surname}'), a:has-text('{surname.upper()}'), a:has-text('{str(UnicodeString(surname).toLower(tr))}'), a:has-text('{str(UnicodeString(surname).toUpper(tr))}')").first
-                await success_indicator.wait_for(state="visible", timeout=3000)
-            except:
-                print(f"Both attempts failed for '{name_surname}'")
-                # Infer payment type from amount even when name not found
-                inferred_type = infer_payment_type_from_amount(payment_amount)
-                return [[inferred_type, "FLAG: 404"]], None
+        # Skip header rows (Case insensitive and more robust)
+        row_upper = row_text.upper()
+        if "TIPI" in row_upper or "TİPİ" in row_upper or "BORÇ" in row_upper or "DURUMU" in row_upper or "VADE" in row_upper:
+            print(f"Skipping header row: {row_text}")
+            continue
+        row_texts.append(row_text)
+    return row_texts
 
+async def read_ledger_via_ocr(tables):
+    """Screenshot + EasyOCR + LLM cleanup of both ledger tables (fallback path)."""
     payment_owed = []
     payments_paid = []
     payments_taksit_paid = []
     payments_taksit_owed = []
 
-    if not search_new_person and cached_data:
-        print(f"Using cached OCR data for {name_surname}")
-        payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed = cached_data
-    else:
-        # Click on the person's name to go to payment page
-        name_click_success = await human_button_click(page, "a", has_text=name_surname)
+    # Screenshots stay in memory (concurrent runs used to overwrite each other's PNGs)
+    # First table
+    taksit_png = await tables.nth(0).screenshot()
+    
+    # Second table
+    payments_png = await tables.nth(1).screenshot()
+
+    if DEBUG_SCREENSHOTS:
+        save_debug_screenshot(taksit_png, "taksit")
+        save_debug_screenshot(payments_png, "payments")
+
+    #GO THROUGH THE SCREENSHOT WITH OCR AND ORGANIZE IT IN ARRAYS
+    print("Starting OCR on screenshots...")
+    # Both tables are recognized concurrently; the page and event loop stay free meanwhile
+    payments_taksit_info, payments_info = await asyncio.gather(
+        image_ocr(decode_screenshot(taksit_png)),
+        image_ocr(decode_screenshot(payments_png)),
+    )
+    print(f"OCR Complete. Found {len(payments_info)} rows in payments and {len(payments_taksit_info)} rows in taksit.")
+
+    # Clean each table's rows with one LLM request
+    taksit_texts = ocr_rows_to_texts(payments_taksit_info)
+    for row_text, cleaned_row in zip(taksit_texts, await clean_payment_rows(taksit_texts)):
+        print(f"Original: {row_text} -> Cleaned: {cleaned_row}")
+        if ledger_parser.is_paid_row(cleaned_row, row_text):
+            payments_taksit_paid.append(cleaned_row)
+        else: 
+            payments_taksit_owed.append(cleaned_row)
+
+    payment_texts = ocr_rows_to_texts(payments_info)
+    for row_text, cleaned_row in zip(payment_texts, await clean_payment_rows(payment_texts)):
+        print(f"Original: {row_text} -> Cleaned: {cleaned_row}")
+        if ledger_parser.is_paid_row(cleaned_row, row_text):
+            payments_paid.append(cleaned_row)
+        else: 
+            # We store the full row text now, logic will check for substrings
+            payment_owed.append(cleaned_row)
+
+    return payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed
+
+async def read_ledger_checksum(page):
+    """
+    Cheap fingerprint of the ÖDEME tables: row counts, paid count and latest date.
+    Returns (checksum, source_hash) - the hash covers the full row texts.
+    """
+    tables = page.locator(LEDGER_TABLES_SELECTOR)
+    await tables.nth(1).wait_for(state="visible", timeout=10000)
+    table_rows = await tables.evaluate_all(
+        "ts => ts.map(t => Array.from(t.querySelectorAll('tbody tr')).filter(r => r.cells.length > 1).map(r => r.innerText))"
+    )
+    all_rows = [row for rows in table_rows for row in rows]
+    paid_count = sum(1 for row in all_rows if "ÖDEDİ" in str(UnicodeString(row).toUpper(tr)))
+    # dd.mm.yyyy -> yyyymmdd so the latest date sorts last
+    dates = sorted(d[6:] + d[3:5] + d[:2] for row in all_rows for d in DATE_PATTERN.findall(row))
+    last_date = dates[-1] if dates else ""
+    checksum = f"{'/'.join(str(len(rows)) for rows in table_rows)}|{paid_count}|{last_date}"
+    source_hash = hashlib.sha256("\n".join(all_rows).encode("utf-8")).hexdigest()
+    return checksum, source_hash
+
+async def read_ledger(page):
+    """Read the student's owed/paid/taksit lists from the ÖDEME page (DOM first, OCR as fallback)."""
+    tables = page.locator(LEDGER_TABLES_SELECTOR)
+    ledger = await read_ledger_from_dom(tables)
+    if ledger is None:
+        if not OCR_FALLBACK:
+            raise RuntimeError("Ledger tables could not be read from the DOM and OCR fallback is disabled")
+        print("Falling back to screenshot + OCR for the ledger")
+        ledger = await read_ledger_via_ocr(tables)
+    payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed = ledger
+    print(f"Payments Owed: {payment_owed}")
+    print(f"Payments Paid: {payments_paid}")
+    print(f"Taksit Owed: {payments_taksit_owed}")
+    print(f"Taksit Paid: {payments_taksit_paid}")
+    return ledger
+
+async def search_student(page, text):
+    """KURSİYER ARA, type the search text and press Enter; returns once the search request has completed."""
+    print("Clicking KURSİYER ARA...")
+    await page_sync.step(page, lambda: human_button_click(page, "a.btn.bg-orange", has_text="KURSİYER ARA"), ready=page.locator("#txtaraadi"))
+    await pacer.pause("glance")
+
+    await human_type(page, "#txtaraadi", text)
+    await pacer.pause("typed")
+    await page_sync.step(page, lambda: page.keyboard.press("Enter"), network=page_sync.request_matcher(contains=text))
+
+async def search_and_click_student(page, name_surname, odeme_link):
+    """Find the student with KURSİYER ARA (full name, then surname) and open their page."""
+    #ENTER THE PERSONS PAGE
+    await search_student(page, name_surname)
+
+    # Dead screen check - verify the name appears in results (Case Insensitive Check)
+    # We use a comma-separated selector list which acts as an OR operator in CSS
+    
+
+    #success_indicator = page.locator(f"a:has-text('{name_surname}'), a:has-text('{name_surname.upper()}'), a:has-text('{UnicodeString(name_surname).toLower(tr)}'), a:has-text('{UnicodeString(name_surname).toUpper(tr)}'), a::has-text('{UnicodeString(name_surname.split(" ")[0]).toUpper(tr)}')").first
+    # The search request has completed, so the results only need a moment to render
+    name_pattern = turkish_pattern_check(name_surname)
+    success_indicator = page.get_by_role("link", name=name_pattern)
+    if not await page_sync.rendered(success_indicator):
+        # First attempt failed - retry with just surname
+        print(f"Name not found - retrying with surname only...")
+        surname = name_surname.split(" ")[-1]  # Get last part as surname
+        await search_student(page, surname)
+
+        # Same combined check for surname
+        success_indicator = page.locator(f"a:has-text('{surname}'), a:has-text('{surname.upper()}'), a:has-text('{str(UnicodeString(surname).toLower(tr))}'), a:has-text('{str(UnicodeString(surname).toUpper(tr))}')").first
+        if not await page_sync.rendered(success_indicator):
+            print(f"Both attempts failed for '{name_surname}'")
+            return False
+
+    # Click on the person's name to go to payment page; the student page is ready once ÖDEME shows
+    name_click_success, _ = await page_sync.step(page, lambda: human_button_click(page, "a", has_text=name_surname), ready=odeme_link)
+    if not name_click_success:
+        # Try with surname only as fallback
+        surname = name_surname.split(" ")[-1]
+        name_click_success, _ = await page_sync.step(page, lambda: human_button_click(page, "a", has_text=surname), ready=odeme_link)
         if not name_click_success:
-            # Try with surname only as fallback
-            surname = name_surname.split(" ")[-1]
-            name_click_success = await human_button_click(page, "a", has_text=surname)
-            if not name_click_success:
-                print(f"Failed to click on name '{name_surname}' - skipping to next person")
-                inferred_type = infer_payment_type_from_amount(payment_amount)
-                return [[inferred_type, "FLAG: 404"]], None
-
-        await asyncio.sleep(random.uniform(1.7, 3.7))
-
-        odeme_click_success = await human_button_click(page, "a:visible", has_text="ÖDEME")
-        if not odeme_click_success:
-            print(f"Failed to click ÖDEME button for '{name_surname}' - skipping")
-            inferred_type = infer_payment_type_from_amount(payment_amount)
-            return [[inferred_type, "FLAG: 404"]], None
-        print("in the ODEME page")
-
-        tables = page.locator("table.table.table-bordered.dataTable")
-        
-        # First table
-        await tables.nth(0).screenshot(path="screenshotv2.png")
-        
-        # Second table
-        await tables.nth(1).screenshot(path="screenshotv3.png")
+            print(f"Failed to click on name '{name_surname}' - skipping to next person")
+            return False
+    return True
+
+async def open_payment_page(page, name_surname):
+    """Search the student and open their ÖDEME page. Returns False if the student could not be found."""
+    odeme_link = page.locator("a:visible").filter(has_text=turkish_pattern_check("ÖDEME")).first
+
+    # Names resolved against the kursiyer list go straight to the student's page
+    student_page = student_directory.student_url(name_surname)
+    opened = False
+    if student_page is not None:
+        _, opened = await page_sync.step(page, lambda: page.goto(student_page), ready=odeme_link)
+        if not opened:
+            print(f"Could not open the page of '{name_surname}' directly - searching instead")
+    if not opened:
+        if not await search_and_click_student(page, name_surname, odeme_link):
+            return False
 
+    await pacer.pause("glance")
 
-        #GO THROUGH THE SCREENSHOT WITH OCR AND ORGANIZE IT IN ARRAYS
-        print("Starting OCR on screenshots...")
-        payments_taksit_info = await image_ocr("screenshotv2.png")
-        payments_info = await image_ocr("screenshotv3.png")
-        print(f"OCR Complete. Found {len(payments_info)} rows in payments and {len(payments_taksit_info)} rows in taksit.")
+    # The ÖDEME page is ready once its DataTables have rows
+    ledger_rows = page.locator(f"{LEDGER_TABLES_SELECTOR} tbody tr").first
+    odeme_click_success, _ = await page_sync.step(page, lambda: human_button_click(page, "a:visible", has_text="ÖDEME"), ready=ledger_rows)
+    if not odeme_click_success:
+        print(f"Failed to click ÖDEME button for '{name_surname}' - skipping")
+        return False
+    print("in the ODEME page")
+    return True
 
-        for row in payments_taksit_info:
-            if len(row) < 2:
-                continue
+def needs_allocation(payment_types):
+    """True if the fixed rules gave up: nothing matched, an unknown/ambiguous type or a FLAG."""
+    if not payment_types:
+        return True
+    return any(info[0] in ("BILINMIYOR", "DORTBIN") or info[1].startswith(("FLAG", "HIC ACIK BORC YOK")) for info in payment_types)
 
-            sorted_items = sorted(row[1], key=lambda item: item[0])
-            
-            if len(sorted_items) < 2:
-                continue
-            
-            # Find payment type (skip leading row numbers)
-            payment_type_text = None
-            for x, text in sorted_items:
-                if not text.strip().isdigit():
-                    payment_type_text = text
-            # Join all text in the row to form a single string
-            row_text = " ".join([text for x, text in sorted_items])
-            
-            # Skip header rows
-            # Skip header rows (Case insensitive and more robust)
-            row_upper = row_text.upper()
-            if "TIPI" in row_upper or "TİPİ" in row_upper or "BORÇ" in row_upper or "DURUMU" in row_upper or "VADE" in row_upper:
-                print(f"Skipping header row: {row_text}")
-                continue
-            
-            # Clean the row with LLM
-            cleaned_row = await clean_payment_row(row_text)
-            print(f"Original: {row_text} -> Cleaned: {cleaned_row}")
-            
-            if "ÖDEDİ" in row_text:
-                payments_taksit_paid.append(cleaned_row)
-            else: 
-                payments_taksit_owed.append(cleaned_row)
-
-        for row in payments_info:
-            if len(row) < 2:
-                continue
-            # row = [y_position, [(x, text), (x, text), ...]]
-            # Sort by X position to get left-to-right order
-            sorted_items = sorted(row[1], key=lambda item: item[0])
-            
-            if len(sorted_items) < 2:
-                continue
-            
-            # Find payment type (skip leading row numbers)
-            payment_type_text = None
-            for x, text in sorted_items:
-                if not text.strip().isdigit():
-                    payment_type_text = text
-            # Join all text in the row to form a single string
-            row_text = " ".join([text for x, text in sorted_items])
-
-            # Skip header rows (Case insensitive and more robust)
-            row_upper = row_text.upper()
-            if "TIPI" in row_upper or "TİPİ" in row_upper or "BORÇ" in row_upper or "DURUMU" in row_upper or "VADE" in row_upper:
-                print(f"Skipping header row: {row_text}")
-                continue
-            
-            # Clean the row with LLM
-            print(f"Processing row with LLM: {row_text}")
-            cleaned_row = await clean_payment_row(row_text)
-            print(f"Original: {row_text} -> Cleaned: {cleaned_row}")
-            
-            if "ÖDEDİ" in row_text:
-                payments_paid.append(cleaned_row)
-            else: 
-                # We store the full row text now, logic will check for substrings
-                payment_owed.append(cleaned_row)
-
-        print(f"Payments Owed: {payment_owed}")
-        print(f"Payments Paid: {payments_paid}")
-        print(f"Taksit Owed: {payments_taksit_owed}")
-        print(f"Taksit Paid: {payments_taksit_paid}")
-    
-    # Update cache
-    cached_data = (payment_owed, payments_paid, payments_taksit_paid, payments_taksit_owed)
+def is_deliberate_flag(payment_types):
+    """The fixed rules flagged the amount on purpose (DORTBIN / FLAG: 4000, FLAG: BORC VAR, ...)."""
+    return any(info[0] == "DORTBIN" or info[1].startswith("FLAG") for info in payment_types)
 
+def decide_payment_types(ledger, payment_amount, date_of_payment):
+    """
+    Decide what a received amount pays for, given the student's ledger
+    (a parsed Ledger, or the four row lists, which are parsed here once).
+    The fixed rules decide first; when they give up, the amount is split over the
+    student's actual open debt by payment_allocator.
+    """
+    if not isinstance(ledger, Ledger):
+        ledger = Ledger.from_rows(ledger)
+
+    payment_types = decide_by_rules(ledger, payment_amount, date_of_payment)
+    if not needs_allocation(payment_types):
+        return payment_types
+    # An installment or this very amount already entered on/after the statement date means the
+    # row was most likely processed before; splitting it again would pay twice
+    if ledger.taksit_paid_since(date_of_payment) or ledger.paid_since(payment_amount, date_of_payment):
+        print(f"Logic: {payment_amount} not allocated, a payment on or after {date_of_payment} is already entered")
+        return payment_types
+    allocation = allocate(ledger, payment_amount)
+    if allocation is None:
+        return payment_types
+    # Deliberate flags are only overridden by an exact fit, never by a partial installment guess
+    if allocation.partial_installment and is_deliberate_flag(payment_types):
+        print(f"Logic: {payment_amount} stays flagged, {describe(allocation.parts)} needs a partial TAKSİT guess")
+        return payment_types
+    print(f"Logic: {payment_amount} -> {describe(allocation.parts)} ({allocation.reason})")
+    return allocation.payment_types()
+
+def decide_by_rules(ledger, payment_amount, date_of_payment):
+    """The fixed combinations (exam fee + TAKSİT, 4000 BAŞARISIZ + remainder, ...)."""
     payment_types = []
 
     #CALCULATE WHAT IS BEING PAID ACTUALLY
@@ -644,154 +863,153 @@ async def get_payment_type(page, name_surname, payment_amount, date_of_payment,
 
     if payment_amount == 1200 or payment_amount == 900:
         # Check OWED first with exact amount match - person may have retaken exam after failing
-        if check_owed_with_amount("YZL. SNV. HARCI", payment_owed, payment_amount) or check_owed_with_amount("YAZILI SINAV HARCI", payment_owed, payment_amount):
+        if ledger.owes(PaymentType.YAZILI, payment_amount):
             print(f"Logic: {payment_amount} -> YAZILI SINAV HARCI (BORC VAR - amount matches)")
             payment_types.append(["YAZILI SINAV HARCI", "BORC VAR", payment_amount])
-            return payment_types, cached_data
-        elif check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid):
+            return payment_types
+        elif ledger.has_paid(PaymentType.YAZILI):
             print(f"Logic: {payment_amount} -> YAZILI SINAV HARCI (BORC ODENMIS)")
             payment_types.append(["YAZILI SINAV HARCI", "BORC ODENMIS YAZILI SINAV", payment_amount])
-            return payment_types, cached_data
+            return payment_types
         else:
             payment_types.append(["YAZILI SINAV HARCI", "BORC ACILMAMIS YAZILI SINAV", payment_amount])
-            return payment_types, cached_data
+            return payment_types
     if payment_amount == 1600 or payment_amount == 1350:
         # Check OWED first with exact amount match - person may have retaken exam after failing
-        if check_owed_with_amount("UYG. SNV. HARCI", payment_owed, payment_amount) or check_owed_with_amount("UYGULAMA SINAV HARCI", payment_owed, payment_amount):
+        if ledger.owes(PaymentType.UYGULAMA, payment_amount):
             print(f"Logic: {payment_amount} -> UYGULAMA SINAV HARCI (BORC VAR - amount matches)")
             payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR", payment_amount])
-            return payment_types, cached_data
-        elif check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid):
+            return payment_types
+        elif ledger.has_paid(PaymentType.UYGULAMA):
             print(f"Logic: {payment_amount} -> UYGULAMA SINAV HARCI (BORC ODENMIS)")
             payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS UYGULAMA SINAV", payment_amount])
-            return payment_types, cached_data
+            return payment_types
         else:
             payment_types.append(["UYGULAMA SINAV HARCI", "BORC ACILMAMIS UYGULAMA SINAV", payment_amount])
-            return payment_types, cached_data
+            return payment_types
 
     # 1000 TL payments - BELGE ÜCRETİ logic
     if payment_amount == 1000:
         # 1) If BELGE ÜCRETİ is OWED → pay it
-        if check_owed("BELGE ÜCRETİ", payment_owed):
+        if ledger.owes(PaymentType.BELGE):
             print(f"Logic: {payment_amount} -> BELGE ÜCRETİ (BORC VAR)")
             payment_types.append(["BELGE ÜCRETİ", "BORC VAR", payment_amount])
-            return payment_types, cached_data
+            return payment_types
         # 2) If BELGE ÜCRETİ is PAID
-        elif check_paid("BELGE ÜCRETİ", payments_paid):
+        elif ledger.has_paid(PaymentType.BELGE):
             # Check if there's taksit owed that's >= 1000
-            total_taksit_owed = get_total_owed_taksit(payments_taksit_owed) if payments_taksit_owed else 0
+            total_taksit_owed = ledger.total_owed_taksit
             if total_taksit_owed >= 1000:
                 print(f"Logic: {payment_amount} -> TAKSİT (BELGE paid, TAKSİT owed >= 1000)")
                 payment_types.append(["TAKSİT", "BORC VAR", payment_amount])
-                return payment_types, cached_data
+                return payment_types
             # Check if taksit paid on same date
-            elif check_date_if_paid(date_of_payment, payments_taksit_paid):
+            elif ledger.taksit_paid_since(date_of_payment):
                 print(f"Logic: {payment_amount} -> TAKSİT (BELGE paid, TAKSİT paid same date)")
                 payment_types.append(["TAKSİT", "BORC ODENMIS", payment_amount])
-                return payment_types, cached_data
+                return payment_types
             else:
                 print(f"Logic: {payment_amount} -> BELGE ÜCRETİ (BORC ODENMIS)")
                 payment_types.append(["BELGE ÜCRETİ", "BORC ODENMIS", payment_amount])
-                return payment_types, cached_data
+                return payment_types
         # 3) No BELGE ÜCRETİ paid or owed → BORC YOK
         else:
             print(f"Logic: {payment_amount} -> BELGE ÜCRETİ BORC YOK")
             payment_types.append(["BELGE ÜCRETİ", "BORC YOK", payment_amount])
-            return payment_types, cached_data
-    if payment_amount == 4000 and check_owed("BAŞARISIZ ADAY EĞİTİMİ", payment_owed):
+            return payment_types
+    if payment_amount == 4000 and ledger.owes(PaymentType.BASARISIZ):
         payment_types.append(["BAŞARISIZ ADAY EĞİTİMİ", "BORC VAR"])
-        return payment_types, cached_data
-    elif payment_amount == 4000 and check_paid("BAŞARISIZ ADAY EĞİTİMİ", payments_paid):
+        return payment_types
+    elif payment_amount == 4000 and ledger.has_paid(PaymentType.BASARISIZ):
         payment_types.append(["BAŞARISIZ ADAY EĞİTİMİ", "BORC ODENMIS"])
-        return payment_types, cached_data
+        return payment_types
 
     # If exactly 4000 and there's a 4000 taksit owed, pay it as TAKSİT (not ambiguous)
-    if payment_amount == 4000 and check_owed_with_amount(None, payments_taksit_owed, 4000):
+    if payment_amount == 4000 and ledger.owes_taksit(4000):
         payment_types.append(["TAKSİT", "BORC VAR"])
-        return payment_types, cached_data
+        return payment_types
 
     if payment_amount == 4000:
         payment_types.append(["DORTBIN", "FLAG: 4000"])
-        return payment_types, cached_data
+        return payment_types
 
-    #if payment_amount == 4000 and check_owed("ÖZEL DERS", payment_owed):
+    #if payment_amount == 4000 and ledger.owes(PaymentType.OZEL_DERS):
     #    payment_types.append(["ÖZEL DERS", "BORC VAR"])
     #    return payment_types
 
     payment_copy = payment_amount
     
     if payment_amount >= 2000 and payment_amount%500 == 0 and payment_amount < 4000 :
-        if check_owed("BELGE ÜCRETİ", payment_owed):
+        if ledger.owes(PaymentType.BELGE):
             payment_types.append(["BELGE ÜCRETİ", "BORC VAR"])
             payment_types.append(["TAKSİT", "BORC VAR"])
-        elif check_owed("TAKSİT", payments_taksit_owed):
-            if check_date_if_paid(date_of_payment, payments_taksit_paid):
+        elif ledger.owes_taksit():
+            if ledger.taksit_paid_since(date_of_payment):
                  payment_types.append(["TAKSİT", "BORC ODENMIS"])
             else:
                  payment_types.append(["TAKSİT", "BORC VAR"])
-            return payment_types, cached_data
+            return payment_types
             
-        if check_paid("TAKSİT", payments_taksit_paid) and check_date_if_paid(date_of_payment, payments_taksit_paid):
+        if ledger.has_paid_taksit() and ledger.taksit_paid_since(date_of_payment):
             payment_types.append(["TAKSİT", "BORC ODENMIS"])
-        return payment_types, cached_data
+        return payment_types
     
     # HIGH TAKSIT + SINAV COMBOS (check before complex modulo logic)
     # This handles payments like 8200 = 1200 (YAZILI) + 7000 (TAKSİT)
     if payment_copy > 1600:
-        total_taksit_owed = get_total_owed_taksit(payments_taksit_owed)
-        total_taksit_paid = get_total_owed_taksit(payments_taksit_paid) if payments_taksit_paid else 0
+        total_taksit_owed = ledger.total_owed_taksit
         
         # Try YAZILI SINAV combos (1200, 900)
         for yazili_amount in [1200, 900]:
             remainder = payment_copy - yazili_amount
             if remainder > 0 and remainder % 500 == 0:
                 # Check if YAZILI is owed
-                if check_owed_with_amount("YZL. SNV. HARCI", payment_owed, yazili_amount) or check_owed_with_amount("YAZILI SINAV HARCI", payment_owed, yazili_amount):
-                    if check_owed_with_amount(None, payments_taksit_owed, remainder) or remainder <= total_taksit_owed:
+                if ledger.owes(PaymentType.YAZILI, yazili_amount):
+                    if ledger.owes_taksit(remainder) or remainder <= total_taksit_owed:
                         print(f"Logic: {payment_copy} = {yazili_amount} (YAZILI OWED) + {remainder} (TAKSİT)")
                         payment_types.append(["YAZILI SINAV HARCI", "BORC VAR", yazili_amount])
                         payment_types.append(["TAKSİT", "BORC VAR", remainder])
-                        return payment_types, cached_data
+                        return payment_types
                 # Check if YAZILI is already paid
-                elif check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid):
+                elif ledger.has_paid(PaymentType.YAZILI):
                     # Check if taksit is owed
-                    if check_owed_with_amount(None, payments_taksit_owed, remainder) or remainder <= total_taksit_owed:
+                    if ledger.owes_taksit(remainder) or remainder <= total_taksit_owed:
                         print(f"Logic: {payment_copy} = {yazili_amount} (YAZILI PAID) + {remainder} (TAKSİT OWED)")
                         payment_types.append(["YAZILI SINAV HARCI", "BORC ODENMIS", yazili_amount])
                         payment_types.append(["TAKSİT", "BORC VAR", remainder])
-                        return payment_types, cached_data
+                        return payment_types
                     # Check if taksit already paid on same date
-                    elif check_date_if_paid(date_of_payment, payments_taksit_paid):
+                    elif ledger.taksit_paid_since(date_of_payment):
                         print(f"Logic: {payment_copy} = {yazili_amount} (YAZILI PAID) + {remainder} (TAKSİT PAID)")
                         payment_types.append(["YAZILI SINAV HARCI", "BORC ODENMIS", yazili_amount])
                         payment_types.append(["TAKSİT", "BORC ODENMIS", remainder])
-                        return payment_types, cached_data
+                        return payment_types
         
         # Try UYGULAMA SINAV combos (1600, 1350)
         for uygulama_amount in [1600, 1350]:
             remainder = payment_copy - uygulama_amount
             if remainder > 0 and remainder % 500 == 0:
                 # Check if UYGULAMA is owed
-                if check_owed_with_amount("UYG. SNV. HARCI", payment_owed, uygulama_amount) or check_owed_with_amount("UYGULAMA SINAV HARCI", payment_owed, uygulama_amount):
-                    if check_owed_with_amount(None, payments_taksit_owed, remainder) or remainder <= total_taksit_owed:
+                if ledger.owes(PaymentType.UYGULAMA, uygulama_amount):
+                    if ledger.owes_taksit(remainder) or remainder <= total_taksit_owed:
                         print(f"Logic: {payment_copy} = {uygulama_amount} (UYGULAMA OWED) + {remainder} (TAKSİT)")
                         payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR", uygulama_amount])
                         payment_types.append(["TAKSİT", "BORC VAR", remainder])
-                        return payment_types, cached_data
+                        return payment_types
                 # Check if UYGULAMA is already paid
-                elif check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid):
+                elif ledger.has_paid(PaymentType.UYGULAMA):
                     # Check if taksit is owed
-                    if check_owed_with_amount(None, payments_taksit_owed, remainder) or remainder <= total_taksit_owed:
+                    if ledger.owes_taksit(remainder) or remainder <= total_taksit_owed:
                         print(f"Logic: {payment_copy} = {uygulama_amount} (UYGULAMA PAID) + {remainder} (TAKSİT OWED)")
                         payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS", uygulama_amount])
                         payment_types.append(["TAKSİT", "BORC VAR", remainder])
-                        return payment_types, cached_data
+                        return payment_types
                     # Check if taksit already paid on same date
-                    elif check_date_if_paid(date_of_payment, payments_taksit_paid):
+                    elif ledger.taksit_paid_since(date_of_payment):
                         print(f"Logic: {payment_copy} = {uygulama_amount} (UYGULAMA PAID) + {remainder} (TAKSİT PAID)")
                         payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS", uygulama_amount])
                         payment_types.append(["TAKSİT", "BORC ODENMIS", remainder])
-                        return payment_types, cached_data
+                        return payment_types
 
     #COMPLEX PAYMENTS
     if payment_copy > 1600:
@@ -801,109 +1019,109 @@ async def get_payment_type(page, name_surname, payment_amount, date_of_payment,
         remainder_uygulama = payment_copy - 1600
         remainder_yazili = payment_copy - 1200
         
-        if check_owed_with_amount("UYG. SNV. HARCI", payment_owed, 1600) or check_owed_with_amount("UYGULAMA SINAV HARCI", payment_owed, 1600):
-            if check_owed_with_amount(None, payments_taksit_owed, remainder_uygulama):
+        if ledger.owes(PaymentType.UYGULAMA, 1600):
+            if ledger.owes_taksit(remainder_uygulama):
                 print(f"Logic: {payment_copy} = 1600 (UYGULAMA) + {remainder_uygulama} (TAKSİT owed)")
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-                return payment_types, cached_data
+                return payment_types
         
-        if check_owed_with_amount("YZL. SNV. HARCI", payment_owed, 1200) or check_owed_with_amount("YAZILI SINAV HARCI", payment_owed, 1200):
-            if check_owed_with_amount(None, payments_taksit_owed, remainder_yazili):
+        if ledger.owes(PaymentType.YAZILI, 1200):
+            if ledger.owes_taksit(remainder_yazili):
                 print(f"Logic: {payment_copy} = 1200 (YAZILI) + {remainder_yazili} (TAKSİT owed)")
                 payment_types.append(["YAZILI SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-                return payment_types, cached_data
+                return payment_types
         
         # Original modulo-based logic (fallback)
-        if (payment_copy - 1600)%500 == 0 and payment_copy - 1600 != 4000 and (check_owed("UYG. SNV. HARCI", payment_owed) or check_owed("UYGULAMA SINAV HARCI", payment_owed) or check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid)):
-            if (check_owed("UYG. SNV. HARCI", payment_owed) or check_owed("UYGULAMA SINAV HARCI", payment_owed)):
+        if (payment_copy - 1600)%500 == 0 and payment_copy - 1600 != 4000 and (ledger.owes(PaymentType.UYGULAMA) or ledger.has_paid(PaymentType.UYGULAMA)):
+            if ledger.owes(PaymentType.UYGULAMA):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-            elif check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid):
+            elif ledger.has_paid(PaymentType.UYGULAMA):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS"])
                 payment_types.append(["TAKSİT", "BORC ODENMIS"])
-        elif (payment_copy - 1600)%500 == 0 and payment_copy - 1600 == 4000 and (check_owed("UYG. SNV. HARCI", payment_owed) or check_owed("UYGULAMA SINAV HARCI", payment_owed) or check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid)) and check_owed_with_amount(None, payments_taksit_owed, 4000):
-            if (check_owed("UYG. SNV. HARCI", payment_owed) or check_owed("UYGULAMA SINAV HARCI", payment_owed)):
+        elif (payment_copy - 1600)%500 == 0 and payment_copy - 1600 == 4000 and (ledger.owes(PaymentType.UYGULAMA) or ledger.has_paid(PaymentType.UYGULAMA)) and ledger.owes_taksit(4000):
+            if ledger.owes(PaymentType.UYGULAMA):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-            elif check_paid("UYG. SNV. HARCI", payments_paid) or check_paid("UYGULAMA SINAV HARCI", payments_paid):
+            elif ledger.has_paid(PaymentType.UYGULAMA):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS"])
                 payment_types.append(["TAKSİT", "BORC ODENMIS"])
-            elif check_owed("YZL. SNV. HARCI", payment_owed) or check_owed("YAZILI SINAV HARCI", payment_owed):
+            elif ledger.owes(PaymentType.YAZILI):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC YOK"])
-        elif (payment_copy - 1200)%500 == 0 and payment_copy - 1200 != 4000 and (check_owed("YZL. SNV. HARCI", payment_owed) or check_owed("YAZILI SINAV HARCI", payment_owed) or check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid)):
+        elif (payment_copy - 1200)%500 == 0 and payment_copy - 1200 != 4000 and (ledger.owes(PaymentType.YAZILI) or ledger.has_paid(PaymentType.YAZILI)):
             remainder = payment_copy - 1200  # Actual taksit amount
-            if check_owed("YZL. SNV. HARCI", payment_owed) or check_owed("YAZILI SINAV HARCI", payment_owed):
+            if ledger.owes(PaymentType.YAZILI):
                 payment_types.append(["YAZILI SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "FLAG: BORC VAR", remainder])
-            elif check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid):
+            elif ledger.has_paid(PaymentType.YAZILI):
                 payment_types.append(["YAZILI SINAV HARCI", "BORC ODENMIS"])
                 payment_types.append(["TAKSİT", "BORC ODENMIS", remainder])
             else:
                 payment_types.append(["YAZILI SINAV HARCI", "BORC YOK"])
                 payment_types.append(["TAKSİT", "FLAG: BILINMIYOR", remainder])
 
-        elif (payment_copy - 1200)%500 == 0 and payment_copy - 1200 == 4000 and (check_owed("YZL. SNV. HARCI", payment_owed) or check_owed("YAZILI SINAV HARCI", payment_owed) or check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid)) and check_owed_with_amount(None, payments_taksit_owed, 4000):
-            if check_owed("YZL. SNV. HARCI", payment_owed) or check_owed("YAZILI SINAV HARCI", payment_owed):
+        elif (payment_copy - 1200)%500 == 0 and payment_copy - 1200 == 4000 and (ledger.owes(PaymentType.YAZILI) or ledger.has_paid(PaymentType.YAZILI)) and ledger.owes_taksit(4000):
+            if ledger.owes(PaymentType.YAZILI):
                 payment_types.append(["YAZILI SINAV HARCI", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-            elif check_paid("YZL. SNV. HARCI", payments_paid) or check_paid("YAZILI SINAV HARCI", payments_paid) and check_date_if_paid(date_of_payment, payments_taksit_paid):
+            elif ledger.has_paid(PaymentType.YAZILI) and ledger.taksit_paid_since(date_of_payment):
                 payment_types.append(["UYGULAMA SINAV HARCI", "BORC ODENMIS"])
                 payment_types.append(["TAKSİT", "BORC ODENMIS"])
             else:
                 payment_types.append(["YAZILI SINAV HARCI", "BORC YOK"])
                 payment_types.append(["TAKSİT", "BORC YOK"])
         
-        elif (payment_copy - 1000)%500 == 0 and payment_copy - 1000 != 4000 and (check_owed("BELGE ÜCRETİ", payment_owed) or check_paid("BELGE ÜCRETİ", payments_paid)):
-            if  check_owed("BELGE ÜCRETİ", payment_owed):
+        elif (payment_copy - 1000)%500 == 0 and payment_copy - 1000 != 4000 and (ledger.owes(PaymentType.BELGE) or ledger.has_paid(PaymentType.BELGE)):
+            if ledger.owes(PaymentType.BELGE):
                 payment_types.append(["BELGE ÜCRETİ", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-            elif check_paid("BELGE ÜCRETİ", payments_paid):
+            elif ledger.has_paid(PaymentType.BELGE):
                 payment_types.append(["BELGE ÜCRETİ", "BORC ODENMIS"])
-                if check_date_if_paid(date_of_payment, payments_taksit_paid):
+                if ledger.taksit_paid_since(date_of_payment):
                     payment_types.append(["TAKSİT", "BORC ODENMIS"])
                 else: 
                     payment_types.append(["TAKSİT", "BORC VAR"])
         
-        elif (payment_copy - 1000)%500 == 0 and payment_copy - 1000 == 4000 and (check_owed("BELGE ÜCRETİ", payment_owed) or check_paid("BELGE ÜCRETİ", payments_paid)) and check_owed_with_amount(None, payments_taksit_owed, 4000) :
-            if check_owed("BELGE ÜCRETİ", payment_owed):
+        elif (payment_copy - 1000)%500 == 0 and payment_copy - 1000 == 4000 and (ledger.owes(PaymentType.BELGE) or ledger.has_paid(PaymentType.BELGE)) and ledger.owes_taksit(4000) :
+            if ledger.owes(PaymentType.BELGE):
                 payment_types.append(["BELGE ÜCRETİ", "BORC VAR"])
                 payment_types.append(["TAKSİT", "BORC VAR"])
-            elif check_paid("BELGE ÜCRETİ", payments_paid):
+            elif ledger.has_paid(PaymentType.BELGE):
                 payment_types.append(["BELGE ÜCRETİ", "BORC ODENMIS"])
                 payment_types.append(["DORTBIN", "BORC ODENMIS"])
         
         # NEW: BAŞARISIZ ADAY EĞİTİMİ combo logic
         # If payment > 4000, owes BAŞARISIZ 4000, and remainder matches any other owed item
-        elif payment_copy > 4000 and check_owed("BAŞARISIZ ADAY EĞİTİMİ", payment_owed):
+        elif payment_copy > 4000 and ledger.owes(PaymentType.BASARISIZ):
             remainder_basarisiz = payment_copy - 4000
             # Check if remainder matches any owed amount in payment_owed OR payments_taksit_owed
-            if check_owed_with_amount(None, payment_owed, remainder_basarisiz) or check_owed_with_amount(None, payments_taksit_owed, remainder_basarisiz):
+            if ledger.owes_amount(remainder_basarisiz) or ledger.owes_taksit(remainder_basarisiz):
                 print(f"Logic: {payment_copy} = 4000 (BAŞARISIZ) + {remainder_basarisiz} (other owed)")
                 payment_types.append(["BAŞARISIZ ADAY EĞİTİMİ", "BORC VAR"])
                 # Figure out what the remainder is
-                if check_owed_with_amount(None, payments_taksit_owed, remainder_basarisiz):
+                if ledger.owes_taksit(remainder_basarisiz):
                     payment_types.append(["TAKSİT", "BORC VAR"])
-                elif check_owed_with_amount("ÖZEL DERS", payment_owed, remainder_basarisiz):
+                elif ledger.owes(PaymentType.OZEL_DERS, remainder_basarisiz):
                     payment_types.append(["ÖZEL DERS", "BORC VAR"])
-                elif check_owed_with_amount("BELGE ÜCRETİ", payment_owed, remainder_basarisiz):
+                elif ledger.owes(PaymentType.BELGE, remainder_basarisiz):
                     payment_types.append(["BELGE ÜCRETİ", "BORC VAR"])
-                elif check_owed_with_amount("UYG", payment_owed, remainder_basarisiz) or check_owed_with_amount("UYGULAMA", payment_owed, remainder_basarisiz):
+                elif ledger.owes(PaymentType.UYGULAMA, remainder_basarisiz):
                     payment_types.append(["UYGULAMA SINAV HARCI", "BORC VAR"])
-                elif check_owed_with_amount("YZL", payment_owed, remainder_basarisiz) or check_owed_with_amount("YAZILI", payment_owed, remainder_basarisiz):
+                elif ledger.owes(PaymentType.YAZILI, remainder_basarisiz):
                     payment_types.append(["YAZILI SINAV HARCI", "BORC VAR"])
                 else:
                     payment_types.append(["BILINMIYOR", f"FLAG: {remainder_basarisiz}"])
-                return payment_types, cached_data
+                return payment_types
         
-        elif payment_copy > 4000 and check_owed("TAKSİT", payments_taksit_owed) and get_owed_taksit(payments_taksit_owed) >= payment_copy and not check_date_if_paid(date_of_payment, payments_taksit_paid):
+        elif payment_copy > 4000 and ledger.owes_taksit() and (ledger.first_owed_taksit or 0) >= payment_copy and not ledger.taksit_paid_since(date_of_payment):
             payment_types.append(["TAKSİT", "BORC VAR"])
 
         # Handle payment = sinav + taksit where sinav borc not opened yet
         # e.g. 8200 = 1200 (yazili) + 7000 (taksit sum), or 8600 = 1600 (uygulama) + 7000 (taksit sum)
-        elif check_owed("TAKSİT", payments_taksit_owed):
-            total_taksit = get_total_owed_taksit(payments_taksit_owed)
+        elif ledger.owes_taksit():
+            total_taksit = ledger.total_owed_taksit
             if total_taksit > 0:
                 # Check YAZILI SINAV (1200 or 900) - only if remainder divisible by 500
                 for yazili_amount in [1200, 900]:
@@ -931,6 +1149,6 @@ async def get_payment_type(page, name_surname, payment_amount, date_of_payment,
                         print(f"Logic: {payment_copy} > {total_taksit} - no matching debt")
                         payment_types.append(["BILINMIYOR", "HIC ACIK BORC YOK: ODEME TUTARI TOTAL BORCLARDAN FAZLA"])
 
-    return payment_types, cached_data
+    return payment_types
 
 
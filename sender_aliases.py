@@ -0,0 +1,140 @@
+"""
+Persistent SQLite store of bank sender -> Golden student aliases.
+Parents and relatives pay for students, so the sender name on the statement is often not
+the student's. Every sender that a run (or a WhatsApp correction) tied to a Golden student
+is remembered, and the next statement from that sender resolves without an LLM call or search.
+"""
+import sqlite3
+import threading
+import time
+
+import app_paths
+from name_cache import normalize_key_part
+
+# Eviction defaults: aliases not used for this many days are dropped (students finish the course)
+MAX_ENTRIES = 5000
+MAX_AGE_DAYS = 270
+# Flagged rows wait this long for a WhatsApp correction
+PENDING_DAYS = 30
+
+
+def amount_key(amount):
+    try:
+        return f"{float(amount):.2f}"
+    except (TypeError, ValueError):
+        return str(amount).strip()
+
+
+class SenderAliasStore:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.path = path or app_paths.sender_aliases_path()
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        # Names are resolved from worker threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            "sender TEXT NOT NULL, student TEXT NOT NULL, uses INTEGER NOT NULL, source TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (sender, student))"
+        )
+        # Rows flagged FLAG 404, so a WhatsApp correction can be tied back to their sender.
+        # Keyed by the statement description: many rows share the name "ERROR: 404" and an amount.
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS flagged_rows ("
+            "description TEXT PRIMARY KEY, name TEXT NOT NULL, amount TEXT NOT NULL, sender TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, sender):
+        """
+        The Golden student this sender pays for, or None.
+        A sender seen paying for more than one student is ambiguous and returns None.
+        """
+        key = normalize_key_part(sender)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT student FROM aliases WHERE sender = ? AND last_used >= ?",
+                (key, time.time() - self.max_age_days * 86400)
+            ).fetchall()
+            if len(rows) != 1:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return rows[0][0]
+
+    def put(self, sender, student, source="run"):
+        """Record that sender paid for student (once per processed row)."""
+        key = normalize_key_part(sender)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO aliases (sender, student, uses, source, created_at, last_used) VALUES (?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (sender, student) DO UPDATE SET uses = uses + 1, last_used = excluded.last_used",
+                (key, student, source, now, now)
+            )
+            self._conn.commit()
+
+    def flag(self, description, name, amount, sender):
+        """Remember the sender of a statement row that was flagged as not found."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO flagged_rows (description, name, amount, sender, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(description).strip(), normalize_key_part(name), amount_key(amount), normalize_key_part(sender), time.time())
+            )
+            self._conn.commit()
+
+    def resolve_flag(self, name, amount, student):
+        """
+        A flagged row (result table name and amount) was entered for student (WhatsApp correction): alias its sender.
+        Returns the sender, or None if no flagged row, or more than one, has that name and amount.
+        """
+        key = (normalize_key_part(name), amount_key(amount))
+        with self._lock:
+            rows = self._conn.execute("SELECT description, sender FROM flagged_rows WHERE name = ? AND amount = ?", key).fetchall()
+            if len(rows) != 1:
+                if rows:
+                    print(f"{len(rows)} flagged rows match {name} {amount}, not remembering a sender")
+                return None
+            description, sender = rows[0]
+            self._conn.execute("DELETE FROM flagged_rows WHERE description = ?", (description,))
+            self._conn.commit()
+        self.put(sender, student, source="whatsapp")
+        return sender
+
+    def evict(self):
+        """Drop aliases unused for max_age_days and old flags, then the least used aliases above max_entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM aliases WHERE last_used < ?", (time.time() - self.max_age_days * 86400,))
+            self._conn.execute("DELETE FROM flagged_rows WHERE created_at < ?", (time.time() - PENDING_DAYS * 86400,))
+            self._conn.execute(
+                "DELETE FROM aliases WHERE rowid NOT IN "
+                "(SELECT rowid FROM aliases ORDER BY uses DESC, last_used DESC LIMIT ?)", (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+            pending = self._conn.execute("SELECT COUNT(*) FROM flagged_rows").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size, "pending": pending}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Global store to avoid reopening the database for every row
+_store = None
+_store_lock = threading.Lock()
+
+def get_alias_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SenderAliasStore()
+        return _store
@@ -0,0 +1,120 @@
+"""
+In-memory index of the kursiyer list in Golden, scraped once per run.
+Bank-statement names are resolved locally against it (ICU Turkish case folding, word
+order, surname plus given names) to the exact Golden record, so the browser can go
+straight to the student's page instead of searching by name and then by surname.
+Anything less certain than that is left to the normal search flow.
+"""
+import re
+from urllib.parse import urlparse
+
+from turkish_names import fold
+
+# Fewer students than this means the scrape did not return the real list
+MIN_ENTRIES = 5
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def normalize(name):
+    return " ".join(fold(name).split())
+
+
+def order_key(key):
+    """The same name with its words in any order ("YILMAZ ALI" == "ALI YILMAZ")."""
+    return " ".join(sorted(key.split()))
+
+
+def student_links(links):
+    """
+    Pick the students out of the links of a search result page: the largest group of
+    links to the same page that differ only in their query string (the student id).
+    """
+    groups = {}
+    for url, text in links:
+        parsed = urlparse(url)
+        if not parsed.query or len(TOKEN_PATTERN.findall(text)) < 2:
+            continue
+        groups.setdefault(parsed.path, []).append((text, url))
+    return max(groups.values(), key=len, default=[])
+
+
+class StudentDirectory:
+    def __init__(self, students, complete=True):
+        """
+        students: [(Golden name, student page url)]
+        complete: False if only part of the list could be read (one page of the result table);
+        the given-names match is then off, the real student may be on a page that was not read.
+        """
+        self.complete = complete
+        self.entries = []
+        self.by_key = {}
+        self.by_order = {}
+        self.by_surname = {}
+        self.by_name = {}
+        for name, url in students:
+            key = normalize(name)
+            entry_id = len(self.entries)
+            self.entries.append((name, url, key))
+            self.by_key.setdefault(key, []).append(entry_id)
+            self.by_order.setdefault(order_key(key), []).append(entry_id)
+            if key:
+                self.by_surname.setdefault(key.split()[-1], []).append(entry_id)
+            self.by_name.setdefault(name, []).append(url)
+        self.stats = {"exact": 0, "word_order": 0, "given_names": 0, "unresolved": 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def resolve(self, name):
+        """
+        (Golden name, url) for a statement name, or None if there is no certain match:
+        the same words, the same words in another order, or the Golden surname plus
+        full given names (a second given name missing on either side).
+        Two students matching the same way are left to the browser flow.
+        """
+        key = normalize(name)
+        kinds = [("exact", self.by_key.get(key, [])), ("word_order", self.by_order.get(order_key(key), []))]
+        if self.complete:
+            kinds.append(("given_names", self.given_name_matches(key)))
+        for kind, matches in kinds:
+            if len(matches) == 1:
+                self.stats[kind] += 1
+                return self.entries[matches[0]][:2]
+            if len(matches) > 1:
+                self.stats["unresolved"] += 1
+                return None
+        self.stats["unresolved"] += 1
+        return None
+
+    def given_name_matches(self, key):
+        """Students whose surname is a word of the name and whose given names contain, or are contained in, the rest."""
+        words = key.split()
+        matches = set()
+        for word in words:
+            rest = set(words) - {word}
+            for entry_id in self.by_surname.get(word, ()):
+                given = set(self.entries[entry_id][2].split()[:-1])
+                if rest and given and (rest <= given or given <= rest):
+                    matches.add(entry_id)
+        return sorted(matches)
+
+    def url_for(self, golden_name):
+        """Page of the student with that Golden name, or None if no student or several students have it."""
+        urls = self.by_name.get(golden_name, [])
+        return urls[0] if len(urls) == 1 else None
+
+
+# Directory of the current run, used to jump straight to a student's page
+active_directory = None
+
+
+def set_active_directory(directory):
+    global active_directory
+    active_directory = directory
+
+
+def student_url(golden_name):
+    """Student page URL of a resolved name, or None if there is no directory or the name is not in it."""
+    if active_directory is None:
+        return None
+    return active_directory.url_for(golden_name)
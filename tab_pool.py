@@ -0,0 +1,114 @@
+"""
+Run a statement on several tabs of the same logged-in browser context.
+Each student is handled by exactly one tab so a student's writes never race each other,
+a per-site cap and a global rate limit keep the load on Golden bounded, and the
+records of all tabs end up in the payments CSV in statement order.
+"""
+import os
+import time
+import asyncio
+
+TAB_COUNT = int(os.getenv("RPA_TABS", "1"))
+# At most this many tabs talk to Golden at the same time
+SITE_CONCURRENCY = int(os.getenv("GOLDEN_MAX_CONCURRENCY", "3"))
+# Rows started per minute across all tabs (0 = no limit)
+RATE_PER_MINUTE = float(os.getenv("GOLDEN_RATE_PER_MINUTE", "30"))
+
+
+class RateLimiter:
+    """Spaces out acquisitions so that at most rate_per_minute start per minute, across all tabs."""
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        # No await between reading and moving next_slot, so tabs cannot take the same slot
+        now = time.monotonic()
+        delay = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SitePacer:
+    """`async with pacer:` around one unit of work on the site (rate limit + concurrency cap)."""
+
+    def __init__(self, concurrency=SITE_CONCURRENCY, rate_per_minute=RATE_PER_MINUTE):
+        self.limiter = RateLimiter(rate_per_minute)
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def __aenter__(self):
+        await self.limiter.wait()
+        await self.semaphore.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+        return False
+
+
+class OrderedRecordWriter:
+    """
+    Saves each payment record as soon as its row produces it (the UI sees progress and a
+    /stop loses nothing) and keeps it tagged with its statement row. Tabs finish rows out
+    of order, so close() hands the run's records to reorder_records in statement order
+    when they were saved in a different one.
+    """
+
+    def __init__(self, row_order, save_record, reorder_records):
+        self.position = {row_index: n for n, row_index in enumerate(row_order)}
+        self.save_record = save_record
+        self.reorder_records = reorder_records
+        # (row index, record) in the order they were saved
+        self.saved = []
+
+    def recorder(self, row_index):
+        """A save_payment_record replacement for one row."""
+        def save(record):
+            self.save_record(record)
+            self.saved.append((row_index, record))
+        return save
+
+    def close(self):
+        # Stable sort: the records of one row keep their order
+        ordered = sorted(range(len(self.saved)), key=lambda n: self.position.get(self.saved[n][0], len(self.position)))
+        if ordered != list(range(len(self.saved))):
+            self.reorder_records([self.saved[n][1] for n in ordered])
+
+
+async def run_on_tabs(page, groups, worker, tab_count=TAB_COUNT):
+    """
+    Spread (student, rows) groups over tab_count tabs of page's context.
+    worker(tab, name, rows) is awaited for each group; a free tab takes the next group.
+    Extra tabs are opened on the current page's URL and closed at the end.
+    """
+    tab_count = max(1, min(tab_count, len(groups)))
+    tabs = [page]
+    for _ in range(tab_count - 1):
+        tab = await page.context.new_page()
+        await tab.goto(page.url)
+        tabs.append(tab)
+
+    queue = asyncio.Queue()
+    for group in groups:
+        queue.put_nowait(group)
+
+    async def drain(tab):
+        while True:
+            try:
+                name, rows = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await worker(tab, name, rows)
+
+    try:
+        await asyncio.gather(*(drain(tab) for tab in tabs))
+    finally:
+        for tab in tabs[1:]:
+            try:
+                await tab.close()
+            except Exception as e:
+                print(f"Could not close tab: {e}")
@@ -0,0 +1,68 @@
+"""
+Tests for the browser worker's supervision.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import browser_daemon
+from browser_daemon import BrowserDaemon
+
+
+class FakeProcess:
+    def __init__(self, alive=True):
+        self.alive = alive
+
+    def is_alive(self):
+        return self.alive
+
+
+def daemon_with(process, job=None, heartbeat_age=0):
+    daemon = BrowserDaemon()
+    daemon.process = process
+    daemon.worker_state = {"state": "busy" if job else "ready", "job": job}
+    daemon.last_heartbeat = time.time() - heartbeat_age
+    return daemon
+
+
+def test_stale_worker_is_restarted_when_idle():
+    daemon = daemon_with(FakeProcess(), heartbeat_age=browser_daemon.STALE_AFTER_SECONDS + 1)
+    assert daemon.restart_reason().startswith("no heartbeat")
+
+
+def test_stale_worker_is_not_killed_during_a_payment_job():
+    """A statement or correction may be between ÖDETTİR and its record"""
+    for job in browser_daemon.WRITE_JOB_KINDS:
+        daemon = daemon_with(FakeProcess(), job=job, heartbeat_age=browser_daemon.STALE_AFTER_SECONDS + 1)
+        assert daemon.restart_reason() is None
+    assert daemon_with(FakeProcess(), job="lookup", heartbeat_age=browser_daemon.STALE_AFTER_SECONDS + 1).restart_reason() is not None
+
+
+def test_dead_worker_is_always_restarted():
+    assert daemon_with(FakeProcess(alive=False), job="statement").restart_reason() == "worker exited"
+    assert daemon_with(None).restart_reason() is None
+
+
+def test_fail_waiting_releases_every_job():
+    daemon = BrowserDaemon()
+    slots = [{"done": threading.Event(), "response": None} for _ in range(3)]
+    daemon.waiting = dict(enumerate(slots))
+    daemon.fail_waiting("browser worker stopped")
+    assert daemon.waiting == {}
+    assert all(slot["done"].is_set() and slot["response"]["ok"] is False for slot in slots)
+
+
+def test_stale_worker_is_not_ready():
+    """Callers fall back to their own browser instead of queueing behind a hung job"""
+    assert daemon_with(FakeProcess(), job="statement").is_ready()
+    assert not daemon_with(FakeProcess(), job="statement", heartbeat_age=browser_daemon.STALE_AFTER_SECONDS + 1).is_ready()
+
+
+def test_running_job():
+    assert daemon_with(FakeProcess(), job="correction").running_job() == "correction"
+    assert daemon_with(FakeProcess()).running_job() is None
+    assert daemon_with(FakeProcess(alive=False), job="statement").running_job() is None
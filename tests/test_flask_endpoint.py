@@ -36,3 +36,55 @@ def test_whatsapp_returns_xml(client):
         'From': 'whatsapp:+1234567890'
     })
     assert 'xml' in response.content_type.lower()
+
+
+def test_ocr_status_reports_state(client):
+    """/ocr-status should always answer with a state, even if the service is not running"""
+    response = client.get('/ocr-status')
+    assert response.status_code == 200
+    assert response.get_json()["state"] in ("stopped", "cold", "loading", "warm")
+
+
+def test_browser_daemon_health_when_stopped(client):
+    """/browser-daemon/health should answer even if the worker was never started"""
+    response = client.get('/browser-daemon/health')
+    assert response.status_code == 200
+    assert response.get_json()["state"] == "stopped"
+
+
+def test_lookup_needs_name_and_worker(client):
+    """/lookup validates the name and refuses to launch a browser on its own"""
+    assert client.get('/lookup').status_code == 400
+    assert client.get('/lookup?name=Ali Veli').status_code == 503
+
+
+def test_start_rejects_unknown_pacing_profile(client):
+    response = client.post('/start', json={"pacing": "turbo"})
+    assert response.status_code == 400
+
+
+def test_start_rejects_unknown_headless_value(client):
+    """"false" must not turn into a headless run; anything unclear is refused"""
+    for value in ("maybe", 2, [], {"on": True}, 0.5):
+        assert client.post('/start', json={"headless": value}).status_code == 400
+
+
+def test_parse_headless():
+    from flask_endpoint import parse_headless
+    assert parse_headless("false") is False
+    assert parse_headless(" TRUE ") is True
+    assert parse_headless("0") is False
+    assert parse_headless(1) is True
+    assert parse_headless(False) is False
+    assert parse_headless(None) is None
+
+
+def test_stop_restarts_the_browser_worker_during_a_job(client, monkeypatch):
+    """A statement on the warm browser is only stopped by restarting the worker"""
+    from flask_endpoint import browser_daemon
+    reasons = []
+    monkeypatch.setattr(browser_daemon, "running_job", lambda: "statement")
+    monkeypatch.setattr(browser_daemon, "restart", reasons.append)
+    response = client.post('/stop')
+    assert response.status_code == 200
+    assert reasons == ["stopped from /stop"]
@@ -0,0 +1,93 @@
+"""
+Simple tests for the direct HTTP ledger reader.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import golden_http
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from golden_http import ledger_from_html, parse_page, template_from_request, fill_template
+
+ODEME_HTML = """
+<html><body>
+<a href="kursiyer.php?id=12&sayfa=odeme">ÖDEME</a>
+<table class="table table-bordered">
+  <thead><tr><th>Tip</th><th>Tarih</th><th>Tutar</th><th>Durum</th></tr></thead>
+  <tbody>
+    <tr><td>TAKSİT</td><td>10.10.2025</td><td>5.000,00</td><td>ÖDEMEDİ</td></tr>
+    <tr><td>TAKSİT</td><td>10.09.2025</td><td>12.09.2025</td><td>5.000,00</td><td>ÖDEDİ</td></tr>
+  </tbody>
+</table>
+<table class="table table-bordered">
+  <tbody>
+    <tr><td>YZL. SNV. HARCI</td><td>05.12.2025</td><td>1.200,00</td><td>ÖDEMEDİ</td></tr>
+  </tbody>
+</table>
+</body></html>
+"""
+
+
+def test_ledger_from_html_matches_dom_format():
+    owed, paid, taksit_paid, taksit_owed = ledger_from_html(ODEME_HTML)
+    assert owed == ["[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"]
+    assert paid == []
+    assert taksit_owed == ["[TAKSİT, 10.10.2025, 5.000,00, ÖDEMEDİ]"]
+    assert taksit_paid == ["[TAKSİT, 12.09.2025, 5.000,00, ÖDEDİ]"]
+
+
+def test_unexpected_pages_are_not_ledgers():
+    """Login pages and tables DataTables fills later must fall back to the browser"""
+    assert ledger_from_html('<form><input id="kurumkodu"></form>') is None
+    assert ledger_from_html('<table class="table table-bordered"></table><table class="table table-bordered"></table>') is None
+
+
+def test_links_are_collected_with_text():
+    links = parse_page(ODEME_HTML).links
+    assert links == [("kursiyer.php?id=12&sayfa=odeme", "ÖDEME")]
+
+
+def test_search_template_round_trip():
+    template = template_from_request("POST", "https://golden.example/ara.php", "txtaraadi=Ali+Y%C4%B1lmaz&x=1", "Ali Yılmaz")
+    assert template["post_data"] == "txtaraadi={query}&x=1"
+    method, url, post_data = fill_template(template, "Ebru Şahin")
+    assert (method, url) == ("POST", "https://golden.example/ara.php")
+    assert post_data == "txtaraadi=Ebru+%C5%9Eahin&x=1"
+
+
+def test_request_without_query_is_not_a_template():
+    assert template_from_request("GET", "https://golden.example/anasayfa.php", None, "Ali Yılmaz") is None
+
+
+def test_payment_template_needs_the_student_parameter():
+    """A form post is only replayable if the student's id from the ÖDEME url can be substituted"""
+    from golden_http import payment_template_from_request, fill_payment_template
+    form = "kursiyer_id=12&borctipi=3&tutar=1200&tarih=01.02.2026"
+    content_type = "application/x-www-form-urlencoded; charset=UTF-8"
+    template = payment_template_from_request(
+        "POST", "https://golden.example/ajax/odeme_kaydet.php", form, content_type,
+        "https://golden.example/kursiyer.php?id=12&sayfa=odeme", "3", 1200, "01.02.2026",
+    )
+    assert template["form"] == [["kursiyer_id", "{param:id}"], ["borctipi", "{type}"], ["tutar", "{amount}"], ["tarih", "{today}"]]
+    method, url, fields = fill_payment_template(template, "https://golden.example/kursiyer.php?id=40&sayfa=odeme", "5", 4000, "03.02.2026")
+    assert (method, url) == ("POST", "https://golden.example/ajax/odeme_kaydet.php")
+    assert fields == [("kursiyer_id", "40"), ("borctipi", "5"), ("tutar", "4000"), ("tarih", "03.02.2026")]
+
+    # The student id is not in the post (e.g. kept in the server session): refuse to record
+    assert payment_template_from_request(
+        "POST", "https://golden.example/ajax/odeme_kaydet.php", "borctipi=3&tutar=1200", content_type,
+        "https://golden.example/kursiyer.php?id=12", "3", 1200, "01.02.2026",
+    ) is None
+
+
+def test_verify_payment_outcomes():
+    from golden_http import verify_payment
+    before = ([
+        "[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"], [], [], [])
+    paid = ([], ["[YAZILI SINAV HARCI, 03.02.2026, 1.200,00, ÖDEDİ]"], [], [])
+    other = ([], ["[YAZILI SINAV HARCI, 03.02.2026, 600,00, ÖDEDİ]"], [], [])
+    assert verify_payment(before, paid, "YAZILI SINAV HARCI", 1200) == "ok"
+    assert verify_payment(before, before, "YAZILI SINAV HARCI", 1200) == "not_written"
+    assert verify_payment(before, other, "YAZILI SINAV HARCI", 1200) == "unknown"
+    assert verify_payment(before, None, "YAZILI SINAV HARCI", 1200) == "unknown"
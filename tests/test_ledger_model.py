@@ -0,0 +1,57 @@
+"""
+Tests for the parsed ledger model.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger_model import Ledger, LedgerEntry, PaymentType
+
+
+LEDGER = (
+    ["[YZL. SNV. HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"],
+    ["[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEDİ]"],
+    ["[TAKSİT, 03.12.2025, 2.500,00, ÖDEDİ]"],
+    ["[TAKSİT, 10.12.2025, 2.500,00, ÖDEMEDİ]", "[TAKSİT, 10.01.2026, 4.750,50, ÖDEMEDİ]"],
+)
+
+
+def test_entry_parses_type_amount_and_date():
+    """Abbreviated types map to the enum; amounts are kept in kuruş"""
+    entry = LedgerEntry.from_row("[YZL. SNV. HARCI, 05.12.2025, 1.200,50, ÖDEMEDİ]")
+    assert entry.type is PaymentType.YAZILI
+    assert entry.kurus == 120050
+    assert entry.lira == 1200
+    assert entry.day == date(2025, 12, 5)
+    assert entry.paid is False
+
+
+def test_ledger_indexes_owed_and_paid_types():
+    """Owed amounts are matched per type in whole lira"""
+    ledger = Ledger.from_rows(LEDGER)
+    assert ledger.owes(PaymentType.YAZILI, 1200)
+    assert not ledger.owes(PaymentType.YAZILI, 900)
+    assert not ledger.owes(PaymentType.UYGULAMA)
+    assert ledger.has_paid(PaymentType.BELGE)
+    assert ledger.owes_amount(1200.0)
+
+
+def test_ledger_taksit_sums():
+    """Open installments are summed once, in kuruş"""
+    ledger = Ledger.from_rows(LEDGER)
+    assert ledger.total_owed_taksit == 7250
+    assert ledger.first_owed_taksit == 2500.0
+    assert ledger.owes_taksit(4750)
+    assert ledger.has_paid_taksit()
+
+
+def test_taksit_paid_since_statement_date():
+    """An installment paid on or after the statement date counts as paid"""
+    ledger = Ledger.from_rows(LEDGER)
+    assert ledger.taksit_paid_since("03.12.2025")
+    assert ledger.taksit_paid_since("2025-12-01 00:00:00")
+    assert not ledger.taksit_paid_since("04.12.2025")
+    assert not Ledger.from_rows(([], [], [], [])).taksit_paid_since("01.01.2025")
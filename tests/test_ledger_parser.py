@@ -0,0 +1,55 @@
+"""
+Simple tests for the local ledger row parser.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import ledger_parser
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger_parser import parse_ledger_row, is_paid_row, start_parse_stats, count_parsed, CONFIDENCE_THRESHOLD
+
+
+def test_paid_row_uses_second_date():
+    """ÖDEDİ rows with two dates should use the payment (second) date"""
+    row, confidence = parse_ledger_row("TAKSİT 03.12.2025 11.12.2025 5.000,00 ÖDEDİ")
+    assert row == "[TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]"
+    assert confidence >= CONFIDENCE_THRESHOLD
+
+
+def test_abbreviations_receipt_id_and_yazdir():
+    """YZL+SNV maps to YAZILI, receipt IDs and YAZDIR are ignored"""
+    row, _ = parse_ledger_row("1 YZL. SNV. HARCI 5618 05.12.2025 1.200,00 ÖDEMEDİ YAZDIR")
+    assert row == "[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"
+
+
+def test_fuzzy_ocr_typo():
+    """Small OCR mistakes in the type should still match"""
+    row, confidence = parse_ledger_row("TAKSLT 10.10.2025 9.500,00 ÖDEMEDİ")
+    assert row == "[TAKSİT, 10.10.2025, 9.500,00, ÖDEMEDİ]"
+    assert confidence >= CONFIDENCE_THRESHOLD
+
+
+def test_unknown_type_goes_to_llm():
+    """Rows without a recognizable type should not be parsed locally"""
+    row, confidence = parse_ledger_row("AVUKAT 05.12.2025 600,00")
+    assert row is None
+    assert confidence < CONFIDENCE_THRESHOLD
+
+
+def test_paid_is_decided_by_the_parsed_status():
+    """OCR without diacritics ("ODEDI") is still paid; the cleaned status wins over the raw text"""
+    assert is_paid_row("[TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]", "TAKSIT 03.12.2025 11.12.2025 5.000,00 ODEDI")
+    assert not is_paid_row("[TAKSİT, 10.10.2025, 9.500,00, ÖDEMEDİ]", "TAKSİT 10.10.2025 9.500,00 ÖDEMEDİ ÖDEDİ")
+    assert is_paid_row("TAKSIT 5.000,00", "TAKSIT 5.000,00 ODEDI")
+    assert not is_paid_row(None, "TAKSIT 5.000,00")
+
+
+def test_parse_stats_are_per_run():
+    """A run that starts counting does not see another run's rows"""
+    import contextvars
+    first = contextvars.copy_context().run(lambda: (start_parse_stats(), count_parsed("local", 3))[0])
+    second = contextvars.copy_context().run(lambda: (start_parse_stats(), count_parsed("llm"))[0])
+    assert first == {"local": 3, "llm": 0}
+    assert second == {"local": 0, "llm": 1}
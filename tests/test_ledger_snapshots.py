@@ -0,0 +1,44 @@
+"""
+Simple tests for the cross-run ledger snapshot database.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import ledger_snapshots
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger_snapshots import LedgerSnapshotDB
+
+LEDGER = (
+    ["[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"],
+    [],
+    ["[TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]"],
+    [],
+)
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """A saved ledger should load back with its checksum"""
+    db = LedgerSnapshotDB(path=str(tmp_path / "snapshots.sqlite"))
+    db.save("Ali Yilmaz", LEDGER, checksum="1/1|1|20251211", source_hash="abc")
+    snapshot = db.load("Ali Yilmaz")
+    assert snapshot.ledger == tuple(list(rows) for rows in LEDGER)
+    assert snapshot.checksum == "1/1|1|20251211"
+    assert snapshot.is_fresh(max_age_hours=1)
+
+
+def test_snapshot_freshness_window(tmp_path):
+    """A zero-hour window should never trust a snapshot without checking the page"""
+    db = LedgerSnapshotDB(path=str(tmp_path / "snapshots.sqlite"))
+    db.save("Ali Yilmaz", LEDGER)
+    assert not db.load("Ali Yilmaz").is_fresh(max_age_hours=0)
+
+
+def test_missing_and_deleted_snapshot(tmp_path):
+    """Unknown or deleted students have no snapshot"""
+    db = LedgerSnapshotDB(path=str(tmp_path / "snapshots.sqlite"))
+    assert db.load("Ebra Kaya") is None
+    db.save("Ebra Kaya", LEDGER)
+    db.delete("Ebra Kaya")
+    assert db.load("Ebra Kaya") is None
@@ -0,0 +1,59 @@
+"""
+Simple tests for the run-scoped ledger store.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import ledger_store
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger_store import LedgerStore
+
+
+def make_store():
+    store = LedgerStore()
+    store.put("Ali Yilmaz", (
+        ["[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"],
+        [],
+        [],
+        ["[TAKSİT, 10.10.2025, 5.000,00, ÖDEMEDİ]", "[TAKSİT, 10.11.2025, 5.000,00, ÖDEMEDİ]"],
+    ))
+    return store
+
+
+def test_get_counts_hits_and_misses():
+    """Known students are hits, unknown ones are misses"""
+    store = make_store()
+    assert store.get("Ali Yilmaz") is not None
+    assert store.get("Ebra Kaya") is None
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+
+def test_fee_payment_moves_row_to_paid():
+    """Paying an owed fee should move it from owed to paid"""
+    store = make_store()
+    store.apply_payment("Ali Yilmaz", "YAZILI SINAV HARCI", 1200, paid_on="12.12.2025")
+    owed, paid, _, _ = store.get("Ali Yilmaz")
+    assert owed == []
+    assert paid == ["[YAZILI SINAV HARCI, 12.12.2025, 1.200,00, ÖDEDİ]"]
+
+
+def test_taksit_payment_pays_installments_in_order():
+    """A TAKSİT payment closes the first installment and reduces the next one"""
+    store = make_store()
+    store.apply_payment("Ali Yilmaz", "TAKSİT", 7000, paid_on="12.12.2025")
+    _, _, taksit_paid, taksit_owed = store.get("Ali Yilmaz")
+    assert taksit_paid == ["[TAKSİT, 12.12.2025, 5.000,00, ÖDEDİ]", "[TAKSİT, 12.12.2025, 2.000,00, ÖDEDİ]"]
+    assert taksit_owed == ["[TAKSİT, 10.11.2025, 3.000,00, ÖDEMEDİ]"]
+
+
+def test_model_is_reparsed_after_a_payment():
+    """The parsed ledger is cached until our own payment changes the rows"""
+    store = make_store()
+    model = store.model("Ali Yilmaz")
+    assert store.model("Ali Yilmaz") is model
+    assert model.total_owed_taksit == 10000
+    store.apply_payment("Ali Yilmaz", "TAKSİT", 7000, paid_on="12.12.2025")
+    assert store.model("Ali Yilmaz").total_owed_taksit == 3000
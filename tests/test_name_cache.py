@@ -0,0 +1,45 @@
+"""
+Simple tests for the name extraction cache.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path so we can import name_cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_cache import NameCache
+
+
+def test_cache_hit_after_put(tmp_path):
+    """A stored answer should be returned for the same description and sender"""
+    cache = NameCache(path=str(tmp_path / "names.sqlite"))
+    cache.put("KURS ODEME EBRA", "Ali Yilmaz", ["Ebra"])
+    assert cache.get("KURS ODEME EBRA", "Ali Yilmaz") == ["Ebra"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_key_is_normalized(tmp_path):
+    """Case (Turkish-aware) and extra spaces should not cause a miss"""
+    cache = NameCache(path=str(tmp_path / "names.sqlite"))
+    cache.put("kurs  ödeme ebru", "ali yilmaz", [])
+    assert cache.get("KURS ÖDEME EBRU", "ALİ YILMAZ") == []
+
+
+def test_cache_miss_counted(tmp_path):
+    """Unknown keys should return None and count as a miss"""
+    cache = NameCache(path=str(tmp_path / "names.sqlite"))
+    assert cache.get("TAKSIT", "Mehmet Kaya") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_above_max_entries(tmp_path):
+    """Only the newest max_entries rows should survive eviction"""
+    cache = NameCache(path=str(tmp_path / "names.sqlite"), max_entries=2)
+    for i in range(3):
+        cache.put(f"ODEME {i}", "Sender", [f"Name {i}"])
+        time.sleep(0.01)
+    cache.evict()
+    assert cache.stats()["size"] == 2
+    assert cache.get("ODEME 0", "Sender") is None
@@ -0,0 +1,99 @@
+"""
+Tests for the resident OCR service.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import socket
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr_service
+
+
+def free_address():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return ("127.0.0.1", s.getsockname()[1])
+
+
+def wait_for_service():
+    for _ in range(50):
+        if ocr_service.ocr_service_status() is not None:
+            return
+        time.sleep(0.05)
+
+
+def broken_reader(*args, **kwargs):
+    raise RuntimeError("CUDA not available")
+
+
+def test_failed_model_load_is_answered_with_an_error(monkeypatch):
+    """A model that cannot load must not leave readtext waiting forever"""
+    monkeypatch.setitem(sys.modules, "easyocr", types.SimpleNamespace(Reader=broken_reader))
+    monkeypatch.setattr(ocr_service, "OCR_SERVICE_ADDRESS", free_address())
+    monkeypatch.setenv(ocr_service.AUTHKEY_ENV, "test-session-key")
+    threading.Thread(target=ocr_service.serve, args=(b"test-session-key",), daemon=True).start()
+    wait_for_service()
+
+    assert ocr_service.readtext_via_service(b"image") is None
+    status = None
+    for _ in range(50):
+        status = ocr_service.ocr_service_status()
+        if status is not None and status["state"] == "failed":
+            break
+        time.sleep(0.05)
+    assert status["state"] == "failed"
+    assert "CUDA" in status["error"]
+    assert ocr_service.readtext_via_service(b"image") is None
+
+
+def test_model_is_loaded_on_the_first_readtext(monkeypatch):
+    """OCR is only a fallback: starting the service must not load EasyOCR"""
+    loads = []
+
+    class Reader:
+        def __init__(self, *args, **kwargs):
+            loads.append(kwargs)
+
+        def readtext(self, image, mag_ratio=2):
+            return [([[0, 0]], "TAKSİT", 0.9)]
+
+    monkeypatch.setitem(sys.modules, "easyocr", types.SimpleNamespace(Reader=Reader))
+    monkeypatch.setattr(ocr_service, "OCR_SERVICE_ADDRESS", free_address())
+    monkeypatch.setenv(ocr_service.AUTHKEY_ENV, "test-session-key")
+    threading.Thread(target=ocr_service.serve, args=(b"test-session-key",), daemon=True).start()
+    wait_for_service()
+
+    assert ocr_service.ocr_service_status()["state"] == "cold"
+    assert loads == []
+    assert ocr_service.readtext_via_service(b"image")[0][1] == "TAKSİT"
+    assert ocr_service.ocr_service_status()["state"] == "warm"
+    assert len(loads) == 1
+
+
+def test_client_gives_up_when_no_service_answers(monkeypatch):
+    monkeypatch.setattr(ocr_service, "OCR_SERVICE_ADDRESS", free_address())
+    monkeypatch.setenv(ocr_service.AUTHKEY_ENV, "test-session-key")
+    assert ocr_service.ocr_service_status() is None
+    assert ocr_service.readtext_via_service(b"image") is None
+
+
+def test_other_keys_are_rejected(monkeypatch):
+    """A process without this session's key cannot send the server pickles"""
+    monkeypatch.setitem(sys.modules, "easyocr", types.SimpleNamespace(Reader=broken_reader))
+    monkeypatch.setattr(ocr_service, "OCR_SERVICE_ADDRESS", free_address())
+    monkeypatch.setenv(ocr_service.AUTHKEY_ENV, "test-session-key")
+    threading.Thread(target=ocr_service.serve, args=(b"test-session-key",), daemon=True).start()
+    for _ in range(50):
+        if ocr_service.ocr_service_status() is not None:
+            break
+        time.sleep(0.05)
+    assert ocr_service.ocr_service_status() is not None
+    monkeypatch.setenv(ocr_service.AUTHKEY_ENV, "golden-mouse-ocr")
+    assert ocr_service.ocr_service_status() is None
+    monkeypatch.delenv(ocr_service.AUTHKEY_ENV)
+    assert ocr_service.ocr_service_status() is None
@@ -0,0 +1,46 @@
+"""
+Simple tests for the pacing profiles.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path so we can import pacing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pacing import Pacer, DELAYS
+
+
+def test_careful_profile_keeps_original_ranges():
+    pacer = Pacer("careful")
+    pacer.observe(0.05)
+    for _ in range(50):
+        assert DELAYS["review"][0] <= pacer.delay_for("review") <= DELAYS["review"][1]
+
+
+def test_adaptive_profile_follows_response_time():
+    """A fast site gets pauses near the profile minimum, a slow one near its maximum"""
+    fast_site = Pacer("normal")
+    fast_site.observe(0.1)
+    slow_site = Pacer("normal")
+    slow_site.observe(10)
+    low, high = DELAYS["review"]
+    assert max(fast_site.delay_for("review") for _ in range(50)) <= low * 0.6 * 1.3
+    assert min(slow_site.delay_for("review") for _ in range(50)) >= high * 0.6 * 0.7
+
+
+def test_unknown_profile_falls_back_to_careful():
+    assert Pacer("turbo").profile_name == "careful"
+
+
+def test_report_separates_delay_and_waiting():
+    pacer = Pacer("fast")
+    pacer.record_wait(0.5)
+    asyncio.run(pacer.pause("key"))
+    report = pacer.report()
+    assert report["page_waits"] == 1
+    assert report["waiting_seconds"] == 0.5
+    assert report["avg_response_seconds"] == 0.5
+    assert report["pauses"] == {"key": 1}
+    assert report["deliberate_delay_seconds"] <= DELAYS["key"][1]
@@ -0,0 +1,106 @@
+"""
+Simple tests for the page synchronization steps.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path so we can import page_sync
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_sync
+
+
+class FakeResponse:
+    async def finished(self):
+        return None
+
+
+class FakeRequest:
+    def __init__(self, method="POST", url="https://golden.example/kursiyer_ara.php", post_data=None, resource_type="xhr"):
+        self.method = method
+        self.url = url
+        self.post_data = post_data
+        self.resource_type = resource_type
+
+    async def response(self):
+        return FakeResponse()
+
+
+class FakePage:
+    """Sends requests (one every response_delay seconds); step has to pick the one its predicate matches."""
+    def __init__(self, response_delay=0.01, requests=None):
+        self.response_delay = response_delay
+        self.requests = requests or [FakeRequest()]
+
+    async def wait_for_event(self, event, predicate, timeout):
+        assert event == "request"
+        for request in self.requests:
+            await asyncio.sleep(self.response_delay)
+            if predicate(request):
+                return request
+        await asyncio.sleep(timeout / 1000)
+        raise TimeoutError("no matching request")
+
+
+class FakeLocator:
+    def __init__(self, appears_after=None):
+        self.appears_after = appears_after
+        self.waited = False
+
+    async def wait_for(self, state, timeout):
+        self.waited = True
+        if self.appears_after is None or self.appears_after * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("not visible")
+        await asyncio.sleep(self.appears_after)
+
+
+def test_step_returns_once_ready():
+    async def click():
+        return True
+
+    result, ready = asyncio.run(page_sync.step(FakePage(), click, ready=FakeLocator(0.01), network=True))
+    assert result is True and ready is True
+
+
+def test_failed_action_is_not_waited_on():
+    async def click():
+        return False
+
+    locator = FakeLocator()
+    result, ready = asyncio.run(page_sync.step(FakePage(), click, ready=locator))
+    assert (result, ready) == (False, False)
+    assert not locator.waited
+
+
+def test_all_signals_share_one_deadline():
+    """The response and the locator together may not take longer than the step timeout"""
+    async def click():
+        return True
+
+    page = FakePage(response_delay=0.15)
+    result, ready = asyncio.run(page_sync.step(page, click, ready=FakeLocator(0.1), network=True, timeout_ms=200))
+    assert ready is False
+
+
+def test_network_waits_for_the_matching_request():
+    """A poll sent while the form is submitted is not the form's answer"""
+    async def click():
+        return True
+
+    poll = FakeRequest(method="GET", url="https://golden.example/bildirim.php")
+    payment = FakeRequest(method="POST", url="https://golden.example/odeme.php")
+    _, ready = asyncio.run(page_sync.step(FakePage(requests=[poll]), click, network=page_sync.request_matcher(method="POST"), timeout_ms=100))
+    assert ready is False
+    _, ready = asyncio.run(page_sync.step(FakePage(requests=[poll, payment]), click, network=page_sync.request_matcher(method="POST")))
+    assert ready is True
+
+
+def test_request_matcher_finds_the_search_text_in_any_encoding():
+    matches = page_sync.request_matcher(contains="ALİ YILMAZ")
+    assert matches(FakeRequest(post_data="txtaraadi=AL%C4%B0+YILMAZ"))
+    assert matches(FakeRequest(method="GET", url="https://golden.example/ara.php?q=AL%C4%B0%20YILMAZ"))
+    assert not matches(FakeRequest(post_data="txtaraadi=EBRA+KAYA"))
+    assert not matches(FakeRequest(post_data="txtaraadi=AL%C4%B0+YILMAZ", resource_type="image"))
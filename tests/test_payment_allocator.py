@@ -0,0 +1,72 @@
+"""
+Tests for the subset-sum payment allocator.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger_model import Ledger, PaymentType
+from payment_allocator import allocate, load_fee_schedule, FEE_SCHEDULE
+
+
+def make_ledger(owed, installments=()):
+    taksit_owed = [f"[TAKSİT, 10.{m:02d}.2025, {amount}, ÖDEMEDİ]" for m, amount in enumerate(installments, 1)]
+    return Ledger.from_rows((owed, [], [], taksit_owed))
+
+
+def test_splits_amount_over_open_fees_and_installments():
+    """Fee rows are covered first and whole installments take the rest"""
+    ledger = make_ledger(["[ÖZEL DERS, 01.10.2025, 4.000,00, ÖDEMEDİ]", "[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEMEDİ]"],
+                         ["2.500,00", "2.500,00"])
+    allocation = allocate(ledger, 9000)
+    assert allocation.parts == [(PaymentType.OZEL_DERS, 400000), (PaymentType.TAKSIT, 500000)]
+    assert allocation.payment_types() == [["ÖZEL DERS", "BORC VAR", 4000], ["TAKSİT", "BORC VAR", 5000]]
+    assert "whole installments" in allocation.reason
+
+
+def test_no_fit_returns_none():
+    """An amount that no combination of open items makes is left for a human"""
+    ledger = make_ledger(["[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEMEDİ]"], ["2.500,00"])
+    assert allocate(ledger, 1234) is None
+
+
+def test_equally_good_decompositions_are_ambiguous():
+    """Two different fee rows with the same amount and age cannot be told apart"""
+    ledger = make_ledger(["[ÖZEL DERS, 01.10.2025, 4.000,00, ÖDEMEDİ]", "[BAŞARISIZ ADAY EĞİTİMİ, 01.10.2025, 4.000,00, ÖDEMEDİ]"])
+    assert allocate(ledger, 4000) is None
+
+
+def test_oldest_fee_row_wins_a_tie():
+    """With the same amount the row open longest is paid"""
+    ledger = make_ledger(["[ÖZEL DERS, 01.11.2025, 4.000,00, ÖDEMEDİ]", "[BAŞARISIZ ADAY EĞİTİMİ, 01.09.2025, 4.000,00, ÖDEMEDİ]"])
+    assert allocate(ledger, 4000).parts == [(PaymentType.BASARISIZ, 400000)]
+
+
+def test_decide_payment_types_allocates_flagged_amounts():
+    """A 4000 payment the fixed rules flag is resolved against an owed ÖZEL DERS"""
+    from rpa_helper import decide_payment_types
+    ledger = (["[ÖZEL DERS, 01.10.2025, 4.000,00, ÖDEMEDİ]"], [], [], [])
+    assert decide_payment_types(ledger, 4000, "10.12.2025") == [["ÖZEL DERS", "BORC VAR", 4000]]
+
+
+def test_decide_payment_types_does_not_allocate_an_already_entered_payment():
+    """A 4000 TAKSİT already posted on the statement date keeps the row flagged"""
+    from rpa_helper import decide_payment_types
+    ledger = ([], [], ["[TAKSİT, 10.12.2025, 4.000,00, ÖDEDİ]"], ["[TAKSİT, 10.01.2026, 5.000,00, ÖDEMEDİ]"])
+    assert decide_payment_types(ledger, 4000, "10.12.2025") == [["DORTBIN", "FLAG: 4000"]]
+
+
+def test_deliberate_flag_is_not_replaced_by_a_partial_installment_guess():
+    """4000 against a single open 5000 installment would only be a TAKSIT_STEP guess"""
+    from rpa_helper import decide_payment_types
+    ledger = ([], [], [], ["[TAKSİT, 10.01.2026, 5.000,00, ÖDEMEDİ]"])
+    assert allocate(Ledger.from_rows(ledger), 4000).partial_installment
+    assert decide_payment_types(ledger, 4000, "10.12.2025") == [["DORTBIN", "FLAG: 4000"]]
+
+
+def test_malformed_fee_schedule_falls_back_to_the_default():
+    assert load_fee_schedule('{"YAZILI SINAV HARCI": [1300, 1000]}')[PaymentType.YAZILI] == (1300, 1000)
+    for value in ("{not json", '{"HARC": [100]}', "[1, 2]", '{"BELGE ÜCRETİ": 1000}'):
+        assert load_fee_schedule(value) == FEE_SCHEDULE
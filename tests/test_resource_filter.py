@@ -0,0 +1,56 @@
+"""
+Simple tests for the resource route filter.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path so we can import resource_filter
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resource_filter import ResourceFilter, should_block
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+def test_blocks_non_essential_types_and_trackers():
+    assert should_block("image", "https://golden.example/img/logo.png")
+    assert should_block("font", "https://golden.example/fonts/a.woff2")
+    assert should_block("script", "https://www.googletagmanager.com/gtm.js")
+    assert should_block("script", "https://connect.facebook.net/sdk.js")
+
+
+def test_keeps_what_the_bot_needs():
+    assert not should_block("document", "https://golden.example/kursiyer.php")
+    assert not should_block("xhr", "https://golden.example/ajax/odeme.php")
+    assert not should_block("stylesheet", "https://golden.example/css/site.css")
+    assert not should_block("script", "https://golden.example/js/jquery.dataTables.js")
+
+
+def test_report_counts_blocked_requests():
+    resource_filter = ResourceFilter()
+    routes = [FakeRoute("image", "https://golden.example/a.png"), FakeRoute("xhr", "https://golden.example/ajax")]
+    for route in routes:
+        asyncio.run(resource_filter.handle(route))
+    assert [route.outcome for route in routes] == ["aborted", "continued"]
+    report = resource_filter.report()
+    assert report["requests_blocked"] == 1
+    assert report["blocked_by_type"] == {"image": 1}
+    assert report["estimated_kb_saved"] > 0
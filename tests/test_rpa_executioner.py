@@ -0,0 +1,162 @@
+"""
+Simple tests for the statement planning helpers in rpa_executioner.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import rpa_executioner
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rpa_executioner import plan_student_groups
+
+
+def test_plan_groups_rows_by_student():
+    """Rows of the same student should be processed together, in statement order"""
+    name_rows = [3, 5, 40, 41, 211]
+    row_names = {3: "Ali Yilmaz", 5: "Ebra Kaya", 40: "Ali Yilmaz", 41: "Ebra Kaya", 211: "Ali Yilmaz"}
+    assert plan_student_groups(name_rows, row_names) == [
+        ("Ali Yilmaz", [3, 40, 211]),
+        ("Ebra Kaya", [5, 41]),
+    ]
+
+
+def test_plan_keeps_backwards_order():
+    """When iterating backwards (son_kasa_miktari), groups follow that order too"""
+    name_rows = [9, 7, 2]
+    row_names = {9: "Ebra Kaya", 7: "Ali Yilmaz", 2: "Ebra Kaya"}
+    assert plan_student_groups(name_rows, row_names) == [
+        ("Ebra Kaya", [9, 2]),
+        ("Ali Yilmaz", [7]),
+    ]
+
+
+def make_statement():
+    import pandas as pd
+    from rpa_executioner import type_statement
+    return type_statement(pd.DataFrame({
+        "Açıklama": ["FAST-ALI YILMAZ-TAKSIT", "PK 4411 KART", "CEP ŞUBE-KIRA-EBRA KAYA", "FAST-CAN KAYA-", "FAST-X-"],
+        "Tutar": ["1.200,00", "500,00", "-300,00", "2.000,00", None],
+        "Etiket": ["Para Transferi", "Para Transferi", "Para Transferi", "Virman", "Para Transferi"],
+        "Tarih": ["05.12.2025", "06.12.2025", "07.12.2025", "08.12.2025", "09.12.2025"],
+        "Bakiye": ["38.594,30", "39.094,30", 38794.3, 40794.3, None],
+    }))
+
+
+def test_to_number_reads_turkish_and_english_text():
+    """A dot before exactly three final digits is a thousands separator, not a decimal point"""
+    import pandas as pd
+    from rpa_executioner import to_number
+    column = pd.Series(["1.200", "12.500", "1.200.000", "-4.000", "1.200,50", "38,594.30", "12.5", "1,200", "abc"])
+    assert to_number(column).tolist()[:8] == [1200, 12500, 1200000, -4000, 1200.5, 38594.3, 12.5, 1200]
+    assert pd.isna(to_number(column).iloc[8])
+
+
+def test_row_plan_filters_with_reasons():
+    """Costs, non-transfers and empty amounts are skipped with a reason; POS rows are listed"""
+    from rpa_executioner import plan_statement_rows
+    df = make_statement()
+    plan = plan_statement_rows([df["Açıklama"], df["Tutar"], df["Etiket"], df["Tarih"], df["Bakiye"]])
+    assert plan.rows == [0, 1]
+    assert plan.pos_rows == [1]
+    assert plan.skipped == [(2, "cost"), (3, "not a transfer"), (4, "no amount")]
+
+
+def test_row_plan_runs_backwards_from_start_row():
+    """With a starting row the plan goes backwards to row 0"""
+    from rpa_executioner import plan_statement_rows
+    df = make_statement()
+    plan = plan_statement_rows([df["Açıklama"], df["Tutar"], df["Etiket"], df["Tarih"], df["Bakiye"]], start_row=3)
+    assert plan.rows == [1, 0]
+
+
+def test_bakiye_search_takes_last_matching_row():
+    """The bottom-most row whose Bakiye integer part matches is the starting row"""
+    from rpa_executioner import find_starting_row_from_bakiye
+    df = make_statement()
+    assert find_starting_row_from_bakiye(df["Bakiye"], "38,794.30") == 2
+    assert find_starting_row_from_bakiye(df["Bakiye"], "38594") == 0
+    assert find_starting_row_from_bakiye(df["Bakiye"], "12") == 0
+
+
+class FakeAliasStore:
+    def __init__(self):
+        self.learned = []
+
+    def put(self, sender, student, source="run"):
+        self.learned.append((sender, student))
+
+
+class FakeSnapshots:
+    def __init__(self):
+        self.calls = []
+
+    def save(self, student, ledger, checksum=None, source_hash=None):
+        self.calls.append("save")
+
+    def delete(self, student):
+        self.calls.append("delete")
+
+
+def run_row(monkeypatch, amount, ledger=None, snapshots=None, page_ledger=None):
+    """
+    Process one FAST transfer row for ALI YILMAZ (stored ledger, or loaded through snapshots
+    and a page showing page_ledger). Returns the aliases learned and the payments entered.
+    """
+    import asyncio
+    import rpa_executioner
+    from ledger_store import LedgerStore
+
+    aliases = FakeAliasStore()
+    entered = []
+    monkeypatch.setattr(rpa_executioner, "get_alias_store", lambda: aliases)
+    monkeypatch.setattr(rpa_executioner, "update_processing_status", lambda *args: None)
+
+    async def fake_enter_payment(page, page_student, name_surname, collection_type, amount, http_reader=None):
+        entered.append((collection_type, amount))
+        return name_surname
+    monkeypatch.setattr(rpa_executioner, "enter_payment", fake_enter_payment)
+
+    async def fake_checksum(page):
+        return "page-checksum", "page-hash"
+
+    async def fake_read_ledger(page):
+        return page_ledger
+    monkeypatch.setattr(rpa_executioner, "read_ledger_checksum", fake_checksum)
+    monkeypatch.setattr(rpa_executioner, "read_ledger", fake_read_ledger)
+
+    store = LedgerStore()
+    if ledger is not None:
+        store.put("ALI YILMAZ", ledger)
+    payment_information = [["FAST-VELI YILMAZ-KURS"], [amount], [""], ["10.12.2025"], [0]]
+    asyncio.run(rpa_executioner.process_statement_row(
+        None, 0, "ALI YILMAZ", payment_information, store, snapshots or FakeSnapshots(), "ALI YILMAZ", save_record=lambda record: None))
+    return aliases.learned, entered
+
+
+def test_sender_is_learned_after_a_borc_var_payment(monkeypatch):
+    ledger = (["[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEMEDİ]"], [], [], [])
+    assert run_row(monkeypatch, 1000, ledger)[0] == [("VELI YILMAZ", "ALI YILMAZ")]
+
+
+def test_sender_is_not_learned_without_a_payment(monkeypatch):
+    """BORC YOK only says the student owes nothing, not that the sender pays for them"""
+    assert run_row(monkeypatch, 1000, ([], [], [], [])) == ([], [])
+
+
+def test_snapshot_is_dropped_before_a_payment_is_entered(monkeypatch):
+    """A kill between the payment and the post-payment snapshot must not leave the old snapshot behind"""
+    snapshots = FakeSnapshots()
+    run_row(monkeypatch, 1000, (["[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEMEDİ]"], [], [], []), snapshots)
+    assert snapshots.calls == ["delete", "save"]
+
+
+def test_fresh_snapshot_is_re_read_before_a_payment(tmp_path, monkeypatch):
+    """The page already shows the BELGE ÜCRETİ paid by an interrupted run: nothing is paid again"""
+    from ledger_snapshots import LedgerSnapshotDB
+    snapshots = LedgerSnapshotDB(path=str(tmp_path / "snapshots.sqlite"))
+    snapshots.save("ALI YILMAZ", (["[BELGE ÜCRETİ, 01.10.2025, 1.000,00, ÖDEMEDİ]"], [], [], []))
+    page_ledger = ([], ["[BELGE ÜCRETİ, 10.12.2025, 1.000,00, ÖDEDİ]"], [], [])
+    learned, entered = run_row(monkeypatch, 1000, snapshots=snapshots, page_ledger=page_ledger)
+    assert entered == []
+    assert snapshots.load("ALI YILMAZ").ledger == tuple(list(rows) for rows in page_ledger)
@@ -8,56 +8,162 @@ import os
 # Add parent directory to path so we can import rpa_helper
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from rpa_helper import check_owed, check_paid
-
-
-# ==================== check_owed tests ====================
-
-def test_check_owed_finds_keyword():
-    """Should return True when keyword exists in a row"""
-    payment_owed = [
-        "YAZILI SINAV HARCI 05.12.2025 1200",
-        "UYGULAMA SINAV HARCI 06.12.2025 1600"
-    ]
-    assert check_owed("YAZILI SINAV HARCI", payment_owed) == True
-
-
-def test_check_owed_returns_false_when_not_found():
-    """Should return False when keyword is not in any row"""
-    payment_owed = [
-        "YAZILI SINAV HARCI 05.12.2025 1200",
-    ]
-    assert check_owed("ÖZEL DERS", payment_owed) == False
-
-
-def test_check_owed_handles_empty_list():
-    """Should return False for empty list"""
-    assert check_owed("YAZILI SINAV HARCI", []) == False
-
-
-def test_check_owed_partial_match():
-    """Should find partial matches (substring)"""
-    payment_owed = ["YZL. SNV. HARCI 1200"]
-    assert check_owed("YZL. SNV. HARCI", payment_owed) == True
-
-
-# ==================== check_paid tests ====================
-
-def test_check_paid_finds_keyword():
-    """Should return True when keyword exists in payments"""
-    payments_paid = [
-        "YAZILI SINAV HARCI 01.12.2025 1200 ÖDEDİ",
-        "TAKSİT 02.12.2025 500 ÖDEDİ"
-    ]
-    assert check_paid("TAKSİT", payments_paid) == True
-
-
-def test_check_paid_returns_false_when_not_found():
-    """Should return False when keyword is not found"""
-    payments_paid = ["YAZILI SINAV HARCI 1200 ÖDEDİ"]
-    assert check_paid("BELGE ÜCRETİ", payments_paid) == False
-
-
-def test_check_paid_handles_empty_list():
-    """Should return False for empty list"""
-    assert check_paid("TAKSİT", []) == False
+from rpa_helper import decide_payment_types
+
+
+# ==================== decide_payment_types tests ====================
+
+def test_paid_yazili_plus_4000_installment():
+    """
+    5200 = a paid YZL. SNV. HARCI + an open 4000 TAKSİT, whether or not an installment was
+    paid since the statement date. The YAZILI+4000 branch of the complex rules used to read
+    check_paid("YZL...") or (check_paid("YAZILI...") and paid since); it now reads
+    (paid YAZILI) and paid since, and the earlier exam fee + TAKSİT combination decides first.
+    """
+    owed_4000 = ["[TAKSİT, 10.01.2026, 4.000,00, ÖDEMEDİ]"]
+    paid_yazili = ["[YZL. SNV. HARCI, 01.10.2025, 1.200,00, ÖDEDİ]"]
+    expected = [["YAZILI SINAV HARCI", "BORC ODENMIS", 1200], ["TAKSİT", "BORC VAR", 4000]]
+    assert decide_payment_types(([], paid_yazili, [], owed_4000), 5200, "10.12.2025") == expected
+    paid_since = ["[TAKSİT, 10.12.2025, 2.500,00, ÖDEDİ]"]
+    assert decide_payment_types(([], paid_yazili, paid_since, owed_4000), 5200, "10.12.2025") == expected
+
+
+def test_owed_exam_fee_amount_must_match():
+    """An owed YAZILI of 900 is not paid by a 1200 transfer"""
+    ledger = (["[YZL. SNV. HARCI, 05.12.2025, 900,00, ÖDEMEDİ]"], [], [], [])
+    assert decide_payment_types(ledger, 900, "10.12.2025") == [["YAZILI SINAV HARCI", "BORC VAR", 900]]
+    assert decide_payment_types(ledger, 1200, "10.12.2025") == [["YAZILI SINAV HARCI", "BORC ACILMAMIS YAZILI SINAV", 1200]]
+
+
+# ==================== get_human_names_batch tests ====================
+
+def test_get_human_names_batch_deduplicates(monkeypatch, tmp_path):
+    """Each unique description should be resolved only once"""
+    import asyncio
+    import rpa_helper
+    from name_cache import NameCache
+    cache = NameCache(path=str(tmp_path / "names.sqlite"))
+    monkeypatch.setattr(rpa_helper, "get_name_cache", lambda: cache)
+    from sender_aliases import SenderAliasStore
+    aliases = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    monkeypatch.setattr(rpa_helper, "get_alias_store", lambda: aliases)
+    calls = []
+    def fake_extract(description):
+        calls.append(description)
+        return description.split("-")[1]
+    monkeypatch.setattr(rpa_helper, "extract_human_name", fake_extract)
+
+    descriptions = ["FAST-Ali Yilmaz-", "FAST-Ebra Kaya-", "FAST-Ali Yilmaz-"]
+    names = asyncio.run(rpa_helper.get_human_names_batch(descriptions))
+    assert sorted(calls) == ["FAST-Ali Yilmaz-", "FAST-Ebra Kaya-"]
+    assert names["FAST-Ali Yilmaz-"] == "Ali Yilmaz"
+
+
+def test_extract_human_name_uses_sender_alias(monkeypatch, tmp_path):
+    """A known sender resolves to its student without asking the LLM"""
+    import rpa_helper
+    from sender_aliases import SenderAliasStore
+    aliases = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    aliases.put("Ali Yilmaz", "EBRA YILMAZ")
+    monkeypatch.setattr(rpa_helper, "get_alias_store", lambda: aliases)
+    def no_llm(info, sender):
+        raise AssertionError("LLM should not be called")
+    monkeypatch.setattr(rpa_helper, "ask_llm_for_names", no_llm)
+    assert rpa_helper.extract_human_name("FAST-ALİ YILMAZ-EKIM TAKSIT ODEMESI XQZ") == "EBRA YILMAZ"
+
+
+def test_alias_skipped_when_description_names_someone_else(monkeypatch, tmp_path):
+    """A parent paying for a second child should not be sent to the first one"""
+    import rpa_helper
+    from sender_aliases import SenderAliasStore
+    aliases = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    aliases.put("Ali Yilmaz", "EBRA YILMAZ")
+    monkeypatch.setattr(rpa_helper, "get_alias_store", lambda: aliases)
+    monkeypatch.setattr(rpa_helper, "guess_name", lambda info, sender: (["Mehmet"], 1.0))
+    assert rpa_helper.alias_for("Ali Yilmaz", "MEHMET KURS") is None
+    monkeypatch.setattr(rpa_helper, "guess_name", lambda info, sender: (["Ebra"], 1.0))
+    assert rpa_helper.alias_for("Ali Yilmaz", "EBRA KURS") == "EBRA YILMAZ"
+
+
+# ==================== DOM ledger row tests ====================
+
+def test_ledger_row_from_cells_paid_uses_second_date():
+    """Paid rows should use the payment date (second date) and canonical type"""
+    from rpa_helper import ledger_row_from_cells
+    cells = ["3", "TAKSİT", "03.12.2025", "11.12.2025", "5.000,00", "ÖDEDİ", "YAZDIR"]
+    assert ledger_row_from_cells(cells) == "[TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]"
+
+
+def test_ledger_row_from_cells_owed_abbreviation():
+    """Abbreviated exam fees should map to the Golden option name"""
+    from rpa_helper import ledger_row_from_cells
+    cells = ["1", "YZL. SNV. HARCI", "05.12.2025", "1.200,00", "ÖDEMEDİ"]
+    assert ledger_row_from_cells(cells) == "[YAZILI SINAV HARCI, 05.12.2025, 1.200,00, ÖDEMEDİ]"
+
+
+def test_ledger_row_from_cells_without_amount():
+    """Rows without an amount cannot be parsed"""
+    from rpa_helper import ledger_row_from_cells
+    assert ledger_row_from_cells(["Tabloda veri yok", ""]) is None
+
+
+# ==================== clean_payment_rows tests ====================
+
+def test_clean_payment_rows_maps_by_index_and_falls_back(monkeypatch):
+    """Batched answers map back by index; missing rows are cleaned one by one"""
+    import asyncio
+    import json
+    import rpa_helper
+
+    class FakeResponse:
+        status_code = 200
+        def json(self):
+            content = json.dumps([{"i": 1, "row": ["TAKSİT", "01.01.2025", "1,00", "ÖDEDİ"]}])
+            return {"choices": [{"message": {"content": content}}]}
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(rpa_helper.requests, "post", lambda **kwargs: FakeResponse())
+    async def fake_single(row_text):
+        return "SINGLE " + row_text
+    monkeypatch.setattr(rpa_helper, "clean_payment_row", fake_single)
+
+    # Garbled types so the local parser hands both rows to the LLM
+    rows = ["XQ 05.12.2025 1.200,00", "?? 03.12.2025 11.12.2025 5.000,00 ÖDEDİ"]
+    cleaned = asyncio.run(rpa_helper.clean_payment_rows(rows))
+    assert cleaned[0] == "SINGLE XQ 05.12.2025 1.200,00"
+    # Regex overrides still win over the LLM's date and amount
+    assert cleaned[1] == "[TAKSİT, 11.12.2025, 5.000,00, ÖDEDİ]"
+
+
+# ==================== decode_screenshot tests ====================
+
+def test_decode_screenshot_roundtrip():
+    """PNG bytes should decode to the same pixel array without touching disk"""
+    import numpy as np
+    import cv2
+    from rpa_helper import decode_screenshot
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    image[1, 2] = (10, 20, 30)
+    ok, png = cv2.imencode(".png", image)
+    assert ok
+    decoded = decode_screenshot(png.tobytes())
+    assert decoded.shape == (4, 6, 3)
+    assert (decoded == image).all()
+
+
+def test_each_ocr_worker_gets_its_own_reader(monkeypatch):
+    """The two OCR workers never call the same EasyOCR reader concurrently"""
+    import threading
+    import rpa_helper
+    monkeypatch.setattr(rpa_helper, "ocr_readers", threading.local())
+    monkeypatch.setattr(rpa_helper.easyocr, "Reader", lambda *args, **kwargs: object())
+    barrier = threading.Barrier(2)
+
+    def reader_twice(_):
+        barrier.wait()
+        first = rpa_helper.get_ocr_reader()
+        assert rpa_helper.get_ocr_reader() is first
+        return first
+
+    readers = list(rpa_helper.OCR_EXECUTOR.map(reader_twice, range(2)))
+    assert readers[0] is not readers[1]
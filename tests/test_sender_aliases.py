@@ -0,0 +1,61 @@
+"""
+Tests for the sender -> student alias store.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sender_aliases import SenderAliasStore
+
+
+def test_alias_returned_for_normalized_sender(tmp_path):
+    """A recorded sender should resolve regardless of case and spacing"""
+    store = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    store.put("ali  yilmaz", "EBRA YILMAZ")
+    assert store.get("ALİ YILMAZ") == "EBRA YILMAZ"
+    assert store.stats()["hits"] == 1
+
+
+def test_sender_paying_for_two_students_is_ambiguous(tmp_path):
+    """A parent with two students should fall back to name extraction"""
+    store = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    store.put("Ali Yilmaz", "EBRA YILMAZ")
+    store.put("Ali Yilmaz", "MEHMET YILMAZ")
+    assert store.get("Ali Yilmaz") is None
+
+
+def test_resolve_flag_aliases_the_flagged_sender(tmp_path):
+    """A WhatsApp correction of a flagged row should alias that row's sender"""
+    store = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    store.flag("FAST ALI YILMAZ KURS", "Ali Yilmaz", 5000, "Ali Yilmaz")
+    assert store.resolve_flag("ALI YILMAZ", 5000.0, "EBRA YILMAZ") == "ALI YILMAZ"
+    assert store.get("Ali Yilmaz") == "EBRA YILMAZ"
+    assert store.resolve_flag("Ali Yilmaz", 5000, "EBRA YILMAZ") is None
+
+
+def test_flagged_rows_with_the_same_name_do_not_collide(tmp_path):
+    """Two ERROR: 404 rows of the same amount keep both senders; a correction cannot tell them apart"""
+    store = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"))
+    store.flag("FAST ALI YILMAZ KURS", "ERROR: 404", 5000, "Ali Yilmaz")
+    store.flag("FAST AYSE KAYA KURS", "ERROR: 404", 5000, "Ayse Kaya")
+    store.flag("FAST CAN DEMIR KURS", "ERROR: 404", 3000, "Can Demir")
+    assert store.stats()["pending"] == 3
+    assert store.resolve_flag("ERROR: 404", 5000, "EBRA YILMAZ") is None
+    assert store.get("Ali Yilmaz") is None
+    assert store.resolve_flag("ERROR: 404", 3000, "CAN DEMIR") == "CAN DEMIR"
+
+
+def test_stale_and_least_used_aliases_are_evicted(tmp_path):
+    """Unused aliases expire and only the most used survive above max_entries"""
+    store = SenderAliasStore(path=str(tmp_path / "aliases.sqlite"), max_entries=1)
+    store.put("Ali Yilmaz", "EBRA YILMAZ")
+    store.put("Ali Yilmaz", "EBRA YILMAZ")
+    store.put("Ayse Kaya", "CAN KAYA")
+    store._conn.execute("UPDATE aliases SET last_used = ? WHERE student = ?", (time.time() - 400 * 86400, "CAN KAYA"))
+    store.evict()
+    assert store.get("Ali Yilmaz") == "EBRA YILMAZ"
+    assert store.get("Ayse Kaya") is None
+    assert store.stats()["size"] == 1
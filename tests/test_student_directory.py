@@ -0,0 +1,79 @@
+"""
+Simple tests for the kursiyer directory index.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import student_directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from student_directory import StudentDirectory, student_links, normalize, order_key
+
+STUDENTS = [
+    ("ALİ YILMAZ", "https://golden.example/kursiyer.php?id=1"),
+    ("AYŞE ÇELİK", "https://golden.example/kursiyer.php?id=2"),
+    ("MEHMET ÖZTÜRK", "https://golden.example/kursiyer.php?id=3"),
+    ("EBRA KAYA", "https://golden.example/kursiyer.php?id=4"),
+    ("EBRU KAYA", "https://golden.example/kursiyer.php?id=5"),
+]
+
+
+def test_exact_match_ignores_case_and_diacritics():
+    directory = StudentDirectory(STUDENTS)
+    assert directory.resolve("Ayse Celik") == STUDENTS[1]
+    assert directory.resolve("ali yılmaz") == STUDENTS[0]
+
+
+def test_word_order_and_missing_given_name_are_resolved():
+    directory = StudentDirectory(STUDENTS + [("ZEYNEP NUR ARSLAN", "https://golden.example/kursiyer.php?id=6")])
+    assert directory.resolve("Yilmaz Ali") == STUDENTS[0]
+    assert directory.resolve("Zeynep Arslan")[0] == "ZEYNEP NUR ARSLAN"
+    assert directory.resolve("Arslan Nur")[0] == "ZEYNEP NUR ARSLAN"
+
+
+def test_one_letter_edits_are_not_resolved():
+    """'Esra Kaya' is not ESMA KAYA; typos go through the normal search"""
+    directory = StudentDirectory(STUDENTS + [("ESMA KAYA", "https://golden.example/kursiyer.php?id=6")])
+    assert directory.resolve("Esra Kaya") is None
+    assert directory.resolve("Mehmet Ozturkk") is None
+    assert directory.resolve("Ebrr Kaya") is None
+    assert directory.resolve("Zeynep Arslan") is None
+
+
+def test_ambiguous_given_name_match_is_not_resolved():
+    """'Can Yılmaz' fits both ALİ CAN YILMAZ and VELİ CAN YILMAZ"""
+    directory = StudentDirectory(STUDENTS + [("ALİ CAN YILMAZ", "https://golden.example/kursiyer.php?id=6"),
+                                             ("VELİ CAN YILMAZ", "https://golden.example/kursiyer.php?id=7")])
+    assert directory.resolve("Can Yilmaz") is None
+    assert directory.resolve("Ali Can Yilmaz")[0] == "ALİ CAN YILMAZ"
+
+
+def test_student_links_picks_the_result_list():
+    links = [
+        ("https://golden.example/anasayfa.php", "Ana Sayfa"),
+        ("https://golden.example/kursiyer_ara.php?yeni=1", "KURSİYER ARA"),
+    ] + [(url, name) for name, url in STUDENTS]
+    assert student_links(links) == STUDENTS
+
+
+def test_helpers():
+    assert normalize(" Ali  Yılmaz ") == "ALI YILMAZ"
+    assert order_key(normalize("YILMAZ ALİ")) == order_key(normalize("Ali Yılmaz"))
+
+
+def test_duplicate_names_have_no_url():
+    """Two students with the same name are left to the search page, which can tell them apart"""
+    directory = StudentDirectory(STUDENTS + [("ALİ YILMAZ", "https://golden.example/kursiyer.php?id=6")])
+    assert directory.url_for("ALİ YILMAZ") is None
+    assert directory.url_for("AYŞE ÇELİK") == STUDENTS[1][1]
+    assert directory.url_for("ZEYNEP ARSLAN") is None
+
+
+def test_partial_directory_only_resolves_exact_names():
+    """On one page of the list, ALİ RIZA YILMAZ may not be the Ali Yılmaz on another page"""
+    students = [("ALİ RIZA YILMAZ", "https://golden.example/kursiyer.php?id=6")]
+    assert StudentDirectory(students).resolve("Ali Yilmaz")[0] == "ALİ RIZA YILMAZ"
+    partial = StudentDirectory(students, complete=False)
+    assert partial.resolve("Ali Yilmaz") is None
+    assert partial.resolve("Yilmaz Ali Riza")[0] == "ALİ RIZA YILMAZ"
@@ -0,0 +1,91 @@
+"""
+Simple tests for the multi-tab statement pool.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path so we can import tab_pool
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tab_pool import OrderedRecordWriter, run_on_tabs
+
+
+class FakeContext:
+    def __init__(self):
+        self.opened = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.opened.append(page)
+        return page
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = "https://golden.example/anasayfa"
+        self.closed = False
+
+    async def goto(self, url):
+        self.url = url
+
+    async def close(self):
+        self.closed = True
+
+
+def test_writer_saves_immediately_and_reorders_at_close():
+    """Records are saved as rows finish; close() puts them back in statement order"""
+    saved, reordered = [], []
+    writer = OrderedRecordWriter([5, 3, 1], saved.append, reordered.append)
+    writer.recorder(1)(["Ebra Kaya", 100, "TAKSİT", "ODENDI"])
+    writer.recorder(3)(["Ali Yilmaz", 200, "TAKSİT", "ODENDI"])
+    writer.recorder(5)(["Ali Yilmaz", 300, "BELGE ÜCRETİ", "ODENDI"])
+    writer.recorder(5)(["Ali Yilmaz", 400, "TAKSİT", "ODENDI"])
+    assert [record[1] for record in saved] == [100, 200, 300, 400]
+    writer.close()
+    assert [[record[1] for record in records] for records in reordered] == [[300, 400, 200, 100]]
+
+
+def test_writer_in_order_is_not_rewritten():
+    saved, reordered = [], []
+    writer = OrderedRecordWriter([0, 1], saved.append, reordered.append)
+    writer.recorder(0)(["Ali Yilmaz", 200, "TAKSİT", "ODENDI"])
+    writer.recorder(1)(["Ebra Kaya", 100, "TAKSİT", "ODENDI"])
+    writer.close()
+    assert len(saved) == 2 and reordered == []
+
+
+def test_reorder_payment_records_keeps_earlier_rows(tmp_path, monkeypatch):
+    import app_paths
+    from rpa_helper import save_payment_record, reorder_payment_records
+    csv_path = str(tmp_path / "payments.csv")
+    monkeypatch.setattr(app_paths, "payments_csv_path", lambda: csv_path)
+    monkeypatch.setattr(app_paths, "status_path", lambda: str(tmp_path / "status.json"))
+    monkeypatch.setattr(app_paths, "debug_log_path", lambda: str(tmp_path / "debug.log"))
+    earlier = ["Can Demir", 50, "BELGE ÜCRETİ", "ODENDI"]
+    run = [["Ebra Kaya", 100.0, "TAKSİT", "ODENDI"], ["Ali Yilmaz", 200, "TAKSİT", "ODENDI"]]
+    for record in [earlier] + run:
+        save_payment_record(record)
+    reorder_payment_records(run[::-1])
+    with open(csv_path) as f:
+        lines = f.read().splitlines()
+    assert lines[1:] == ["Can Demir,50,BELGE ÜCRETİ,ODENDI", "Ali Yilmaz,200,TAKSİT,ODENDI", "Ebra Kaya,100.0,TAKSİT,ODENDI"]
+
+
+def test_run_on_tabs_keeps_each_student_on_one_tab():
+    """Every group runs exactly once, extra tabs are closed, and tabs run concurrently"""
+    page = FakePage(FakeContext())
+    seen = {}
+
+    async def worker(tab, name, rows):
+        await asyncio.sleep(0.01)
+        seen.setdefault(name, []).append((id(tab), rows))
+
+    groups = [(f"Student {n}", [n]) for n in range(6)]
+    asyncio.run(run_on_tabs(page, groups, worker, tab_count=3))
+    assert sorted(seen) == sorted(name for name, _ in groups)
+    assert all(len(runs) == 1 for runs in seen.values())
+    assert len({tab for runs in seen.values() for tab, _ in runs}) == 3
+    assert all(tab.closed for tab in page.context.opened)
@@ -0,0 +1,56 @@
+"""
+Simple tests for the rule-based name extractor.
+Run with: pytest tests/ -v
+"""
+import sys
+import os
+
+# Add parent directory to path so we can import turkish_names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from turkish_names import guess_name, CONFIDENCE_THRESHOLD
+
+
+def test_boilerplate_is_confident_empty():
+    """Only bank terms and the sender's name means no other name"""
+    names, confidence = guess_name("EHLIYET KURS ODEMESI ALI", "Ali Yilmaz")
+    assert names == []
+    assert confidence >= CONFIDENCE_THRESHOLD
+
+
+def test_known_given_name_is_extracted():
+    """A dictionary first name next to boilerplate should be returned"""
+    names, confidence = guess_name("TAKSIT EBRA", "Mehmet Kaya")
+    assert names == ["Ebra"]
+    assert confidence >= CONFIDENCE_THRESHOLD
+
+
+def test_turkish_characters_match_dictionary():
+    """Dotted/dotless I and diacritics should not break dictionary lookups"""
+    names, _ = guess_name("ayşe gündoğdu yazılı sınav", "UNKNOWN")
+    assert names == ["Ayşe Gündoğdu"]
+
+
+def test_unknown_words_fall_back_to_llm():
+    """Words that are neither boilerplate nor known names should be low confidence"""
+    names, confidence = guess_name("XYZ LOJISTIK", "Mehmet Kaya")
+    assert names is None
+    assert confidence < CONFIDENCE_THRESHOLD
+
+
+def test_ordinary_words_are_not_surnames():
+    """Words ending like surnames (ODEMELER, KREDILI) are not taken as a surname"""
+    names, confidence = guess_name("EBRA ODEMELER", "Mehmet Kaya")
+    assert names is None and confidence < CONFIDENCE_THRESHOLD
+    names, confidence = guess_name("ALI KREDILI", "Mehmet Kaya")
+    assert names is None and confidence < CONFIDENCE_THRESHOLD
+
+
+def test_one_person_is_returned():
+    """Given name(s) + one surname make one name; anything else goes to the LLM"""
+    assert guess_name("ZEYNEP NUR KARAOGLU TAKSIT", "Mehmet Kaya") == (["Zeynep Nur Karaoglu"], 0.9)
+    assert guess_name("Ali Yılmaz", "Mehmet Kaya") == (["Ali Yılmaz"], 0.9)
+    names, confidence = guess_name("ALI AYSE", "Mehmet Kaya")
+    assert names is None and confidence < CONFIDENCE_THRESHOLD
+    names, confidence = guess_name("ALI YILMAZ AYSE", "Mehmet Kaya")
+    assert names is None and confidence < CONFIDENCE_THRESHOLD
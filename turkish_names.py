@@ -0,0 +1,111 @@
+"""
+Rule-based Turkish name extraction for bank statement descriptions.
+Most descriptions are bank boilerplate (KURS, ODEME, EHLIYET...) or a plain
+first/last name, which can be answered locally without asking the LLM.
+"""
+import re
+
+from icu import Locale, UnicodeString
+
+tr = Locale("tr")
+
+# Answers at or above this confidence are used directly, anything below goes to the LLM
+CONFIDENCE_THRESHOLD = 0.8
+
+# Bank and driving school terms that are never part of a name (ASCII-folded uppercase)
+STOP_WORDS = frozenset("""
+KURS KURSU KURSA ODEME ODEMESI ODEMEDIR ODENEN HESAP HESABI HESABA YAPI KREDI KREDISI
+HARC HARCI HARCLARI UCRET UCRETI EHLIYET EHLIYETI SINAV SINAVI SINAVLARI SNV YAZILI YZL
+UYGULAMA UYG DIREKSIYON TAKSIT TAKSITI TKST BELGE BELGESI OZEL DERS DERSI BASARISIZ ADAY
+EGITIM EGITIMI SURUCU SURUCUSU FAST EFT HAVALE GONDEREN ALICI ACIKLAMA ICIN VE ILE TL TRY
+PARA TRANSFER TRANSFERI BORC BORCU KALAN AYLIK OCAK SUBAT MART NISAN MAYIS HAZIRAN
+TEMMUZ AGUSTOS EYLUL EKIM KASIM ARALIK OGRENCI KURSIYER EHL B SINIFI SINIF A1 A2 C D E
+CEP SUBE INTERNET MOBIL BANKA BANKASI REF NO SN ADINA ADINAYA ABLAM ABIM KARDESIM OGLUM KIZIM
+""".split())
+
+# Common Turkish given names (ASCII-folded uppercase)
+GIVEN_NAMES = frozenset("""
+AHMET MEHMET MUSTAFA ALI HUSEYIN HASAN IBRAHIM ISMAIL YUSUF OSMAN MURAT OMER RAMAZAN HALIL
+SULEYMAN ABDULLAH MAHMUT RECEP SALIH FATIH KADIR EMRE HAKAN ADEM KEMAL YASAR BURAK SERKAN
+MUHAMMET ORHAN ENES BERKAY EMIR YUNUS ARDA EREN KEREM BARIS TOLGA VOLKAN UGUR CAN CEM
+OGUZ ONUR SINAN TUNCAY OZAN UMUT CAGLAR ERKAN ERDEM GOKHAN ILKER IDRIS ENVER ERCAN FURKAN
+SEMIH SERDAR TAHA TUNA YIGIT BATUHAN ALPEREN EFE KAAN MERT DOGAN METIN SELIM VEDAT ZEKI
+FATMA AYSE EMINE HATICE ZEYNEP ELIF MERVE SULTAN SEVGI HULYA MELEK ZEHRA ESRA OZLEM YASEMIN
+LEYLA HANDE DILEK GULSEN SERAP SIBEL TUGBA BUSRA KUBRA RABIA SEMA FADIME HACER HAVVA MERYEM
+SEVDA EBRU EBRA ECE IREM BEYZA DERYA EDA GIZEM NUR NURAY PINAR SEDA SELIN BUSE CANSU DAMLA
+DUYGU ESMA FEYZA GAMZE HILAL ILAYDA ASLI AYLIN BERNA BIRSEN BURCU CEREN DENIZ DIDEM ESIN
+EYLUL GOZDE GULAY KEVSER MELIKE NAZLI NESLIHAN OYA OZGE SENA SILA SUDE TUBA YAGMUR YELIZ
+""".split())
+
+# Common Turkish surnames (ASCII-folded uppercase)
+SURNAMES = frozenset("""
+YILMAZ KAYA DEMIR SAHIN CELIK YILDIZ YILDIRIM OZTURK AYDIN OZDEMIR ARSLAN DOGAN KILIC ASLAN
+CETIN KARA KOC KURT OZKAN SIMSEK POLAT OZCAN KORKMAZ CAKIR ERDOGAN YAVUZ CAN ACAR AKTAS
+KALKAN GUNES BULUT AKSOY TURAN KESKIN UNAL GUL KOSE GUNDOGDU TEKIN ATES ALTUN ERDEM KAPLAN
+GUNDUZ OZER TAS BOZKURT COSKUN TOPRAK BAYRAM AVCI YUKSEL OZBEK UZUN GENC EREN SARI DEMIRCI
+KARAKAYA AKIN DURMAZ SEN OZGUR BAYSAL ALTIN TURK SAHIN CIFTCI ISIK KOCAK TUNC DUMAN
+""".split())
+
+# Surname endings that are reliable even when the surname itself is not in the list.
+# Only endings ordinary words do not share (ER/AL/AN/LI/CI... would take ODEMELER, KREDILI);
+# and they only count right after the given name(s)
+SURNAME_SUFFIX_PATTERN = re.compile(r"(OGLU|GIL|SOY|KAYA|DAG|TEPE|TAS|KAN)$")
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+DIGIT_PATTERN = re.compile(r"\d")
+
+FOLD_TABLE = str.maketrans("ÇĞİÖŞÜÂÎÛ", "CGIOSUAIU")
+
+
+def fold(token):
+    """Turkish-aware uppercase, then strip diacritics so 'Ayşe', 'AYSE' and 'AYŞE' compare equal."""
+    return str(UnicodeString(token).toUpper(tr)).translate(FOLD_TABLE)
+
+
+def title_case(token):
+    lower = str(UnicodeString(token).toLower(tr))
+    return str(UnicodeString(lower[:1]).toUpper(tr)) + lower[1:]
+
+
+def guess_name(info, sender=None):
+    """
+    Try to extract the human name from a description locally.
+    Returns (names, confidence) where names follows the LLM contract:
+    a list of names that are different from the sender (empty if none).
+    """
+    sender_tokens = {fold(t) for t in TOKEN_PATTERN.findall(str(sender or ""))}
+    candidates = []
+    for word in str(info).split():
+        # Receipt IDs and reference codes (EF5600706, 12/2025) are never names
+        if DIGIT_PATTERN.search(word):
+            continue
+        for token in TOKEN_PATTERN.findall(word):
+            folded = fold(token)
+            if len(folded) < 2 or folded in STOP_WORDS or folded in sender_tokens:
+                continue
+            candidates.append((token, folded))
+
+    # Pure boilerplate: nothing but bank terms and the sender's own name
+    if not candidates:
+        return [], 1.0
+
+    # The leftover tokens must read as one person - given name, optionally a second given
+    # name, optionally one surname - otherwise let the LLM decide
+    if candidates[0][1] not in GIVEN_NAMES:
+        return None, 0.0
+    if len(candidates) > 3:
+        return None, 0.5
+    rest = candidates[1:]
+    if len(rest) == 2:
+        # Two given names only count as one person's when a surname follows
+        if rest[0][1] not in GIVEN_NAMES:
+            return None, 0.3
+        rest = rest[1:]
+    if rest and not is_surname(rest[0][1]):
+        return None, 0.3
+
+    return [" ".join(title_case(token) for token, _ in candidates)], 0.9
+
+
+def is_surname(folded):
+    return folded in SURNAMES or (len(folded) > 4 and SURNAME_SUFFIX_PATTERN.search(folded) is not None)